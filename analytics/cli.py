@@ -0,0 +1,66 @@
+"""Argument types shared by the report scripts.
+
+Each converts one command-line value and raises
+``argparse.ArgumentTypeError`` for values the analysis cannot use, so
+argparse reports them as usage errors instead of failing later with a
+traceback.
+"""
+import argparse
+
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+
+def _int(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not an integer') from None
+
+
+def positive_int(value):
+    number = _int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'must be a positive integer, got {value}')
+    return number
+
+
+def non_negative_int(value):
+    number = _int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f'must be 0 or a positive integer, got {value}')
+    return number
+
+
+def _float(value):
+    try:
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a number') from None
+
+
+def positive_float(value):
+    number = _float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f'must be a positive number, got {value}')
+    return number
+
+
+def fraction(value):
+    """A number strictly between 0 and 1, such as a relative error."""
+    number = _float(value)
+    if not 0 < number < 1:
+        raise argparse.ArgumentTypeError(f'must be between 0 and 1 (exclusive), got {value}')
+    return number
+
+
+def date(value):
+    """``value`` unchanged, once pandas has parsed it as a date."""
+    try:
+        parsed = pd.Timestamp(value)
+    except (ValueError, OverflowError):
+        parsed = pd.NaT
+    if parsed is pd.NaT:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a date (e.g. 2017-01-31)')
+    return value
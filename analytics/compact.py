@@ -0,0 +1,45 @@
+"""Compact in-memory representation of the sales frame.
+
+Every text column is dictionary-encoded as a pandas categorical (integer
+codes plus one shared lookup table per column), integer columns are
+downcast to the smallest type that holds them, and columns nothing reads
+are dropped. Groupbys then run on the integer codes.
+"""
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+# Not read by any dashboard view
+UNUSED_COLUMNS = ['Country', 'Ship Date', 'Postal Code']
+
+
+def memory_usage(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_frame(df, drop=UNUSED_COLUMNS):
+    df = df.drop(columns=[c for c in drop if c in df.columns])
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            columns[name] = series
+        elif pd.api.types.is_integer_dtype(series):
+            columns[name] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series) and name != 'Sales':
+            columns[name] = pd.to_numeric(series, downcast='float')
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            columns[name] = series.astype('category')
+        else:
+            columns[name] = series
+    return pd.DataFrame(columns)
+
+
+def memory_report(before, after):
+    """Per-column deep memory usage of two frames, plus totals, in bytes."""
+    report = pd.DataFrame({
+        'before': before.memory_usage(deep=True, index=False),
+        'after': after.memory_usage(deep=True, index=False),
+    })
+    report.loc['Total'] = report.sum()
+    return report.astype('Int64')
@@ -0,0 +1,54 @@
+"""Pre-aggregated sales cube.
+
+The cube holds one row per observed combination of ``CUBE_DIMENSIONS``
+with the sum, count and sum of squares of Sales. Any groupby over a subset
+of those dimensions can be answered by rolling up the cube, which touches
+one row per cell instead of one row per order line.
+"""
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+CUBE_DIMENSIONS = ['Year', 'Month', 'Region', 'Category', 'Sub-Category',
+                   'Segment', 'Ship Mode', 'State']
+
+MEASURES = ['sum', 'count', 'sumsq']
+
+
+def build_cube(df, dimensions=CUBE_DIMENSIONS):
+    sales = df['Sales']
+    frame = df[dimensions].assign(sum=sales, count=1, sumsq=sales * sales)
+    return (frame.groupby(dimensions, observed=True, sort=False)[MEASURES]
+            .sum()
+            .reset_index())
+
+
+def merge_cubes(*cubes, dimensions=CUBE_DIMENSIONS):
+    # Measures are additive, so partial cubes combine by summing matching cells
+    return (pd.concat(cubes, ignore_index=True)
+            .groupby(dimensions, observed=True, sort=False)[MEASURES]
+            .sum()
+            .reset_index())
+
+
+def rollup(cube, dimensions):
+    """Aggregate the cube up to ``dimensions``.
+
+    Returns a frame indexed by ``dimensions`` with sum, count, mean and
+    (sample) std of Sales for each group.
+    """
+    if isinstance(dimensions, str):
+        dimensions = [dimensions]
+    grouped = cube.groupby(dimensions, observed=True)[MEASURES].sum()
+    count = grouped['count']
+    grouped['mean'] = grouped['sum'] / count
+    variance = (grouped['sumsq'] - count * grouped['mean'] ** 2) / (count - 1)
+    grouped['std'] = np.sqrt(variance.clip(lower=0))
+    return grouped
+
+
+def totals(cube):
+    total = cube[MEASURES].sum()
+    return {'sum': total['sum'], 'count': int(total['count']),
+            'mean': total['sum'] / total['count'] if total['count'] else 0.0}
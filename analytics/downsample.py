@@ -0,0 +1,101 @@
+"""Reduce a time series to a point budget for drawing.
+
+A chart cannot show more points than it has pixel columns, so plotting a
+long daily or per-order series point by point only costs serialization
+and rendering time. Both methods keep the first and last point and pick
+real points from the series (nothing is averaged away), so values and
+dates in the reduced series are ones that occurred. Neither returns more
+than the points asked for:
+
+``lttb``
+    Largest-Triangle-Three-Buckets: one point per bucket, the one forming
+    the largest triangle with the point kept before it and the mean of
+    the next bucket. Keeps the visual shape of the line, peaks included.
+    Below three points, just the first and last.
+``minmax``
+    The lowest and highest point of each bucket. Keeps the exact envelope
+    of the series, which is what a dense line or area chart shows. Below
+    four points, the first, the last and the highest.
+"""
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def _numeric(x):
+    # Positions on the x axis as floats; dates count in nanoseconds
+    if isinstance(x, pd.PeriodIndex):
+        x = x.to_timestamp()
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    if np.issubdtype(x.dtype, np.number):
+        return x.astype(float)
+    return np.arange(len(x), dtype=float)
+
+
+def _edges(n, buckets):
+    # Bucket boundaries over the points between the first and the last
+    return np.linspace(1, n - 1, buckets + 1).astype(np.intp)
+
+
+def lttb(x, y, points):
+    """Positions of the ``points`` points LTTB keeps, in order."""
+    n = len(y)
+    if points >= n:
+        return np.arange(n)
+    if points < 3:
+        return np.unique([0, n - 1][:points])
+    x, y = _numeric(x), np.asarray(y, dtype=float)
+    edges = _edges(n, points - 2)
+    sizes = np.diff(edges)
+    # Mean of each bucket, and of the last point as the bucket after the last
+    mean_x = np.append(np.add.reduceat(x, edges[:-1]) / sizes, x[-1])
+    mean_y = np.append(np.add.reduceat(y, edges[:-1]) / sizes, y[-1])
+
+    kept = np.empty(points, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        area = np.abs((x[previous] - mean_x[bucket + 1]) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (mean_y[bucket + 1] - y[previous]))
+        previous = lo + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def minmax(x, y, points):
+    """Positions of the lowest and highest point per bucket, in order."""
+    n = len(y)
+    if points >= n:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    if points < 4:
+        return np.unique([0, n - 1, int(np.argmax(y))][:points])
+    edges = _edges(n, (points - 2) // 2)
+    kept = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        bucket = y[lo:hi]
+        kept.append(lo + int(np.argmin(bucket)))
+        kept.append(lo + int(np.argmax(bucket)))
+    return np.unique(kept)
+
+
+METHODS = {
+    'lttb': lttb,
+    'minmax': minmax,
+}
+
+
+def downsample(data, points, method='lttb', column=None):
+    """Rows of ``data`` (a series, or a frame by ``column``) kept by ``method``.
+
+    ``data`` is indexed by its x values: dates, periods or numbers.
+    Returns ``data`` itself when it already fits in ``points``.
+    """
+    if points is None or len(data) <= points:
+        return data
+    y = data if column is None else data[column]
+    return data.iloc[METHODS[method](data.index, y.to_numpy(), points)]
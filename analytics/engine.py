@@ -0,0 +1,115 @@
+"""Multi-core aggregation for the report scripts.
+
+The dataset is split into contiguous row partitions. Each worker process
+memory-maps its slice of the columnar snapshot (nothing but the snapshot
+path and row bounds crosses the process boundary), builds a
+``SalesAggregate`` for it, and sends that small partial back. The
+partials are merged in partition order, so the merged result is the same
+as a single-process run. Date-bounded runs split the work by the month
+partitions of ``analytics.partitions`` instead, reading only those in
+the window.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .partitions import ensure_partitions, overlapping, read_partition_meta, read_partitions
+from .snapshot import build_snapshot, is_fresh, read_meta, read_snapshot, snapshot_path_for
+from .streaming import SalesAggregate, add_date_parts
+
+
+class EmptyWindowError(ValueError):
+    """No sales have an Order Date in the requested window."""
+
+
+def partition_bounds(rows, partitions):
+    partitions = max(1, min(partitions, rows))
+    step, extra = divmod(rows, partitions)
+    bounds, start = [], 0
+    for index in range(partitions):
+        stop = start + step + (1 if index < extra else 0)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def aggregate_partition(snapshot_path, start, stop, distinct='exact', duplicates=False):
+    chunk = read_snapshot(snapshot_path, start=start, stop=stop)
+    return SalesAggregate(distinct=distinct, duplicates=duplicates).update(add_date_parts(chunk))
+
+
+def ensure_snapshot(csv_path):
+    snapshot_path = snapshot_path_for(csv_path)
+    if not is_fresh(snapshot_path, csv_path):
+        build_snapshot(csv_path, snapshot_path)
+    return snapshot_path
+
+
+def aggregate_parallel(csv_path, workers=None, distinct='exact', partitions=None,
+                       duplicates=False):
+    """Aggregate ``csv_path`` across ``workers`` processes.
+
+    ``partitions`` defaults to one per worker; more partitions than workers
+    evens out stragglers at the cost of more partials to merge.
+    """
+    workers = workers or os.cpu_count() or 1
+    snapshot_path = ensure_snapshot(csv_path)
+    rows = read_meta(snapshot_path)['rows']
+    bounds = partition_bounds(rows, partitions or workers)
+
+    if workers == 1:
+        partials = [aggregate_partition(snapshot_path, start, stop, distinct, duplicates)
+                    for start, stop in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(aggregate_partition, snapshot_path, start, stop, distinct,
+                                   duplicates)
+                       for start, stop in bounds]
+            partials = [future.result() for future in futures]
+
+    return merge_partials(partials)
+
+
+def merge_partials(partials):
+    aggregate = partials[0]
+    for partial in partials[1:]:
+        aggregate.merge(partial)
+    return aggregate
+
+
+def aggregate_range(path, start, end, distinct='exact', duplicates=False):
+    chunk = read_partitions(path, start, end)
+    return SalesAggregate(distinct=distinct, duplicates=duplicates).update(add_date_parts(chunk))
+
+
+def aggregate_window(csv_path, start=None, end=None, workers=1, distinct='exact',
+                     duplicates=False):
+    """Aggregate the rows with Order Date in ``[start, end]``.
+
+    Only the month partitions overlapping the window are read (see
+    ``analytics.partitions``); with ``workers`` > 1 each worker reads a
+    contiguous run of them.
+    """
+    workers = workers or os.cpu_count() or 1
+    path = ensure_partitions(csv_path)
+    entries = overlapping(read_partition_meta(path), start, end)
+    empty = EmptyWindowError(f'no sales between {start or "the first order"} '
+                             f'and {end or "the last order"}')
+    if not entries:
+        raise empty
+    # Split the window at partition boundaries
+    windows = [(start if lo == 0 else entries[lo]['min'],
+                end if hi == len(entries) else entries[hi - 1]['max'])
+               for lo, hi in partition_bounds(len(entries), workers)]
+
+    if workers == 1:
+        partials = [aggregate_range(path, lo, hi, distinct, duplicates) for lo, hi in windows]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(aggregate_range, path, lo, hi, distinct, duplicates)
+                       for lo, hi in windows]
+            partials = [future.result() for future in futures]
+    aggregate = merge_partials(partials)
+    if not aggregate.rows:
+        # Overlapping partitions, but no orders inside the window itself
+        raise empty
+    return aggregate
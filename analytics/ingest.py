@@ -0,0 +1,69 @@
+"""Incremental ingestion of rows appended to the sales CSV.
+
+The production sales file only ever grows at the end. After a full load we
+remember the byte offset we read up to and a fingerprint of the bytes just
+before it; on the next refresh, if the fingerprint still matches, only the
+bytes past the offset need to be parsed.
+"""
+import io
+import os
+
+from .lazy import lazy_import
+from .snapshot import DATE_COLUMNS, DATE_FORMAT
+
+pd = lazy_import('pandas')
+
+FINGERPRINT_BYTES = 256
+
+
+def fingerprint(path, offset):
+    start = max(0, offset - FINGERPRINT_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(offset - start)
+
+
+def can_append(path, offset, print_):
+    """True if ``path`` still starts with the bytes we have already read."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return False
+    return size > offset and fingerprint(path, offset) == print_
+
+
+def csv_columns(path):
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_tail(path, offset, columns):
+    """Parse complete lines past ``offset``.
+
+    Returns ``(frame, new_offset)``. A trailing partial line (a writer in
+    the middle of appending) is left for the next call.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    if end == 0:
+        return pd.DataFrame(columns=columns), offset
+    frame = pd.read_csv(io.BytesIO(data[:end]), header=None, names=columns)
+    for column in DATE_COLUMNS:
+        if column in frame:
+            frame[column] = pd.to_datetime(frame[column], format=DATE_FORMAT)
+    return frame, offset + end
+
+
+def append_rows(frame, rows):
+    """Concatenate ``rows`` onto ``frame`` keeping categorical columns categorical."""
+    rows = rows.copy()
+    frame = frame.copy(deep=False)
+    for column in frame.columns:
+        dtype = frame[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            unseen = pd.Index(rows[column].dropna().unique()).difference(dtype.categories)
+            if len(unseen):
+                frame[column] = frame[column].cat.add_categories(unseen)
+            rows[column] = pd.Categorical(rows[column], dtype=frame[column].dtype)
+    return pd.concat([frame, rows[frame.columns]], ignore_index=True)
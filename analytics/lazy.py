@@ -0,0 +1,26 @@
+"""Deferred imports of heavy dependencies.
+
+``np = lazy_import('numpy')`` binds a placeholder module; the real
+import runs the first time an attribute is read from it, and from then
+on the placeholder holds the module's names. Modules of the serving path
+import pandas and numpy this way, so loading the URLconf, and with it
+every ``manage.py`` command, costs no numpy or pandas import until data
+is actually touched. Servers that preload do so explicitly (see
+``dashboard.refresher.preload``).
+"""
+import importlib
+import types
+
+
+class _Deferred(types.ModuleType):
+    def __getattr__(self, attr):
+        # Only called for names not yet copied over, i.e. on first use;
+        # the import system's lock makes concurrent first uses safe
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """``name`` as a module that is imported on first attribute access."""
+    return _Deferred(name)
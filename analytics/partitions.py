@@ -0,0 +1,155 @@
+"""Sales data partitioned by Order Date year and month.
+
+A partitioned dataset is a directory holding one snapshot (see
+``analytics.snapshot``) per month with sales, under ``<year>/<month>/``,
+plus a ``meta.json`` listing every partition with its row count, Sales
+total and first and last Order Date::
+
+    train.partitions/
+        meta.json
+        2015/01/   meta.json col00.npy ...
+        2015/02/
+        ...
+
+Readers look the requested date range up in ``meta.json`` and open only
+the partitions whose dates overlap it, so reading a year or a quarter
+costs that window's rows, not the whole history. Partitions the range
+only partly covers are trimmed to it after loading.
+"""
+import json
+import os
+import shutil
+
+from .lazy import lazy_import
+from .snapshot import (load_sales, read_snapshot, replace_directory, source_stamp,
+                       write_snapshot)
+
+pd = lazy_import('pandas')
+
+FORMAT_VERSION = 1
+
+
+def partitions_path_for(csv_path):
+    root, _ = os.path.splitext(os.fspath(csv_path))
+    return root + '.partitions'
+
+
+def write_partitions(df, path, source=None):
+    path = os.fspath(path)
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    dates = df['Order Date']
+    partitions = []
+    for (year, month), rows in df.groupby([dates.dt.year, dates.dt.month], sort=True):
+        directory = f'{year:04d}/{month:02d}'
+        write_snapshot(rows.reset_index(drop=True), os.path.join(tmp_path, directory))
+        partitions.append({
+            'path': directory,
+            'rows': len(rows),
+            'sales': float(rows['Sales'].sum()),
+            'min': rows['Order Date'].min().strftime('%Y-%m-%d'),
+            'max': rows['Order Date'].max().strftime('%Y-%m-%d'),
+        })
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'rows': len(df),
+        'source': source,
+        'columns': list(df.columns),
+        'partitions': partitions,
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    replace_directory(tmp_path, path)
+    return meta
+
+
+def build_partitions(csv_path, path=None):
+    path = path or partitions_path_for(csv_path)
+    source = source_stamp(csv_path)
+    return write_partitions(load_sales(csv_path), path, source=source)
+
+
+def read_partition_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format_version') != FORMAT_VERSION:
+        return None
+    return meta
+
+
+def ensure_partitions(csv_path):
+    """Path of an up-to-date partitioned copy of ``csv_path``, built if needed."""
+    path = partitions_path_for(csv_path)
+    meta = read_partition_meta(path)
+    if meta is None or meta['source'] != source_stamp(csv_path):
+        build_partitions(csv_path, path)
+    return path
+
+
+def _day(value):
+    # Dates compare as ISO strings, which is how meta.json stores them
+    return None if value is None else pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def overlapping(meta, start=None, end=None):
+    """The partitions holding rows with Order Date in ``[start, end]`` (inclusive)."""
+    start, end = _day(start), _day(end)
+    return [entry for entry in meta['partitions']
+            if (start is None or entry['max'] >= start) and (end is None or entry['min'] <= end)]
+
+
+def read_partition(path, entry, start=None, end=None, columns=None, mmap=True):
+    """One partition's rows with Order Date in ``[start, end]``."""
+    start, end = _day(start), _day(end)
+    trim = (start is not None and entry['min'] < start) or (end is not None and entry['max'] > end)
+    wanted = columns
+    if trim and columns is not None and 'Order Date' not in columns:
+        wanted = [*columns, 'Order Date']
+    df = read_snapshot(os.path.join(path, entry['path']), columns=wanted, mmap=mmap)
+    if trim:
+        dates = df['Order Date']
+        keep = dates.notna()
+        if start is not None:
+            keep &= dates >= start
+        if end is not None:
+            keep &= dates <= end
+        df = df[keep].reset_index(drop=True)
+        if wanted is not columns:
+            df = df.drop(columns='Order Date')
+    return df
+
+
+def iter_partitions(path, start=None, end=None, columns=None, mmap=True):
+    """Yield the rows with Order Date in ``[start, end]``, one frame per partition."""
+    meta = read_partition_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f'No usable partitioned dataset at {path}')
+    for entry in overlapping(meta, start, end):
+        yield read_partition(path, entry, start, end, columns=columns, mmap=mmap)
+
+
+def read_partitions(path, start=None, end=None, columns=None, mmap=True):
+    """The rows with Order Date in ``[start, end]`` as one frame.
+
+    Rows come partition by partition, in month order, and in their CSV
+    order within a month.
+    """
+    frames = list(iter_partitions(path, start, end, columns=columns, mmap=mmap))
+    if not frames:
+        meta = read_partition_meta(path)
+        return pd.DataFrame(columns=columns if columns is not None else meta['columns'])
+    data = {}
+    for name in frames[0].columns:
+        parts = [frame[name] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            # Each partition has its own categories; take their union
+            data[name] = pd.api.types.union_categoricals(parts, sort_categories=True)
+        else:
+            data[name] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data)
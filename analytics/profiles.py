@@ -0,0 +1,84 @@
+"""Per-entity profile index.
+
+One groupby pass per key builds a frame indexed by the entity (customer,
+product, state) with its order-line count, distinct orders, total and
+mean sales and first/last order date. Top-N lists and per-entity lookups
+then read this index (hash lookups on its index) instead of scanning the
+order lines again.
+
+Each profile also keeps the set of its Order IDs, so profiles built on
+rows that split an order between them (chunks, appended rows) still
+merge to the right count of distinct orders.
+"""
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Profile key -> column holding a display name for the entity
+PROFILE_KEYS = {
+    'Customer ID': 'Customer Name',
+    'Product ID': 'Product Name',
+    'State': None,
+}
+
+_MERGE = {
+    'orders': 'sum',
+    'total_sales': 'sum',
+    'first_order': 'min',
+    'last_order': 'max',
+}
+
+
+def build_profiles(df, key, label=None):
+    aggregations = {
+        'orders': ('Sales', 'size'),
+        'total_sales': ('Sales', 'sum'),
+        'first_order': ('Order Date', 'min'),
+        'last_order': ('Order Date', 'max'),
+    }
+    if label:
+        aggregations['name'] = (label, 'first')
+    profiles = df.groupby(key, observed=True).agg(**aggregations)
+    profiles['order_ids'] = _order_ids(df, key, profiles.index)
+    return _derive(profiles)
+
+
+def _order_ids(df, key, index):
+    # One sort of the distinct (entity, order) pairs instead of a Python
+    # call per entity
+    pairs = df[[key, 'Order ID']].dropna().drop_duplicates()
+    positions = index.get_indexer(pairs[key])
+    order = np.argsort(positions, kind='stable')
+    ids = pairs['Order ID'].to_numpy()[order]
+    bounds = np.searchsorted(positions[order], np.arange(len(index) + 1))
+    return [frozenset(ids[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _derive(profiles):
+    profiles['distinct_orders'] = profiles['order_ids'].map(len)
+    profiles['mean_sales'] = profiles['total_sales'] / profiles['orders']
+    return profiles
+
+
+def merge_profiles(*partials):
+    """Combine profiles built on disjoint sets of rows."""
+    combined = pd.concat(partials)
+    merge = dict(_MERGE)
+    if 'name' in combined:
+        merge['name'] = 'first'
+    profiles = combined.groupby(level=0, observed=True).agg(merge)
+    # Only entities in several partials need their Order ID sets joined
+    ids = combined['order_ids']
+    shared = ids.index.duplicated(keep=False)
+    joined = ids[shared].groupby(level=0, observed=True).agg(lambda sets: frozenset().union(*sets))
+    profiles['order_ids'] = pd.concat([ids[~shared], joined])
+    return _derive(profiles)
+
+
+def top_entities(profiles, n, column='total_sales'):
+    """The ``n`` largest entities by ``column`` as a Series labelled by
+    display name when the profile has one."""
+    top = profiles.nlargest(n, column)
+    labels = top['name'] if 'name' in top else top.index.to_series()
+    return pd.Series(top[column].to_numpy(), index=pd.Index(labels.to_numpy()))
@@ -0,0 +1,297 @@
+"""Stratified samples of the sales rows, and estimates with confidence intervals.
+
+Rows are grouped into strata by ``STRATA`` (Region x Category) and a
+simple random sample is drawn from each stratum in proportion to its
+size (at least two rows per stratum, so each has a variance). Every
+sampled row carries a ``Weight``, the number of rows it stands for, so
+sums, counts, means and shares of any grouping or filter are estimated
+from the sample alone, with confidence intervals from the usual
+stratified-sampling variance (finite population corrected; means and
+shares as ratio estimates, linearised).
+
+The sample size comes from an error budget, the relative error wanted on
+total Sales at the given confidence (Cochran's formula over per-stratum
+standard deviations), or from a time budget. Samples are kept next to
+the CSV, under ``<csv>.samples/``, as columnar snapshots named by their
+size and seed, with ``strata.json`` holding the per-stratum statistics,
+so a later run with a similar budget reuses one without reading the CSV.
+Sizes are rounded up to a power of two for that reason. ``sample_of``
+draws from a frame already in memory and persists nothing, for the
+dashboard, whose frame may be older than the CSV on disk.
+"""
+import json
+import os
+import shutil
+import time
+from statistics import NormalDist
+
+from .lazy import lazy_import
+from .shared import LOCK, publish_lock
+from .snapshot import load_sales, read_meta, read_snapshot, source_stamp, write_snapshot
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+STRATA = ['Region', 'Category']
+CONFIDENCE = 0.95
+MIN_ROWS = 1024
+
+WEIGHT = 'Weight'
+
+
+def samples_path_for(csv_path):
+    root, _ = os.path.splitext(os.fspath(csv_path))
+    return root + '.samples'
+
+
+def strata_stats(df, strata=STRATA):
+    """Rows, mean and standard deviation of Sales per stratum."""
+    grouped = df.groupby(strata, observed=True)['Sales']
+    stats = grouped.agg(['count', 'mean', 'std']).fillna({'std': 0.0})
+    return stats.rename(columns={'count': 'rows'})
+
+
+def _z(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def _rounded(rows, population):
+    # A power of two, so nearby budgets share a persisted sample
+    rows = max(MIN_ROWS, 1 << (max(int(rows), 1) - 1).bit_length())
+    return min(rows, population)
+
+
+def size_for_error(stats, error, confidence=CONFIDENCE):
+    """Rows needed for total Sales within ``error`` (relative) at ``confidence``."""
+    population = int(stats['rows'].sum())
+    weights = stats['rows'] / population
+    mean = float((weights * stats['mean']).sum())
+    if mean == 0:
+        return _rounded(MIN_ROWS, population)
+    # Proportional allocation: Var(mean) = sum(W_h S_h^2) / n, less the finite population part
+    n0 = _z(confidence) ** 2 * float((weights * stats['std'] ** 2).sum()) / (error * mean) ** 2
+    return _rounded(n0 / (1 + n0 / population), population)
+
+
+def size_for_time(stats, seconds, seconds_per_row):
+    """The largest sample estimated in about ``seconds`` at ``seconds_per_row``."""
+    population = int(stats['rows'].sum())
+    rows = 1 << max(int(seconds / seconds_per_row), 1).bit_length() - 1
+    return min(max(rows, MIN_ROWS), population)
+
+
+def allocate(stats, rows):
+    """Sample rows per stratum: proportional, at least two, at most all."""
+    population = stats['rows'].to_numpy()
+    share = population * rows / population.sum()
+    allocated = np.minimum(np.maximum(np.round(share).astype(int), 2), population)
+    return pd.Series(allocated, index=stats.index)
+
+
+def draw_sample(df, rows, strata=STRATA, seed=0):
+    """A stratified sample of ``rows`` rows of ``df``, weighted, in frame order."""
+    stats = strata_stats(df, strata)
+    allocated = allocate(stats, rows)
+    rng = np.random.default_rng(seed)
+    groups = df.groupby(strata, observed=True).indices
+    picked, weights = [], []
+    for key, positions in groups.items():
+        key = key if isinstance(key, tuple) else (key,)
+        n = int(allocated.loc[key])
+        picked.append(rng.choice(positions, size=n, replace=False))
+        weights.append(np.full(n, len(positions) / n))
+    picked, weights = np.concatenate(picked), np.concatenate(weights)
+    order = np.argsort(picked)
+    sample = df.iloc[picked[order]].reset_index(drop=True)
+    sample[WEIGHT] = weights[order]
+    return sample
+
+
+def _variance(n, population, sum_z, sum_z2):
+    """Variance of estimated totals from per-stratum sums of z and z**2.
+
+    ``n`` and ``population`` are per stratum; ``sum_z`` and ``sum_z2`` are
+    strata x groups.
+    """
+    n, population = n[:, None], population[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s2 = (sum_z2 - sum_z ** 2 / n) / (n - 1)
+    s2 = np.where(n > 1, np.maximum(s2, 0.0), 0.0)
+    return (population ** 2 * (1 - n / population) * s2 / n).sum(axis=0)
+
+
+class StratifiedSample:
+    def __init__(self, frame, strata=STRATA, confidence=CONFIDENCE):
+        self.frame = frame
+        self.strata = strata
+        self.confidence = confidence
+        self._stratum = frame.groupby(strata, observed=True).ngroup().to_numpy()
+        self._sales = frame['Sales'].to_numpy(dtype=float)
+        self._n = np.bincount(self._stratum).astype(float)
+        self._population = np.bincount(self._stratum, weights=frame[WEIGHT].to_numpy())
+
+    @property
+    def rows(self):
+        return len(self.frame)
+
+    @property
+    def population(self):
+        return int(round(self._population.sum()))
+
+    def _codes(self, column):
+        keys = self.frame[column]
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            return keys.cat.codes.to_numpy(), pd.Index(keys.cat.categories, name=column)
+        codes, groups = pd.factorize(keys, sort=True)
+        return codes, pd.Index(groups, name=column)
+
+    def estimate(self, by=None, mask=None):
+        """Estimated sum, count and mean of Sales and each group's share of the sum.
+
+        Groups by the column ``by`` (one row, ``All``, without it) over
+        the sampled rows in ``mask``. Each estimate has a ``_ci`` column,
+        the half-width of its confidence interval. Groups with no rows in
+        the sample are left out.
+        """
+        stratum, sales = self._stratum, self._sales
+        if by is None:
+            codes, groups = np.zeros(len(sales), dtype=np.intp), pd.Index(['All'])
+        else:
+            codes, groups = self._codes(by)
+        keep = codes >= 0
+        if mask is not None:
+            keep &= mask
+        codes, stratum, sales = codes[keep], stratum[keep], sales[keep]
+
+        shape = (len(self._n), len(groups))
+        cells = stratum * shape[1] + codes
+        count = np.bincount(cells, minlength=shape[0] * shape[1]).reshape(shape).astype(float)
+        s1 = np.bincount(cells, weights=sales, minlength=count.size).reshape(shape)
+        s2 = np.bincount(cells, weights=sales ** 2, minlength=count.size).reshape(shape)
+
+        n, population = self._n, self._population
+        weight = (population / n)[:, None]
+        total = (weight * s1).sum(axis=0)
+        rows = (weight * count).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / rows
+            share = total / total.sum()
+        # Ratio estimates are linearised: u = z - ratio * denominator
+        var_total = _variance(n, population, s1, s2)
+        var_rows = _variance(n, population, count, count)
+        var_mean = _variance(n, population, s1 - mean * count,
+                             s2 - 2 * mean * s1 + mean ** 2 * count) / rows ** 2
+        s1_all = s1.sum(axis=1, keepdims=True)
+        s2_all = s2.sum(axis=1, keepdims=True)
+        var_share = _variance(n, population, s1 - share * s1_all,
+                              (1 - share) ** 2 * s2 + share ** 2 * (s2_all - s2)) / total.sum() ** 2
+
+        z = _z(self.confidence)
+        table = pd.DataFrame({
+            'sum': total, 'sum_ci': z * np.sqrt(var_total),
+            'count': rows, 'count_ci': z * np.sqrt(var_rows),
+            'mean': mean, 'mean_ci': z * np.sqrt(var_mean),
+            'share': share, 'share_ci': z * np.sqrt(var_share),
+        }, index=groups)
+        return table[count.sum(axis=0) > 0]
+
+
+def _sample_dir(root, rows, seed):
+    return os.path.join(root, f'{rows}-{seed}')
+
+
+def read_strata(root, source):
+    """Per-stratum statistics saved for the CSV with stamp ``source``, or None."""
+    try:
+        with open(os.path.join(root, 'strata.json')) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if saved.get('source') != source or saved.get('strata') != STRATA:
+        return None
+    return pd.DataFrame.from_records(saved['stats']).set_index(STRATA)
+
+
+def write_strata(root, source, stats):
+    # New data: the samples drawn from the old data go (the lock file stays)
+    for name in os.listdir(root):
+        if name != LOCK:
+            target = os.path.join(root, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                os.remove(target)
+    saved = {'source': source, 'strata': STRATA,
+             'stats': stats.reset_index().to_dict('records')}
+    path = os.path.join(root, 'strata.json')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(saved, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def sample_of(frame, error, seed=0, confidence=CONFIDENCE):
+    """A ``StratifiedSample`` of ``frame`` sized for ``error``, drawn in memory."""
+    rows = size_for_error(strata_stats(frame), error, confidence)
+    return StratifiedSample(draw_sample(frame, rows, seed=seed), confidence=confidence)
+
+
+def load_sample(csv_path, error=None, seconds=None, seed=0, confidence=CONFIDENCE):
+    """A ``StratifiedSample`` of ``csv_path`` sized for ``error`` or ``seconds``.
+
+    Reuses a persisted sample of that size when the CSV has not changed;
+    otherwise loads the CSV, draws one and persists it. Processes sampling
+    the same CSV take turns (``analytics.shared.publish_lock``).
+    """
+    root = samples_path_for(csv_path)
+    # Stamped before anything is read: data appended meanwhile makes it stale
+    source = source_stamp(csv_path)
+    frame = None
+    with publish_lock(root):
+        stats = read_strata(root, source)
+        if stats is None:
+            frame = load_sales(csv_path)
+            stats = strata_stats(frame)
+            write_strata(root, source, stats)
+        if seconds is not None:
+            rows = size_for_time(stats, seconds, seconds_per_row(root))
+        else:
+            rows = size_for_error(stats, error, confidence)
+
+        path = _sample_dir(root, rows, seed)
+        meta = read_meta(path)
+        if meta is not None and meta['source'] == source:
+            return StratifiedSample(read_snapshot(path, mmap=False), confidence=confidence)
+        if frame is None:
+            frame = load_sales(csv_path)
+        sample = draw_sample(frame, rows, seed=seed)
+        write_snapshot(sample, path, source=source)
+    return StratifiedSample(sample, confidence=confidence)
+
+
+def seconds_per_row(root, rows=MIN_ROWS * 16):
+    """Time one grouped estimate takes per sample row, measured once per dataset."""
+    path = os.path.join(root, 'timing.json')
+    try:
+        with open(path) as f:
+            return json.load(f)['seconds_per_row']
+    except (OSError, ValueError, KeyError):
+        pass
+    # A synthetic sample of the same shape; only the row count matters
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'Region': pd.Categorical(rng.integers(0, 4, rows)),
+        'Category': pd.Categorical(rng.integers(0, 3, rows)),
+        'Sub-Category': pd.Categorical(rng.integers(0, 17, rows)),
+        'Sales': rng.exponential(200.0, rows),
+        WEIGHT: np.full(rows, 100.0),
+    })
+    sample = StratifiedSample(frame)
+    started = time.perf_counter()
+    sample.estimate('Sub-Category')
+    per_row = (time.perf_counter() - started) / rows
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'seconds_per_row': per_row}, f)
+    os.replace(tmp_path, path)
+    return per_row
@@ -0,0 +1,103 @@
+"""Dataset generations shared between processes through memory-mapped files.
+
+One process publishes a prepared frame as a snapshot (see ``snapshot``)
+under ``<root>/gen-NNNNNN`` and points ``<root>/current`` at it. Every
+process that attaches maps the same files read-only, so the numeric
+columns and the codes of categorical columns live once in the page
+cache rather than once per process. Publishing a new generation is a
+rename of the pointer; attached processes notice the new number and
+re-attach, and the files of the generation they leave stay readable
+until they let go of them.
+"""
+import os
+from contextlib import contextmanager
+
+from .snapshot import read_meta, read_snapshot, write_snapshot
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+POINTER = 'current'
+LOCK = 'publish.lock'
+
+# Generations older than the current one and this many before it are removed
+KEEP_PREVIOUS = 1
+
+_sources = {}  # generation directory -> source stamp; generations never change
+
+
+def generation_name(number):
+    return f'gen-{number:06d}'
+
+
+def generation_number(name):
+    return int(name.rsplit('-', 1)[1])
+
+
+def current_generation(root):
+    """Name of the published generation, or None before the first publish."""
+    try:
+        with open(os.path.join(root, POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def generation_source(root, name):
+    """Stamp of the file the generation was built from (see ``snapshot.source_stamp``)."""
+    path = os.path.join(root, name)
+    if path not in _sources:
+        meta = read_meta(path)
+        _sources[path] = meta['source'] if meta else None
+    return _sources[path]
+
+
+@contextmanager
+def publish_lock(root):
+    """Serialise publishers across processes (a no-op without fcntl)."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def publish(root, frame, source):
+    """Write ``frame`` as the next generation and make it current.
+
+    Call under ``publish_lock``. Returns the new generation's name.
+    """
+    current = current_generation(root)
+    name = generation_name(generation_number(current) + 1 if current else 1)
+    write_snapshot(frame, os.path.join(root, name), source=source)
+
+    pointer = os.path.join(root, POINTER)
+    with open(pointer + '.tmp', 'w') as f:
+        f.write(name)
+    os.replace(pointer + '.tmp', pointer)
+    prune(root, name)
+    return name
+
+
+def prune(root, current):
+    oldest = generation_number(current) - KEEP_PREVIOUS
+    for entry in os.listdir(root):
+        if entry.startswith('gen-') and entry[4:].isdigit() and generation_number(entry) < oldest:
+            # Processes still attached keep their mappings; only the names go
+            try:
+                for file in os.listdir(os.path.join(root, entry)):
+                    os.remove(os.path.join(root, entry, file))
+                os.rmdir(os.path.join(root, entry))
+            except OSError:
+                pass
+
+
+def attach(root, name):
+    """The frame of generation ``name``, memory-mapped and read-only."""
+    return read_snapshot(os.path.join(root, name), mmap=True)
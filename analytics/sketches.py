@@ -0,0 +1,162 @@
+"""Mergeable summaries with bounded memory.
+
+``HyperLogLog`` estimates distinct counts and ``QuantileSketch`` estimates
+quantiles. Both can be updated chunk by chunk and merged with summaries
+built on other chunks, which is what the streaming and parallel report
+modes rely on.
+"""
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def hash_values(values):
+    """64-bit hashes of ``values``, stable across processes."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _leading_zeros(words):
+    # Vectorised count of leading zero bits in uint64 words
+    words = words.astype(np.uint64, copy=True)
+    zeros = np.zeros(words.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (words >> np.uint64(64 - shift)) == 0
+        zeros[empty] += shift
+        words[empty] <<= np.uint64(shift)
+    zeros[words == 0] = 64
+    return zeros
+
+
+class HyperLogLog:
+    """Distinct-count estimator using 2**precision one-byte registers."""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        if len(values) == 0:
+            return
+        hashes = hash_values(values)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rest = hashes << np.uint64(self.precision)
+        rank = np.minimum(_leading_zeros(rest) + 1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def __len__(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        empty = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and empty:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+
+class ExactDistinct:
+    """Same interface as ``HyperLogLog`` backed by a set."""
+
+    def __init__(self):
+        self.values = set()
+
+    def update(self, values):
+        self.values.update(pd.unique(np.asarray(values, dtype=object)))
+
+    def merge(self, other):
+        self.values |= other.values
+
+    def __len__(self):
+        return len(self.values)
+
+
+def distinct_counter(mode):
+    if mode == 'hll':
+        return HyperLogLog()
+    if mode == 'exact':
+        return ExactDistinct()
+    raise ValueError(f'Unknown distinct mode: {mode}')
+
+
+class QuantileSketch:
+    """KLL-style quantile sketch.
+
+    Values are kept exactly until ``exact_limit`` of them have been seen, so
+    small inputs give the same answers as ``Series.quantile``. Past that the
+    sketch compacts into levels of at most ``k`` items. Each level-h item
+    stands for 2**h input values, and rank error is roughly 1/k.
+    """
+
+    def __init__(self, k=2048, exact_limit=100_000, seed=0):
+        self.k = k
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1 and self.count <= self.exact_limit
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+
+    def merge(self, other):
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for height, items in enumerate(other.levels):
+            if height == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[height] = np.concatenate([self.levels[height], items])
+        self._compact()
+
+    def _capacity(self, height):
+        depth = len(self.levels) - height - 1
+        return max(int(self.k * (2 / 3) ** depth), 8)
+
+    def _compact(self):
+        if self.exact:
+            return
+        height = 0
+        while height < len(self.levels):
+            items = self.levels[height]
+            if len(items) > self._capacity(height):
+                items = np.sort(items)
+                # Keep one item back if the count is odd, then promote every
+                # other item (random offset) with doubled weight.
+                keep = items[:len(items) % 2]
+                items = items[len(keep):]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[height] = keep
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+            height += 1
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** height)
+                                  for height, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(values[order][min(position, len(values) - 1)])
@@ -0,0 +1,172 @@
+"""Typed columnar snapshot of the sales CSV.
+
+A snapshot is a directory holding one ``.npy`` file per column plus a
+``meta.json`` describing the column types and the CSV it was built from.
+Dates are stored pre-parsed as datetime64 and string columns are stored
+dictionary-encoded, so loading is a handful of memory-mapped reads instead
+of a text parse.
+"""
+import json
+import os
+import shutil
+
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+FORMAT_VERSION = 1
+
+DATE_COLUMNS = ['Order Date', 'Ship Date']
+DATE_FORMAT = '%d/%m/%Y'
+
+# Loaded back as pandas categoricals
+CATEGORY_COLUMNS = ['Ship Mode', 'Segment', 'Country', 'State', 'Region',
+                    'Category', 'Sub-Category']
+
+
+def read_csv(path, **kwargs):
+    df = pd.read_csv(path, **kwargs)
+    for column in DATE_COLUMNS:
+        df[column] = pd.to_datetime(df[column], format=DATE_FORMAT)
+    return df
+
+
+def snapshot_path_for(csv_path):
+    root, _ = os.path.splitext(os.fspath(csv_path))
+    return root + '.snapshot'
+
+
+def source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _column_file(index):
+    return f'col{index:02d}.npy'
+
+
+def _code_dtype(categories):
+    # The code width pandas itself uses, so Categorical.from_codes keeps
+    # (and, memory-mapped, shares) the stored codes instead of converting
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def write_snapshot(df, path, source=None):
+    path = os.fspath(path)
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for index, name in enumerate(df.columns):
+        series = df[name]
+        entry = {'name': name, 'file': _column_file(index)}
+        if pd.api.types.is_datetime64_any_dtype(series):
+            entry['kind'] = 'datetime'
+            values = series.to_numpy(dtype='datetime64[ns]')
+        elif pd.api.types.is_numeric_dtype(series):
+            entry['kind'] = 'numeric'
+            values = series.to_numpy()
+        else:
+            categorical = isinstance(series.dtype, pd.CategoricalDtype)
+            entry['kind'] = 'category' if categorical or name in CATEGORY_COLUMNS else 'string'
+            codes, uniques = pd.factorize(series, sort=True)
+            # Missing values factorize to -1
+            values = codes.astype(_code_dtype(len(uniques)))
+            entry['categories'] = 'cat' + entry['file']
+            np.save(os.path.join(tmp_path, entry['categories']),
+                    np.asarray(uniques, dtype=str))
+        np.save(os.path.join(tmp_path, entry['file']), values)
+        columns.append(entry)
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'rows': len(df),
+        'source': source,
+        'columns': columns,
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    replace_directory(tmp_path, path)
+    return meta
+
+
+def replace_directory(tmp_path, path):
+    # Swap the finished directory into place so readers never see a
+    # half-written snapshot.
+    old_path = path + '.old'
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def build_snapshot(csv_path, path=None):
+    path = path or snapshot_path_for(csv_path)
+    source = source_stamp(csv_path)
+    df = read_csv(csv_path)
+    return write_snapshot(df, path, source=source)
+
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format_version') != FORMAT_VERSION:
+        return None
+    return meta
+
+
+def is_fresh(path, csv_path):
+    meta = read_meta(path)
+    return meta is not None and meta['source'] == source_stamp(csv_path)
+
+
+def read_snapshot(path, columns=None, mmap=True, start=None, stop=None, categorical=False):
+    """Load a snapshot, optionally only the ``columns`` and the row range
+    ``[start, stop)``. With ``mmap`` the numeric columns stay backed by
+    the files on disk. With ``categorical`` the string columns come back
+    as categoricals over their stored codes too, instead of as text."""
+    path = os.fspath(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f'No usable snapshot at {path}')
+    mmap_mode = 'r' if mmap else None
+
+    data = {}
+    for entry in meta['columns']:
+        name = entry['name']
+        if columns is not None and name not in columns:
+            continue
+        values = np.load(os.path.join(path, entry['file']), mmap_mode=mmap_mode)[start:stop]
+        if entry['kind'] in ('category', 'string'):
+            uniques = np.load(os.path.join(path, entry['categories']))
+            if entry['kind'] == 'category' or categorical:
+                data[name] = pd.Categorical.from_codes(values, uniques)
+            else:
+                strings = uniques.astype(object).take(values)
+                strings[np.asarray(values) < 0] = np.nan
+                data[name] = strings
+        else:
+            data[name] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def load_sales(csv_path='train.csv', snapshot_path=None, categorical=False):
+    """Load the sales data, preferring a fresh snapshot over the CSV.
+
+    ``categorical`` is passed on to ``read_snapshot``; text read from the
+    CSV stays text.
+    """
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    if is_fresh(snapshot_path, csv_path):
+        return read_snapshot(snapshot_path, categorical=categorical)
+    return read_csv(csv_path)
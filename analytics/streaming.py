@@ -0,0 +1,361 @@
+"""Chunked, mergeable aggregation of the sales data for the report scripts.
+
+``SalesAggregate`` accumulates everything the EDA and insights reports
+print (per-dimension sums/counts/means, distinct customers, Sales
+quantiles, data-quality counts) from any number of row chunks. Sums,
+counts and means are exact: Sales totals are summed with ``math.fsum``
+and carry their rounding error along, so however the rows are split
+between chunks and workers the totals come out as a single pass gives
+them. Distinct counts are exact or HyperLogLog, and quantiles come from
+a mergeable sketch, so memory does not grow with the number of rows.
+Yearly, quarterly and daily series come from a ``TimeIndex`` of daily
+totals. The exceptions are the per-entity profiles (which grow with the
+number of distinct customers and products, and of their orders) and,
+with ``duplicates=True`` only, exact duplicate detection (one 8-byte
+hash per row).
+"""
+import heapq
+import math
+
+from .lazy import lazy_import
+from .profiles import PROFILE_KEYS, build_profiles, merge_profiles, top_entities
+from .sketches import QuantileSketch, distinct_counter
+from .snapshot import CATEGORY_COLUMNS, DATE_COLUMNS, DATE_FORMAT, load_sales
+from .timeindex import TimeIndex
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Dimensions reported with sum/count/mean of Sales. Customers, products
+# and states are covered by the per-entity profiles instead, and dated
+# series by the time index.
+DIMENSIONS = ['Category', 'Sub-Category', 'Region', 'Segment', 'Ship Mode', 'Month']
+
+# Dimension -> column whose distinct values are counted per group
+DISTINCT_BY = {
+    'Category': 'Customer Name',
+    'Region': 'Customer Name',
+    'Segment': 'Customer Name',
+}
+
+DISTINCT_COLUMNS = ['Customer Name', 'Product Name']
+
+DATE_PARTS = ['Month']
+
+# Columns of a dimension's groups holding its compensated Sales total
+SUM_PARTS = ['sum', 'sum_error']
+
+
+def compensated_sum(values):
+    """``(total, error)``: the correctly rounded sum of ``values`` and the
+    part of the exact sum that rounding left out.
+
+    Adding pairs from disjoint sets of values with another
+    ``compensated_sum`` gives the total of them all, rounded once.
+    """
+    values = np.asarray(values, dtype=float)
+    total = math.fsum(values)
+    return total, math.fsum(np.append(values, -total))
+
+
+def add_date_parts(df):
+    df['Month'] = df['Order Date'].dt.month
+    return df
+
+
+def iter_csv_chunks(path, chunksize):
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        for column in DATE_COLUMNS:
+            chunk[column] = pd.to_datetime(chunk[column], format=DATE_FORMAT)
+        yield add_date_parts(chunk)
+
+
+class SalesAggregate:
+    def __init__(self, distinct='exact', head_rows=5, duplicates=False):
+        self.distinct_mode = distinct
+        self.count_duplicates = duplicates
+        self.head_rows = head_rows
+        self.rows = 0
+        self.columns = None
+        self.head = None
+        # Column types as a whole-file load would give them (see dtypes)
+        self._dtypes = {}
+        self._categories = {}
+        self.missing = None
+        self.groups = {}
+        self.group_distinct = {dimension: {} for dimension in DISTINCT_BY}
+        self.distinct = {column: distinct_counter(distinct) for column in DISTINCT_COLUMNS}
+        # Row hash arrays (with duplicates=True), deduplicated when
+        # duplicates() is asked for
+        self.row_hashes = []
+        self.numeric = {}
+        self.profiles = {}
+        self.timeline = None
+
+    def update(self, chunk):
+        source_columns = [c for c in chunk.columns if c not in DATE_PARTS]
+        if self.head is None:
+            self.columns = source_columns
+            self.head = chunk[source_columns].head(self.head_rows).copy()
+        elif len(self.head) < self.head_rows:
+            self.head = pd.concat([self.head, chunk[source_columns].head(self.head_rows - len(self.head))])
+        self.rows += len(chunk)
+        self._add_dtypes(chunk[source_columns])
+
+        missing = chunk[source_columns].isnull().sum()
+        self.missing = missing if self.missing is None else self.missing.add(missing, fill_value=0)
+
+        sales = chunk['Sales']
+        frame = pd.DataFrame({'count': 1, 'sumsq': sales * sales})
+        for dimension in DIMENSIONS:
+            if dimension not in chunk:
+                continue
+            keys = chunk[dimension]
+            partial = frame.groupby(keys, observed=True).sum()
+            sums = {key: compensated_sum(values) for key, values in sales.groupby(keys, observed=True)}
+            partial[SUM_PARTS] = pd.DataFrame.from_dict(sums, orient='index', columns=SUM_PARTS)
+            self._add_group(dimension, partial[SUM_PARTS + ['count', 'sumsq']])
+
+        for key, label in PROFILE_KEYS.items():
+            partial = build_profiles(chunk, key, label)
+            current = self.profiles.get(key)
+            self.profiles[key] = partial if current is None else merge_profiles(current, partial)
+
+        partial = TimeIndex.build(chunk, dimensions=[])
+        self.timeline = partial if self.timeline is None else self.timeline.merge(partial)
+
+        for dimension, column in DISTINCT_BY.items():
+            counters = self.group_distinct[dimension]
+            for group, values in chunk.groupby(dimension, observed=True)[column]:
+                counters.setdefault(group, distinct_counter(self.distinct_mode)).update(values.to_numpy())
+        for column, counter in self.distinct.items():
+            counter.update(chunk[column].to_numpy())
+
+        if self.count_duplicates:
+            self.row_hashes.append(
+                pd.util.hash_pandas_object(chunk[source_columns], index=False).to_numpy())
+
+        for column in chunk[source_columns].select_dtypes('number').columns:
+            stats = self.numeric.setdefault(column, _NumericStats())
+            stats.update(chunk[column].to_numpy(dtype=float))
+        return self
+
+    def _add_dtypes(self, chunk):
+        # A chunk's types depend on the values it happens to hold (a column
+        # with no missing values reads as int64, text as str); report the
+        # types of the whole file as load_sales() gives them instead
+        for column in chunk.columns:
+            series = chunk[column]
+            if column in CATEGORY_COLUMNS:
+                values = (series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype)
+                          else series.dropna().unique())
+                self._categories.setdefault(column, set()).update(values)
+                continue
+            dtype = series.dtype
+            if pd.api.types.is_datetime64_dtype(dtype):
+                dtype = np.dtype('datetime64[ns]')
+            self._merge_dtype(column, dtype)
+
+    def _merge_dtype(self, column, dtype):
+        current = self._dtypes.get(column)
+        if (current is not None and current != dtype and pd.api.types.is_numeric_dtype(current)
+                and pd.api.types.is_numeric_dtype(dtype)):
+            dtype = np.result_type(current, dtype)
+        elif current is not None:
+            dtype = current
+        self._dtypes[column] = dtype
+
+    @property
+    def dtypes(self):
+        if self.columns is None:
+            return None
+        return pd.Series({
+            column: pd.CategoricalDtype(sorted(self._categories[column])) if column in self._categories
+            else self._dtypes[column]
+            for column in self.columns
+        }, dtype=object)
+
+    def _add_group(self, dimension, partial):
+        current = self.groups.get(dimension)
+        if current is None:
+            self.groups[dimension] = partial
+            return
+        merged = current.add(partial, fill_value=0)
+        # Adding the rounded totals could move a printed cent; add them with
+        # their rounding errors instead
+        parts = np.hstack([current[SUM_PARTS].reindex(merged.index, fill_value=0).to_numpy(),
+                           partial[SUM_PARTS].reindex(merged.index, fill_value=0).to_numpy()])
+        merged[SUM_PARTS] = [compensated_sum(row) for row in parts]
+        self.groups[dimension] = merged
+
+    def merge(self, other):
+        if other.head is not None:
+            if self.head is None:
+                self.columns, self.head = other.columns, other.head
+            else:
+                self.head = pd.concat([self.head, other.head]).head(self.head_rows)
+        self.rows += other.rows
+        if other.missing is not None:
+            self.missing = other.missing if self.missing is None else self.missing.add(other.missing, fill_value=0)
+        for dimension, partial in other.groups.items():
+            self._add_group(dimension, partial)
+        for dimension, counters in other.group_distinct.items():
+            mine = self.group_distinct[dimension]
+            for group, counter in counters.items():
+                if group in mine:
+                    mine[group].merge(counter)
+                else:
+                    mine[group] = counter
+        for column, counter in other.distinct.items():
+            self.distinct[column].merge(counter)
+        for column, dtype in other._dtypes.items():
+            self._merge_dtype(column, dtype)
+        for column, values in other._categories.items():
+            self._categories.setdefault(column, set()).update(values)
+        self.count_duplicates = self.count_duplicates and other.count_duplicates
+        self.row_hashes.extend(other.row_hashes)
+        for column, stats in other.numeric.items():
+            if column in self.numeric:
+                self.numeric[column].merge(stats)
+            else:
+                self.numeric[column] = stats
+        for key, partial in other.profiles.items():
+            current = self.profiles.get(key)
+            self.profiles[key] = partial if current is None else merge_profiles(current, partial)
+        if other.timeline is not None:
+            self.timeline = other.timeline if self.timeline is None else self.timeline.merge(other.timeline)
+        return self
+
+    # Results
+
+    def totals(self):
+        return self.numeric['Sales'].summary()
+
+    def by(self, dimension):
+        """Per-group sum, count and mean of Sales (plus distinct customers
+        for the dimensions in ``DISTINCT_BY``)."""
+        groups = self.groups[dimension].copy()
+        groups['count'] = groups['count'].astype(int)
+        groups['mean'] = groups['sum'] / groups['count']
+        if dimension in DISTINCT_BY:
+            counters = self.group_distinct[dimension]
+            groups['distinct'] = [len(counters[group]) for group in groups.index]
+        return groups.drop(columns=['sum_error', 'sumsq'])
+
+    def top(self, dimension, n):
+        sums = self.groups[dimension]['sum']
+        top = pd.Series(dict(heapq.nlargest(n, sums.items(), key=lambda item: item[1])),
+                        name='Sales', dtype=float)
+        top.index.name = dimension
+        return top
+
+    def top_entities(self, key, n):
+        """Top ``n`` entities of a profile key by total Sales, labelled by
+        display name."""
+        top = top_entities(self.profiles[key], n).rename('Sales')
+        top.index.name = PROFILE_KEYS[key] or key
+        return top
+
+    def profile(self, key, entity):
+        return self.profiles[key].loc[entity]
+
+    def distinct_count(self, column):
+        return len(self.distinct[column])
+
+    def duplicates(self):
+        # Exact in every distinct mode: an HLL's error would dwarf the count
+        if not self.count_duplicates:
+            raise ValueError('Duplicate rows are only counted with duplicates=True')
+        if len(self.row_hashes) != 1:
+            hashes = np.concatenate(self.row_hashes) if self.row_hashes else np.empty(0, np.uint64)
+            self.row_hashes = [np.unique(hashes)]
+        return self.rows - len(self.row_hashes[0])
+
+    def describe(self):
+        return pd.DataFrame({column: stats.describe() for column, stats in self.numeric.items()})
+
+
+class _NumericStats:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.sum_error = 0.0
+        self.sumsq = 0.0
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self._add_sum(*compensated_sum(values))
+        self.sumsq += np.square(values).sum()
+        self.sketch.update(values)
+
+    def merge(self, other):
+        self.count += other.count
+        self._add_sum(other.sum, other.sum_error)
+        self.sumsq += other.sumsq
+        self.sketch.merge(other.sketch)
+
+    def _add_sum(self, total, error):
+        self.sum, self.sum_error = compensated_sum([self.sum, self.sum_error, total, error])
+
+    def summary(self):
+        mean = self.sum / self.count
+        variance = (self.sumsq - self.count * mean * mean) / (self.count - 1)
+        return {
+            'sum': self.sum,
+            'count': self.count,
+            'mean': mean,
+            'std': float(np.sqrt(max(variance, 0.0))),
+            'min': self.sketch.min,
+            'max': self.sketch.max,
+        }
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def describe(self):
+        summary = self.summary()
+        return pd.Series({
+            'count': float(self.count),
+            'mean': summary['mean'],
+            'std': summary['std'],
+            'min': summary['min'],
+            '25%': self.quantile(0.25),
+            '50%': self.quantile(0.50),
+            '75%': self.quantile(0.75),
+            'max': summary['max'],
+        })
+
+
+def aggregate_frame(df, distinct='exact', duplicates=False):
+    return SalesAggregate(distinct=distinct, duplicates=duplicates).update(add_date_parts(df))
+
+
+def aggregate_csv(path, chunksize, distinct='exact', duplicates=False):
+    aggregate = SalesAggregate(distinct=distinct, duplicates=duplicates)
+    for chunk in iter_csv_chunks(path, chunksize):
+        aggregate.update(chunk)
+    return aggregate
+
+
+def aggregate_sales(path='train.csv', chunksize=None, distinct='exact', workers=1,
+                    start=None, end=None, duplicates=False):
+    """Aggregate the whole file in memory, in chunks of ``chunksize`` rows,
+    or across ``workers`` processes.
+
+    With ``start`` or ``end``, only the rows with Order Date in that
+    window, read from the month partitions overlapping it. Duplicate
+    rows are only counted with ``duplicates``, which keeps a hash of
+    every row.
+    """
+    options = {'distinct': distinct, 'duplicates': duplicates}
+    if start is not None or end is not None:
+        from .engine import aggregate_window
+        return aggregate_window(path, start, end, workers=workers, **options)
+    if workers != 1:
+        from .engine import aggregate_parallel
+        return aggregate_parallel(path, workers=workers, **options)
+    if chunksize:
+        return aggregate_csv(path, chunksize, **options)
+    return aggregate_frame(load_sales(path), **options)
@@ -0,0 +1,210 @@
+"""Time index over Order Date.
+
+Sales and order-line counts are totalled per day, overall and per value
+of ``TIME_DIMENSIONS``, and kept with their cumulative (prefix) sums over
+the sorted days. The total for any ``[start, end]`` window is then two
+binary searches and a subtraction, and a series resampled to weeks,
+months, quarters or years is one binary search per period boundary.
+
+Daily totals are additive, so indexes built on disjoint sets of rows
+combine with ``merge()``.
+"""
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+TIME_DIMENSIONS = ['Region', 'Category']
+
+# Resampling frequency -> pandas period alias
+FREQUENCIES = {
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+    'quarter': 'Q',
+    'year': 'Y',
+}
+
+
+def _one_day():
+    # A function, not a constant, so importing this module does not import numpy
+    return np.timedelta64(1, 'D')
+
+
+def _prefix(values):
+    zero = np.zeros((1,) + values.shape[1:], dtype=values.dtype)
+    return np.concatenate([zero, np.cumsum(values, axis=0)])
+
+
+def _day(value):
+    return None if value is None else np.datetime64(pd.Timestamp(value).date(), 'D')
+
+
+class TimeIndex:
+
+    def __init__(self, daily, by=None):
+        # daily: sales and count per day, indexed by sorted day
+        # by: dimension -> {'sales': days x values frame, 'count': ...}
+        self.daily = daily
+        self.by = by or {}
+        self.days = daily.index.to_numpy().astype('datetime64[D]')
+        self._sales = _prefix(daily['sales'].to_numpy(dtype=float))
+        self._count = _prefix(daily['count'].to_numpy(dtype=np.int64))
+        self._by = {
+            dimension: (tables['sales'].columns,
+                        _prefix(tables['sales'].to_numpy(dtype=float)),
+                        _prefix(tables['count'].to_numpy(dtype=np.int64)))
+            for dimension, tables in self.by.items()
+        }
+
+    @classmethod
+    def build(cls, df, dimensions=TIME_DIMENSIONS):
+        days = df['Order Date'].dt.normalize()
+        sales = df['Sales']
+        daily = sales.groupby(days).agg(['sum', 'count'])
+        daily.columns = ['sales', 'count']
+        by = {}
+        for dimension in dimensions:
+            grouped = sales.groupby([days, df[dimension]], observed=True).agg(['sum', 'count'])
+            by[dimension] = {
+                'sales': grouped['sum'].unstack(fill_value=0).reindex(daily.index, fill_value=0),
+                'count': grouped['count'].unstack(fill_value=0).reindex(daily.index, fill_value=0),
+            }
+        return cls(daily, by)
+
+    def merge(self, *others):
+        """Index over the rows of this index and ``others`` together."""
+        daily = self.daily
+        by = dict(self.by)
+        for other in others:
+            daily = daily.add(other.daily, fill_value=0)
+            for dimension, tables in other.by.items():
+                mine = by.get(dimension)
+                by[dimension] = tables if mine is None else {
+                    measure: mine[measure].add(table, fill_value=0)
+                    for measure, table in tables.items()
+                }
+        by = {
+            dimension: {measure: table.reindex(daily.index, fill_value=0)
+                        for measure, table in tables.items()}
+            for dimension, tables in by.items()
+        }
+        return TimeIndex(daily, by)
+
+    def append(self, rows):
+        return self.merge(TimeIndex.build(rows, dimensions=list(self.by)))
+
+    def spanning(self, first_day, last_day):
+        """This index with days without sales added up to ``first_day`` and
+        ``last_day``, so its default windows and series cover that span."""
+        bounds = [pd.Timestamp(day) for day in (first_day, last_day) if day is not None]
+        days = self.daily.index.union(pd.DatetimeIndex(bounds, name=self.daily.index.name))
+        if len(days) == len(self.daily):
+            return self
+        return TimeIndex(self.daily.reindex(days, fill_value=0), {
+            dimension: {measure: table.reindex(days, fill_value=0)
+                        for measure, table in tables.items()}
+            for dimension, tables in self.by.items()
+        })
+
+    @property
+    def first_day(self):
+        return self.days[0] if len(self.days) else None
+
+    @property
+    def last_day(self):
+        return self.days[-1] if len(self.days) else None
+
+    def _prefixes(self, dimension=None, value=None):
+        if dimension is None:
+            return self._sales, self._count
+        values, sales, count = self._by[dimension]
+        if value not in values:
+            zeros = np.zeros(len(self.days) + 1)
+            return zeros, zeros.astype(np.int64)
+        column = values.get_loc(value)
+        return sales[:, column], count[:, column]
+
+    def _positions(self, edges):
+        return np.searchsorted(self.days, edges, side='left')
+
+    def window(self, start=None, end=None, dimension=None, value=None):
+        """Sales total, count and mean for days in ``[start, end]`` (inclusive)."""
+        sales, count = self._prefixes(dimension, value)
+        lo = 0 if start is None else self._positions(_day(start))
+        hi = len(self.days) if end is None else self._positions(_day(end) + _one_day())
+        total = float(sales[hi] - sales[lo])
+        rows = int(count[hi] - count[lo])
+        return {'sum': total, 'count': rows, 'mean': total / rows if rows else 0.0}
+
+    def compare(self, start=None, end=None, dimension=None, value=None):
+        """The ``[start, end]`` window against the equally long window before it.
+
+        Returns None when the index is empty.
+        """
+        start = _day(start) if start is not None else self.first_day
+        end = _day(end) if end is not None else self.last_day
+        if start is None or end is None:
+            return None
+        length = end - start + _one_day()
+        previous_start, previous_end = start - length, start - _one_day()
+        current = self.window(start, end, dimension, value)
+        previous = self.window(previous_start, previous_end, dimension, value)
+        change = ((current['sum'] - previous['sum']) / previous['sum']
+                  if previous['sum'] else None)
+        return {
+            'current': current,
+            'previous': previous,
+            'previous_start': pd.Timestamp(previous_start).date(),
+            'previous_end': pd.Timestamp(previous_end).date(),
+            'change': change,
+        }
+
+    def resample(self, frequency, start=None, end=None, dimension=None, value=None):
+        """Sum and count of Sales per period between ``start`` and ``end``.
+
+        ``frequency`` is one of ``FREQUENCIES``. Returns a frame indexed
+        by period, including periods without sales.
+        """
+        start = _day(start) if start is not None else self.first_day
+        end = _day(end) if end is not None else self.last_day
+        if start is None or end is None or start > end:
+            empty = pd.PeriodIndex([], freq=FREQUENCIES[frequency])
+            return pd.DataFrame({'sum': [], 'count': []}, index=empty)
+        periods = pd.period_range(pd.Timestamp(start), pd.Timestamp(end), freq=FREQUENCIES[frequency])
+        edges = periods.start_time.to_numpy().astype('datetime64[D]')
+        # The first and last periods are clipped to the requested window
+        edges = np.append(edges, end + _one_day())
+        edges[0] = start
+        sales, count = self._prefixes(dimension, value)
+        positions = self._positions(edges)
+        return pd.DataFrame({
+            'sum': sales[positions[1:]] - sales[positions[:-1]],
+            'count': count[positions[1:]] - count[positions[:-1]],
+        }, index=periods)
+
+
+def date_order(df):
+    """Row positions sorted by Order Date, with the sorted dates."""
+    dates = df['Order Date'].to_numpy()
+    order = np.argsort(dates, kind='stable')
+    return order, dates[order]
+
+
+def extend_date_order(index, rows):
+    """``date_order`` after appending ``rows``, whose index holds their positions."""
+    order, dates = index
+    new_dates = rows['Order Date'].to_numpy()
+    new_order = np.argsort(new_dates, kind='stable')
+    new_dates = new_dates[new_order]
+    at = np.searchsorted(dates, new_dates, side='right')
+    return (np.insert(order, at, rows.index.to_numpy()[new_order]),
+            np.insert(dates, at, new_dates))
+
+
+def rows_between(index, start=None, end=None):
+    """Positions of the rows with Order Date in ``[start, end]`` (inclusive)."""
+    order, dates = index
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(_day(start)), side='left')
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(_day(end) + _one_day()), side='left')
+    return order[lo:hi]
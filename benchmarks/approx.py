@@ -0,0 +1,120 @@
+"""Approximate answers from stratified samples against exact ones.
+
+    python -m benchmarks.approx --scales 1 10 100 --errors 0.05 0.02 0.01 --json approx.json
+
+For each scale, times the dashboard's filtered per-Sub-Category table and
+totals (``dashboard.queries``) exactly and, for each error budget, from
+a stratified sample of that size (``analytics.sampling``), along with
+the time the scripts take to draw and persist the sample and to load it
+back (the dashboard draws its own in memory). Reports the
+largest relative error of the estimated Sub-Category sums and the share
+of exact values (sums, counts, means and shares) that fall inside their
+confidence intervals, which should be close to the confidence level.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+import warnings
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sales_dashboard.settings')
+django.setup()
+warnings.filterwarnings('ignore', message='No directory at')
+
+import numpy as np
+from django.test import override_settings
+
+from analytics.sampling import load_sample, samples_path_for
+from dashboard import queries
+from dashboard.dataset import dataset_cache
+from .datasets import scaled_csv
+
+FILTERS = {'Segment': ['Consumer'], 'from': '2016-01-01'}
+COLUMN = 'Sub-Category'
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def accuracy(estimate, exact):
+    exact = exact.assign(share=exact['sum'] / exact['sum'].sum()).reindex(estimate.index)
+    inside = [(estimate[name] - exact[name]).abs() <= estimate[f'{name}_ci'] + 1e-9 * exact[name].abs()
+              for name in ('sum', 'count', 'mean', 'share')]
+    return {
+        'max_error': float(((estimate['sum'] - exact['sum']).abs() / exact['sum']).max()),
+        'coverage': float(np.mean(np.concatenate([series.to_numpy() for series in inside]))),
+    }
+
+
+def run_scale(scale, errors, repeat):
+    path = str(scaled_csv(scale))
+    shutil.rmtree(samples_path_for(path), ignore_errors=True)
+    results = []
+    with override_settings(SALES_DATA_PATH=path):
+        dataset_cache.clear()
+        df = queries.load_data()
+        exact = queries.sales_table(COLUMN, FILTERS)
+        exact_table_ms = best_of(repeat, lambda: queries.sales_table(COLUMN, FILTERS)) * 1000
+        exact_totals_ms = best_of(repeat, lambda: queries.overall_totals(FILTERS)) * 1000
+        for error in errors:
+            start = time.perf_counter()
+            load_sample(path, error=error)
+            draw_s = time.perf_counter() - start
+            start = time.perf_counter()
+            load_sample(path, error=error)
+            reload_s = time.perf_counter() - start
+            with override_settings(SALES_SAMPLE_ERROR=error):
+                approx = {**FILTERS, 'approx': True}
+                estimate = queries.sales_table(COLUMN, approx)
+                results.append({
+                    'scale': scale,
+                    'rows': len(df),
+                    'error_budget': error,
+                    'sample_rows': queries.sample().rows,
+                    'draw_s': draw_s,
+                    'reload_s': reload_s,
+                    'exact_table_ms': exact_table_ms,
+                    'approx_table_ms': best_of(repeat, lambda: queries.sales_table(COLUMN, approx)) * 1000,
+                    'exact_totals_ms': exact_totals_ms,
+                    'approx_totals_ms': best_of(repeat, lambda: queries.overall_totals(approx)) * 1000,
+                    **accuracy(estimate, exact),
+                })
+        dataset_cache.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--errors', type=float, nargs='+', default=[0.05, 0.02, 0.01])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'scale':>6}{'budget':>8}{'sample':>10}{'draw':>8}{'reload':>8}"
+          f"{'table':>18}{'totals':>18}{'max err':>9}{'in CI':>7}")
+    for scale in args.scales:
+        for row in run_scale(scale, args.errors, args.repeat):
+            results.append(row)
+            print(f"{row['scale']:>5}x{row['error_budget']:>8.1%}{row['sample_rows']:>10,}"
+                  f"{row['draw_s']:>7.2f}s{row['reload_s']:>7.2f}s"
+                  f"{row['exact_table_ms']:>8.1f}/{row['approx_table_ms']:<5.1f}ms"
+                  f"{row['exact_totals_ms']:>8.1f}/{row['approx_totals_ms']:<5.1f}ms"
+                  f"{row['max_error']:>9.1%}{row['coverage']:>7.0%}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Synthetic datasets scaled up from the bundled train.csv."""
+import os
+import tempfile
+
+import pandas as pd
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'train.csv')
+
+
+def scaled_csv(factor, directory=None, source=SOURCE):
+    """Return the path of train.csv repeated ``factor`` times with fresh Row IDs.
+
+    Files are written once per ``directory`` and reused on later calls.
+    """
+    if factor == 1:
+        return source
+    directory = directory or os.path.join(tempfile.gettempdir(), 'sales-benchmarks')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'train_x{factor}.csv')
+    if os.path.exists(path):
+        return path
+
+    base = pd.read_csv(source)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        for copy in range(factor):
+            block = base.assign(**{'Row ID': base['Row ID'] + copy * len(base)})
+            block.to_csv(f, index=False, header=copy == 0)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,99 @@
+"""Payload size and render time of time series, full and downsampled.
+
+    python -m benchmarks.downsampling --scale 10 --points 500 2000 --json downsampling.json
+
+For the daily sales series and the per-order series (every order line by
+Order Date), and for each method and point budget, reports the number of
+points kept, the time to pick them, the size of the JSON the trend API
+would send, and the time to draw the line with matplotlib (Agg, one
+dashboard-sized panel) as a stand-in for the browser's drawing time.
+"""
+import argparse
+import io
+import json
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from analytics.downsample import METHODS, downsample
+from analytics.engine import ensure_snapshot
+from analytics.snapshot import load_sales
+from analytics.timeindex import TimeIndex
+from .datasets import scaled_csv
+
+
+def series(path):
+    df = load_sales(path)
+    daily = TimeIndex.build(df, dimensions=[]).resample('day')['sum']
+    orders = df[['Order Date', 'Sales']].sort_values('Order Date', kind='stable')
+    return {
+        'daily': pd.Series(daily.to_numpy(), index=daily.index.to_timestamp()),
+        'per_order': pd.Series(orders['Sales'].to_numpy(), index=orders['Order Date']),
+    }
+
+
+def payload(data):
+    # Shaped as the trend endpoint shapes it
+    return json.dumps({
+        'labels': [str(day) for day in data.index],
+        'sales': data.round(2).tolist(),
+    }, separators=(',', ':'))
+
+
+def render(data):
+    fig, ax = plt.subplots(figsize=(10, 4.5), dpi=100)
+    ax.plot(data.index, data.to_numpy(), linewidth=1)
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def measure(data, method, points):
+    if method is None:
+        kept, pick = data, 0.0
+    else:
+        kept, pick = timed(downsample, data, points, method)
+    body, serialize = timed(payload, kept)
+    _, draw = timed(render, kept)
+    return {'points': len(kept), 'downsample': pick, 'serialize': serialize,
+            'bytes': len(body), 'render': draw}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10, help='Copies of train.csv to load.')
+    parser.add_argument('--points', type=int, nargs='+', default=[500, 2000])
+    parser.add_argument('--json', help='Write results to this file.')
+    args = parser.parse_args()
+
+    path = scaled_csv(args.scale)
+    ensure_snapshot(path)
+
+    results = []
+    for name, data in series(path).items():
+        runs = [(None, None)] + [(method, points) for points in args.points for method in METHODS]
+        for method, points in runs:
+            result = {'series': name, 'method': method or 'full', 'budget': points,
+                      **measure(data, method, points)}
+            results.append(result)
+            print(f"{name:>9} {result['method']:>6} {points or '':>6}: {result['points']:>9,} points"
+                  f"  {result['bytes'] / 1024:10.1f} KiB"
+                  f"  downsample {result['downsample'] * 1000:8.2f} ms"
+                  f"  serialize {result['serialize'] * 1000:9.2f} ms"
+                  f"  render {result['render'] * 1000:9.2f} ms", flush=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'scale': args.scale, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
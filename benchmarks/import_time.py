@@ -0,0 +1,123 @@
+"""Import-time budget for the server and the scripts.
+
+    python -m benchmarks.import_time [--repeat 3] [--json import_time.json]
+
+Imports each target in a fresh interpreter under ``python -X importtime``
+and totals the import time it reports (the fastest of ``--repeat``
+runs). A target fails when it takes longer than its budget, or when it
+imports a module it is meant to defer: the URLconf, which every worker
+and ``manage.py`` command loads, must not pull in pandas, numpy or the
+plotting libraries, the streaming, sketch and partition modules the
+scripts aggregate with must not pull in pandas or numpy either, and the
+scripts must not import pyplot or seaborn before they draw. Exits with status 1 when any target fails, so it can
+gate CI; ``manage.py check`` wall time is reported alongside.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target -> (code to import it, budget in ms, modules it must not import)
+TARGETS = {
+    'urlconf': (
+        'import django; django.setup(); import sales_dashboard.urls',
+        450,
+        ['numpy', 'pandas', 'matplotlib', 'seaborn', 'plotly'],
+    ),
+    'analytics': (
+        'import analytics.sketches, analytics.streaming, analytics.partitions',
+        100,
+        ['numpy', 'pandas'],
+    ),
+    'key_insights': (
+        'import key_insights',
+        150,
+        ['numpy', 'pandas', 'matplotlib', 'seaborn'],
+    ),
+    'sales_eda': (
+        'import sales_eda',
+        600,
+        ['matplotlib', 'seaborn'],
+    ),
+    'sales_visualizations': (
+        'import sales_visualizations',
+        800,
+        ['matplotlib.pyplot', 'seaborn'],
+    ),
+}
+
+
+def import_times(code):
+    """{module: cumulative microseconds} for one run of ``code``, and the total."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='sales_dashboard.settings')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    modules, total = {}, 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        if not name[1:].startswith(' '):
+            # Top-level imports; nested ones are included in their parent
+            total += int(cumulative)
+    return modules, total
+
+
+def check(name, repeat, budget=None):
+    code, default_budget, forbidden = TARGETS[name]
+    budget = budget or default_budget
+    runs = [import_times(code) for _ in range(repeat)]
+    modules, total = min(runs, key=lambda run: run[1])
+    imported = [module for module in forbidden if module in modules]
+    return {
+        'target': name,
+        'ms': total / 1000,
+        'budget_ms': budget,
+        'forbidden': imported,
+        'ok': total / 1000 <= budget and not imported,
+    }
+
+
+def command_latency(repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'manage.py', 'check'], cwd=ROOT,
+                       capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget', action='append', default=[], metavar='TARGET=MS',
+                        help='Override a target\'s budget, e.g. urlconf=400.')
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args()
+    budgets = {name: float(ms) for name, ms in (item.split('=') for item in args.budget)}
+
+    results = [check(name, args.repeat, budgets.get(name)) for name in TARGETS]
+    print(f"{'target':<22}{'import':>10}{'budget':>10}  status")
+    for result in results:
+        status = 'ok' if result['ok'] else 'FAIL'
+        if result['forbidden']:
+            status += f" (imports {', '.join(result['forbidden'])})"
+        print(f"{result['target']:<22}{result['ms']:>8.0f}ms{result['budget_ms']:>8.0f}ms  {status}")
+    latency = command_latency(args.repeat)
+    print(f'\nmanage.py check: {latency:.0f}ms')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'targets': results, 'manage_py_check_ms': latency}, f, indent=2)
+    if not all(result['ok'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
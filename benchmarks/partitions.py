@@ -0,0 +1,98 @@
+"""Cost of date-bounded queries against the size of the window.
+
+    python -m benchmarks.partitions --scales 1 10 100 --json partitions.json
+
+For each scale and each window (a month, a quarter, a year and all of
+history), times the report aggregation (``aggregate_sales`` with
+``start``/``end``, which reads only the overlapping month partitions)
+and the dashboard's filtered totals and per-region table on the
+in-memory frame (``dashboard.queries``, which select the window through
+the date index). Both should track the rows in the window, not the rows
+in the file.
+"""
+import argparse
+import json
+import os
+import time
+import warnings
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sales_dashboard.settings')
+django.setup()
+warnings.filterwarnings('ignore', message='No directory at')
+
+from django.test import override_settings
+
+from analytics.engine import ensure_snapshot
+from analytics.partitions import ensure_partitions, overlapping, read_partition_meta
+from analytics.streaming import aggregate_sales
+from dashboard import queries
+from dashboard.dataset import dataset_cache
+from .datasets import scaled_csv
+
+WINDOWS = {
+    'month': ('2017-06-01', '2017-06-30'),
+    'quarter': ('2017-04-01', '2017-06-30'),
+    'year': ('2017-01-01', '2017-12-31'),
+    'all': (None, None),
+}
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_scale(scale, repeat):
+    path = str(scaled_csv(scale))
+    ensure_snapshot(path)
+    partitions = ensure_partitions(path)
+    meta = read_partition_meta(partitions)
+    results = []
+    with override_settings(SALES_DATA_PATH=path):
+        dataset_cache.clear()
+        queries.load_data()
+        for name, (start, end) in WINDOWS.items():
+            filters = {key: value for key, value in (('from', start), ('to', end)) if value}
+            filters['Segment'] = ['Consumer']
+            entries = overlapping(meta, start, end)
+            results.append({
+                'scale': scale,
+                'window': name,
+                'partitions': len(entries),
+                'rows': sum(entry['rows'] for entry in entries),
+                'aggregate_s': best_of(repeat, lambda: aggregate_sales(path, start=start, end=end)),
+                'totals_ms': best_of(repeat, lambda: queries.filtered_totals(filters)) * 1000,
+                'table_ms': best_of(repeat, lambda: queries.sales_table('Region', filters)) * 1000,
+            })
+        dataset_cache.clear()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'scale':>6} {'window':<8}{'partitions':>11}{'rows':>11}"
+          f"{'aggregate':>12}{'totals':>10}{'table':>10}")
+    for scale in args.scales:
+        for row in run_scale(scale, args.repeat):
+            results.append(row)
+            print(f"{row['scale']:>5}x {row['window']:<8}{row['partitions']:>11}{row['rows']:>11,}"
+                  f"{row['aggregate_s']:>11.3f}s{row['totals_ms']:>8.2f}ms{row['table_ms']:>8.2f}ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Time the report aggregation with 1..N worker processes.
+
+    python -m benchmarks.report_scaling --scale 100 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import time
+
+from analytics.engine import aggregate_parallel, ensure_snapshot
+from .datasets import scaled_csv
+
+
+def run(path, workers, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        aggregate_parallel(path, workers=workers)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10, help='Copies of train.csv to aggregate.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Write results to this file.')
+    args = parser.parse_args()
+
+    path = scaled_csv(args.scale)
+    ensure_snapshot(path)  # build outside the timed runs
+
+    results = []
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        seconds = run(path, workers, args.repeat)
+        baseline = baseline or seconds
+        results.append({'workers': workers, 'seconds': seconds, 'speedup': baseline / seconds})
+        print(f"{workers:>3} workers: {seconds:8.3f}s  speedup x{baseline / seconds:.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'scale': args.scale, 'cpus': os.cpu_count(), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
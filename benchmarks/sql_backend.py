@@ -0,0 +1,130 @@
+"""Peak memory and request times of the pandas and SQL data backends.
+
+    python -m benchmarks.sql_backend --scales 1 10 50 --json sql_backend.json
+
+For each scale the scaled CSV is imported (``manage.py import_sales``)
+into a temporary SQLite database, then each backend serves the same
+pages and API requests in a process of its own, cold and again with the
+fragment cache cleared. Reports the import time, the request times and
+the process's peak RSS, which for the pandas backend grows with the data
+and for the SQL backend should not.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+import warnings
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sales_dashboard.settings')
+django.setup()
+warnings.filterwarnings('ignore', message='No directory at')
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import Client, override_settings
+
+from analytics.engine import ensure_snapshot
+from dashboard.filters import filter_query
+from .datasets import scaled_csv
+
+BACKENDS = ['pandas', 'sql']
+
+FILTERS = {'Region': ['East'], 'Segment': ['Consumer'], 'from': '2017-01-01', 'to': '2017-12-31'}
+
+URLS = [
+    '/',
+    f'/?{filter_query(FILTERS)}',
+    '/insights/',
+    f'/insights/?{filter_query(FILTERS)}',
+    '/api/sales/by/sub-category/',
+    f'/api/top/product/?{filter_query(FILTERS)}',
+    '/api/trend/day/',
+    '/customers/CG-12520/',
+]
+
+
+def use_database(name):
+    # Before the first query, so the connection opens this file
+    settings.DATABASES['default']['NAME'] = name
+
+
+def serve(path, database, backend, results):
+    use_database(database)
+    timings = {}
+    with override_settings(SALES_DATA_PATH=path, SALES_DATA_BACKEND=backend, ALLOWED_HOSTS=['*']):
+        client = Client()
+        for label in ('cold', 'warm'):
+            caches[settings.FRAGMENT_CACHE_ALIAS].clear()
+            start = time.perf_counter()
+            for url in URLS:
+                response = client.get(url)
+                assert response.status_code == 200, (url, response.status_code)
+            timings[label] = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    results.put({**timings, 'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024})
+
+
+def measure(path, database, backend):
+    # A fresh process per backend, so peak RSS covers only its own work
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=serve, args=(path, database, backend, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def import_sales(path, database):
+    use_database(database)
+    call_command('migrate', verbosity=0)
+    start = time.perf_counter()
+    call_command('import_sales', source=path, replace=True, stdout=open(os.devnull, 'w'))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--json', help='Write results to this file.')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='sales-sql-')
+    results = []
+    try:
+        for scale in args.scales:
+            path = scaled_csv(scale)
+            ensure_snapshot(path)
+            database = os.path.join(directory, f'sales_x{scale}.sqlite3')
+            # Imported in a child too, so the parent never opens a connection
+            context = multiprocessing.get_context('fork')
+            pool = context.Pool(1)
+            seconds = pool.apply(import_sales, (path, database))
+            pool.close()
+            print(f'x{scale:<5} import {seconds:8.2f}s  '
+                  f'{os.path.getsize(database) / 2**20:8.1f} MB on disk', flush=True)
+            for backend in args.backends:
+                result = {'scale': scale, 'backend': backend, 'import': seconds,
+                          **measure(path, database, backend)}
+                results.append(result)
+                print(f"x{scale:<5} {backend:>6}: cold {result['cold'] * 1000:9.1f} ms"
+                      f"  warm {result['warm'] * 1000:9.1f} ms"
+                      f"  peak RSS {result['peak_rss'] / 2**20:8.1f} MB", flush=True)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'urls': URLS, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,425 @@
+"""Benchmark suite: data load, view building blocks, API serialization,
+request round-trips and the report scripts, on train.csv scaled up.
+
+    python -m benchmarks.suite run --scales 1 10 100 --output bench.json
+    python -m benchmarks.suite run --groups load requests --compare baseline.json
+    python -m benchmarks.suite compare baseline.json bench.json
+
+Each case is timed ``--repeat`` times per scale and the fastest run is
+reported. ``compare`` flags cases that got slower than the baseline by
+more than ``--threshold`` (and by at least ``--min-delta`` seconds) and
+exits non-zero when there are any.
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import django
+
+# The dashboard modules below need configured settings at import time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sales_dashboard.settings')
+django.setup()
+warnings.filterwarnings('ignore', message='No directory at')
+
+import numpy as np
+import pandas as pd
+from django.core.cache import caches
+from django.conf import settings
+from django.test import Client, override_settings
+
+from analytics.bitmaps import BitmapIndex
+from analytics.cube import build_cube, rollup, totals
+from analytics.engine import ensure_snapshot
+from analytics.profiles import build_profiles
+from analytics.snapshot import load_sales, read_csv
+from analytics.streaming import aggregate_sales
+from analytics.timeindex import TimeIndex
+from dashboard import queries
+from dashboard.api import build_payload
+from dashboard.dataset import DatasetCache, dataset_cache, read_sales
+from dashboard.filters import filter_query
+from dashboard.reports import render_reports
+from .datasets import scaled_csv
+
+GROUPS = ['load', 'blocks', 'serialize', 'requests', 'scripts']
+
+FILTERS = {'Region': ['East'], 'Segment': ['Consumer'], 'from': '2017-01-01', 'to': '2017-12-31'}
+
+CUSTOMER_ID = 'CG-12520'
+
+CASES = []
+
+
+def case(group):
+    """Register ``func(env)``; it returns the callable that gets timed."""
+    def register(func):
+        CASES.append((group, f'{group}.{func.__name__}', func))
+        return func
+    return register
+
+
+def clear_fragments():
+    caches[settings.FRAGMENT_CACHE_ALIAS].clear()
+
+
+# Data load
+
+@case('load')
+def csv(env):
+    return lambda: read_csv(env.path)
+
+
+@case('load')
+def snapshot(env):
+    return lambda: load_sales(env.path)
+
+
+@case('load')
+def dataset(env):
+    # What load_data() costs on a cold cache: snapshot read plus date parts and compaction
+    return lambda: DatasetCache(env.path).get()
+
+
+@case('load')
+def dataset_cached(env):
+    dataset_cache.get()
+    return dataset_cache.get
+
+
+# Building blocks of the dashboard and insights views
+
+@case('blocks')
+def cube(env):
+    return lambda: build_cube(env.frame)
+
+
+@case('blocks')
+def customer_profiles(env):
+    return lambda: build_profiles(env.frame, 'Customer ID', 'Customer Name')
+
+
+@case('blocks')
+def state_profiles(env):
+    return lambda: build_profiles(env.frame, 'State')
+
+
+@case('blocks')
+def bitmap_index(env):
+    return lambda: BitmapIndex.build(env.frame)
+
+
+@case('blocks')
+def time_index(env):
+    return lambda: TimeIndex.build(env.frame)
+
+
+@case('blocks')
+def unique_customers(env):
+    return lambda: set(env.frame['Customer Name'].dropna().unique())
+
+
+@case('blocks')
+def metrics(env):
+    cube = queries.load_cube()
+    return lambda: totals(cube)
+
+
+@case('blocks')
+def summaries(env):
+    cube = queries.load_cube()
+    return lambda: [queries.sales_summary(rollup(cube, dimension))
+                    for dimension in ('Category', 'Region', 'Segment')]
+
+
+@case('blocks')
+def filter_selection(env):
+    index = queries.bitmap_index()
+    dimensions = {column: values for column, values in FILTERS.items() if column in index.bitmaps}
+    return lambda: index.mask(dimensions)
+
+
+@case('blocks')
+def filtered_totals(env):
+    queries.filtered_totals(FILTERS)
+    return lambda: queries.filtered_totals(FILTERS)
+
+
+@case('blocks')
+def date_window(env):
+    index = queries.time_index()
+    return lambda: index.window(FILTERS['from'], FILTERS['to'])
+
+
+@case('blocks')
+def monthly_trend(env):
+    index = queries.time_index()
+    return lambda: index.resample('month')
+
+
+# Chart payloads, as the JSON API serializes them (uncached)
+
+def payload_case(name, spec):
+    def build(env):
+        build_payload(spec)
+        return lambda: build_payload(spec)
+    build.__name__ = name
+    return case('serialize')(build)
+
+
+payload_case('metrics', {'kind': 'metrics'})
+payload_case('sales_by_category', {'kind': 'sales_by', 'column': 'Category'})
+payload_case('sales_by_month_filtered', {'kind': 'sales_by', 'column': 'Month', 'filters': FILTERS})
+payload_case('top_products', {'kind': 'top', 'column': 'Product ID', 'n': 10})
+payload_case('top_products_filtered', {'kind': 'top', 'column': 'Product ID', 'n': 10, 'filters': FILTERS})
+payload_case('trend_month', {'kind': 'trend', 'frequency': 'month'})
+payload_case('trend_day', {'kind': 'trend', 'frequency': 'day', 'points': 500, 'method': 'lttb'})
+payload_case('trend_day_full', {'kind': 'trend', 'frequency': 'day'})
+
+
+# Request round-trips through Django, data loaded, fragment cache cleared
+
+def request_case(name, url, cached=False):
+    def build(env):
+        client = Client()
+        client.get(url)
+
+        def run():
+            if not cached:
+                clear_fragments()
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return run
+    build.__name__ = name
+    return case('requests')(build)
+
+
+request_case('dashboard', '/')
+request_case('dashboard_filtered', f'/?{filter_query(FILTERS)}')
+request_case('insights', '/insights/')
+request_case('insights_filtered', f'/insights/?{filter_query(FILTERS)}')
+request_case('customer', f'/customers/{CUSTOMER_ID}/')
+request_case('api_sales_by', '/api/sales/by/sub-category/')
+request_case('api_sales_by_cached', '/api/sales/by/sub-category/', cached=True)
+request_case('api_top_filtered', f'/api/top/product/?{filter_query(FILTERS)}')
+request_case('api_trend', '/api/trend/week/')
+request_case('api_trend_day', '/api/trend/day/')
+
+
+def report_case(name, url):
+    # Served by StaticReportMiddleware from pages rendered for this scale's data
+    def build(env):
+        root = os.path.join(tempfile.gettempdir(), 'sales-benchmarks', f'reports_x{env.scale}')
+        render_reports(root, force=True)
+        with override_settings(REPORTS_ROOT=root):
+            client = Client()
+            client.get(url)
+
+        def run():
+            with override_settings(REPORTS_ROOT=root):
+                response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+            assert response.status_code == 200 and response.streaming, url
+            b''.join(response.streaming_content)
+        return run
+    build.__name__ = name
+    return case('requests')(build)
+
+
+report_case('dashboard_report', '/')
+report_case('insights_report', '/insights/')
+
+
+@case('requests')
+def api_not_modified(env):
+    client = Client()
+    etag = client.get('/api/metrics/')['ETag']
+
+    def run():
+        response = client.get('/api/metrics/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+    return run
+
+
+# Report scripts
+
+def script_case(module_name):
+    def build(env):
+        module = importlib.import_module(module_name)
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                # sales_eda reports duplicate rows, which need row hashes
+                module.report(aggregate_sales(env.path, duplicates=module_name == 'sales_eda'))
+        return run
+    build.__name__ = module_name
+    return case('scripts')(build)
+
+
+script_case('key_insights')
+script_case('sales_eda')
+
+
+def time_case(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_scale(scale, groups, repeat, pattern=None):
+    path = scaled_csv(scale)
+    ensure_snapshot(path)  # built outside the timed runs
+    results = []
+    # The page views are measured, not pages pre-rendered for train.csv
+    with override_settings(SALES_DATA_PATH=path, REPORTS_ROOT=None):
+        dataset_cache.clear()
+        clear_fragments()
+        env = SimpleNamespace(path=path, scale=scale, frame=read_sales(path))
+        rows = len(env.frame)
+        for group, name, build in CASES:
+            if group not in groups or (pattern and pattern not in name):
+                continue
+            timings = time_case(build(env), repeat)
+            results.append({
+                'name': name,
+                'group': group,
+                'scale': scale,
+                'rows': rows,
+                'seconds': min(timings),
+                'median': statistics.median(timings),
+                'repeat': repeat,
+            })
+            print(f'{name:<40} x{scale:<5} {min(timings) * 1000:10.2f} ms', flush=True)
+        dataset_cache.clear()
+    return results
+
+
+def environment():
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'django': django.get_version(),
+        'compact': getattr(settings, 'SALES_DATA_COMPACT', False),
+    }
+
+
+def scaling_table(results):
+    """Seconds per case and scale, with the growth relative to the smallest scale."""
+    scales = sorted({result['scale'] for result in results})
+    names = list(dict.fromkeys(result['name'] for result in results))
+    seconds = {(result['name'], result['scale']): result['seconds'] for result in results}
+    lines = [f"{'case':<40}" + ''.join(f'{f"x{scale}":>20}' for scale in scales)]
+    for name in names:
+        base = seconds.get((name, scales[0]))
+        cells = []
+        for scale in scales:
+            value = seconds.get((name, scale))
+            if value is None:
+                cells.append(f"{'-':>20}")
+            elif scale == scales[0] or not base:
+                cells.append(f'{value * 1000:>17.2f} ms')
+            else:
+                cells.append(f'{value * 1000:>11.2f} ms {value / base:>4.0f}x')
+        lines.append(f'{name:<40}' + ''.join(cells))
+    return '\n'.join(lines)
+
+
+def compare(baseline, current, threshold=0.25, min_delta=0.001):
+    """Rows of (name, scale, baseline s, current s, ratio, status)."""
+    before = {(result['name'], result['scale']): result['seconds'] for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        key = (result['name'], result['scale'])
+        if key not in before:
+            rows.append((*key, None, result['seconds'], None, 'new'))
+            continue
+        old, new = before[key], result['seconds']
+        ratio = new / old if old else float('inf')
+        if ratio > 1 + threshold and new - old >= min_delta:
+            status = 'REGRESSION'
+        elif ratio < 1 / (1 + threshold) and old - new >= min_delta:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((*key, old, new, ratio, status))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"\n{'case':<40}{'scale':>7}{'baseline':>14}{'current':>14}{'ratio':>8}  status")
+    for name, scale, old, new, ratio, status in rows:
+        old_text = f'{old * 1000:.2f} ms' if old is not None else '-'
+        ratio_text = f'{ratio:.2f}' if ratio is not None else '-'
+        print(f'{name:<40}{"x" + str(scale):>7}{old_text:>14}{new * 1000:>11.2f} ms{ratio_text:>8}  {status}')
+    regressions = sum(1 for row in rows if row[-1] == 'REGRESSION')
+    print(f'\n{regressions} regression(s)')
+    return regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks.')
+    run_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10],
+                            help='Copies of train.csv to benchmark on (e.g. 1 10 100 1000).')
+    run_parser.add_argument('--groups', nargs='+', choices=GROUPS, default=GROUPS)
+    run_parser.add_argument('-k', dest='pattern', help='Only run cases whose name contains this.')
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--output', help='Write results as JSON to this file.')
+    run_parser.add_argument('--compare', metavar='BASELINE', help='Compare against a stored results file.')
+
+    compare_parser = commands.add_parser('compare', help='Compare two results files.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+
+    for sub in (run_parser, compare_parser):
+        sub.add_argument('--threshold', type=float, default=0.25,
+                         help='Relative slowdown that counts as a regression.')
+        sub.add_argument('--min-delta', type=float, default=0.001,
+                         help='Ignore slowdowns smaller than this many seconds.')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        rows = compare(load_results(args.baseline), load_results(args.current),
+                       args.threshold, args.min_delta)
+        sys.exit(1 if print_comparison(rows) else 0)
+
+    results = []
+    for scale in args.scales:
+        results.extend(run_scale(scale, args.groups, args.repeat, args.pattern))
+    report = {'environment': environment(), 'results': results}
+    print()
+    print(scaling_table(results))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        rows = compare(load_results(args.compare), report, args.threshold, args.min_delta)
+        sys.exit(1 if print_comparison(rows) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Memory per server worker with private and shared (memory-mapped) datasets.
+
+    python -m benchmarks.worker_memory --scale 100 --workers 1 2 4 8
+
+Forks N workers side by side; each renders the dashboard page, which
+loads the dataset and builds its indexes, then reports its USS (memory
+only it holds) and PSS (its share of memory it shares) from /proc, so
+Linux only. ``preloaded`` renders the page once in the parent before
+forking, as gunicorn.conf.py does, so the workers inherit the indexes.
+With a shared dataset USS should stay nearly flat per worker.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import warnings
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sales_dashboard.settings')
+django.setup()
+warnings.filterwarnings('ignore', message='No directory at')
+
+from django.test import Client, override_settings
+
+from analytics.engine import ensure_snapshot
+from dashboard.dataset import DatasetCache
+from .datasets import scaled_csv
+
+MODES = ['private', 'shared', 'preloaded']
+
+
+def memory():
+    """(USS, PSS) of this process in bytes."""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return fields['Private_Clean'] + fields['Private_Dirty'], fields['Pss']
+
+
+def render_dashboard():
+    response = Client().get('/')
+    assert response.status_code == 200, response.status_code
+
+
+def worker(ready, done, results):
+    render_dashboard()
+    # Measure once every worker has loaded, so shared pages are split fairly
+    ready.wait()
+    results.put(memory())
+    done.wait()
+
+
+def master(path, shared_root, preload, workers, results):
+    context = multiprocessing.get_context('fork')
+    ready, done = context.Barrier(workers), context.Barrier(workers + 1)
+    with override_settings(SALES_DATA_PATH=path, SHARED_DATASET_DIR=shared_root,
+                           ALLOWED_HOSTS=['*']):
+        if preload:
+            render_dashboard()
+        processes = [context.Process(target=worker, args=(ready, done, results))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        done.wait()
+        for process in processes:
+            process.join()
+
+
+def measure(path, mode, shared_root, workers):
+    # A fresh parent per run, so nothing loaded by earlier runs is inherited
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    parent = context.Process(target=master, args=(
+        path, shared_root if mode != 'private' else None, mode == 'preloaded', workers, results))
+    parent.start()
+    samples = [results.get() for _ in range(workers)]
+    parent.join()
+    uss, pss = zip(*samples)
+    return {'uss': sum(uss) / workers, 'pss': sum(pss) / workers, 'total_pss': sum(pss)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=10, help='Copies of train.csv to load.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--json', help='Write results to this file.')
+    args = parser.parse_args()
+
+    path = scaled_csv(args.scale)
+    ensure_snapshot(path)
+    shared_root = tempfile.mkdtemp(prefix='sales-shared-')
+    try:
+        # Published up front, by a process of its own, as a loader would
+        process = multiprocessing.get_context('fork').Process(
+            target=lambda: DatasetCache(path, shared_root=shared_root).generation())
+        process.start()
+        process.join()
+
+        results = []
+        for mode in args.modes:
+            for workers in sorted(set(args.workers)):
+                result = measure(path, mode, shared_root, workers)
+                results.append({'mode': mode, 'workers': workers, **result})
+                print(f"{mode:>9} {workers:>3} workers: USS {result['uss'] / 2**20:8.1f} MB/worker"
+                      f"  PSS {result['pss'] / 2**20:8.1f} MB/worker"
+                      f"  total PSS {result['total_pss'] / 2**20:8.1f} MB", flush=True)
+    finally:
+        shutil.rmtree(shared_root, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'scale': args.scale, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 #!/usr/bin/env bash
 pip install -r requirements.txt
+# Self-hosted Plotly bundle; without registry access, point
+# PLOTLY_BUNDLE_SOURCE at a downloaded plotly-basic.min.js or .tgz
+python manage.py build_plotly_bundle ${PLOTLY_BUNDLE_SOURCE:+--source "$PLOTLY_BUNDLE_SOURCE"}
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py build_snapshot
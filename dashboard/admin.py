@@ -1,3 +1,35 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Customer, Geography, Product, Sale, SalesImport
+
+
+@admin.register(Sale)
+class SaleAdmin(admin.ModelAdmin):
+    list_display = ['row_id', 'order_id', 'order_date', 'customer', 'category', 'region', 'sales']
+    list_filter = ['region', 'category', 'segment', 'ship_mode']
+    date_hierarchy = 'order_date'
+    # Foreign keys as raw ids: the select boxes would list every customer and product
+    raw_id_fields = ['customer', 'product', 'geography']
+
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    list_display = ['customer_id', 'name', 'segment']
+    search_fields = ['customer_id', 'name']
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ['product_id', 'name', 'category', 'sub_category']
+    search_fields = ['product_id', 'name']
+
+
+@admin.register(Geography)
+class GeographyAdmin(admin.ModelAdmin):
+    list_display = ['city', 'state', 'postal_code', 'region']
+    list_filter = ['region']
+
+
+@admin.register(SalesImport)
+class SalesImportAdmin(admin.ModelAdmin):
+    list_display = ['imported_at', 'source', 'rows']
@@ -0,0 +1,203 @@
+import json
+
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from analytics.downsample import METHODS, downsample
+from analytics.profiles import PROFILE_KEYS
+from analytics.timeindex import FREQUENCIES
+from .filters import parse_filters
+from .fragments import cached_fragment
+from .queries import (current_version, entity_names, last_modified, overall_totals,
+                      sales_table, sample, top_sales, trend)
+from .timing import stage
+
+# URL slug -> column, for dimensions the aggregate cube can answer
+DIMENSIONS = {
+    'category': 'Category',
+    'sub-category': 'Sub-Category',
+    'region': 'Region',
+    'segment': 'Segment',
+    'ship-mode': 'Ship Mode',
+    'state': 'State',
+    'year': 'Year',
+    'month': 'Month',
+}
+
+TOP_DIMENSIONS = {
+    **DIMENSIONS,
+    'product': 'Product ID',
+    'customer': 'Customer ID',
+    'city': 'City',
+}
+
+DEFAULT_TOP_N = 10
+MAX_TOP_N = 100
+
+# Trend series longer than this are downsampled (?points=, ?method=); a
+# chart has no more pixel columns than this to draw them on anyway
+DEFAULT_TREND_POINTS = 500
+MAX_TREND_POINTS = 5000
+DEFAULT_DOWNSAMPLE = 'lttb'
+
+
+def data_etag(request, *args, **kwargs):
+    return current_version()
+
+
+def data_last_modified(request, *args, **kwargs):
+    return last_modified()
+
+
+# Conditional GETs are answered from a stat() of the data file, so a 304
+# never loads or aggregates anything.
+data_conditional = condition(etag_func=data_etag, last_modified_func=data_last_modified)
+
+
+def dumps(payload):
+    with stage('serialize'):
+        return json.dumps(payload, separators=(',', ':'))
+
+
+def build_payload(spec):
+    kind = spec['kind']
+    filters = spec.get('filters')
+    if kind == 'metrics':
+        overall = overall_totals(filters)
+        payload = {
+            'total_sales': round(overall['sum'], 2),
+            'total_orders': overall['count'],
+            'avg_order_value': round(overall['mean'], 2),
+            'unique_customers': overall['unique_customers'],
+        }
+        if 'sum_ci' in overall:
+            # Approximate: estimates, their interval half-widths and the sample
+            payload.update({
+                'total_orders': round(overall['count']),
+                'total_sales_ci': round(overall['sum_ci'], 2),
+                'total_orders_ci': round(overall['count_ci']),
+                'avg_order_value_ci': round(overall['mean_ci'], 2),
+                'approx': {'sample_rows': overall['sample_rows'],
+                           'confidence': overall['confidence']},
+            })
+        return dumps(payload)
+    if kind == 'sales_by':
+        summary = sales_table(spec['column'], filters)
+        payload = {
+            'dimension': spec['column'],
+            'labels': summary.index.tolist(),
+            'sales': summary['sum'].round(2).tolist(),
+            'count': summary['count'].round().astype(int).tolist(),
+            'mean': summary['mean'].round(2).tolist(),
+        }
+        if 'sum_ci' in summary.columns:
+            found = sample()
+            payload.update({
+                'sales_ci': summary['sum_ci'].round(2).tolist(),
+                'count_ci': summary['count_ci'].round().astype(int).tolist(),
+                'mean_ci': summary['mean_ci'].round(2).tolist(),
+                'share': summary['share'].round(4).tolist(),
+                'share_ci': summary['share_ci'].round(4).tolist(),
+                'approx': {'sample_rows': found.rows, 'confidence': found.confidence},
+            })
+        return dumps(payload)
+    if kind == 'top':
+        column = spec['column']
+        top = top_sales(column, spec['n'], filters)
+        if PROFILE_KEYS.get(column):
+            # Entity rankings come from the profile index, labelled by name
+            ids = top.index.tolist()
+            return dumps({
+                'dimension': PROFILE_KEYS[column],
+                'ids': ids,
+                'labels': entity_names(column, ids).tolist(),
+                'sales': top.round(2).tolist(),
+            })
+        return dumps({
+            'dimension': column,
+            'labels': top.index.tolist(),
+            'sales': top.round(2).tolist(),
+        })
+    if kind == 'trend':
+        series = trend(spec['frequency'], filters or {})
+        total_points = len(series)
+        series = downsample(series, spec.get('points'), spec.get('method', DEFAULT_DOWNSAMPLE), 'sum')
+        return dumps({
+            'dimension': 'Order Date',
+            'frequency': spec['frequency'],
+            'labels': [str(period) for period in series.index],
+            'sales': series['sum'].round(2).tolist(),
+            'count': series['count'].astype(int).tolist(),
+            'total_points': total_points,
+            'method': spec.get('method', DEFAULT_DOWNSAMPLE) if len(series) < total_points else None,
+        })
+    raise ValueError(f'Unknown payload kind: {kind}')
+
+
+def json_payload(spec):
+    # Shaping chart data is the 'figure' stage now that charts are drawn client-side
+    with stage('figure'):
+        body = cached_fragment('api', spec, build_payload)
+    return HttpResponse(body, content_type='application/json')
+
+
+def chart_spec(view_name, slug, filters, n=DEFAULT_TOP_N, points=DEFAULT_TREND_POINTS,
+               method=DEFAULT_DOWNSAMPLE):
+    """Payload spec served by the chart endpoint ``view_name`` for ``slug``."""
+    if view_name == 'api_sales_by':
+        return {'kind': 'sales_by', 'column': DIMENSIONS[slug], 'filters': filters}
+    if view_name == 'api_top':
+        return {'kind': 'top', 'column': TOP_DIMENSIONS[slug], 'n': n, 'filters': filters}
+    if view_name == 'api_trend':
+        return {'kind': 'trend', 'frequency': slug, 'points': points, 'method': method,
+                'filters': filters}
+    raise ValueError(f'Unknown chart endpoint: {view_name}')
+
+
+def chart_payload(view_name, slug, filters):
+    # Same spec, and so the same cached fragment, as the chart endpoint serves
+    return cached_fragment('api', chart_spec(view_name, slug, filters), build_payload)
+
+
+@require_GET
+@data_conditional
+def metrics(request):
+    return json_payload({'kind': 'metrics', 'filters': parse_filters(request.GET)})
+
+
+@require_GET
+@data_conditional
+def sales_by_dimension(request, dimension):
+    if dimension not in DIMENSIONS:
+        raise Http404(f'Unknown dimension: {dimension}')
+    return json_payload(chart_spec('api_sales_by', dimension, parse_filters(request.GET)))
+
+
+@require_GET
+@data_conditional
+def top(request, dimension):
+    if dimension not in TOP_DIMENSIONS:
+        raise Http404(f'Unknown dimension: {dimension}')
+    try:
+        n = int(request.GET.get('n', DEFAULT_TOP_N))
+    except ValueError:
+        n = DEFAULT_TOP_N
+    n = max(1, min(n, MAX_TOP_N))
+    return json_payload(chart_spec('api_top', dimension, parse_filters(request.GET), n))
+
+
+@require_GET
+@data_conditional
+def sales_trend(request, frequency):
+    if frequency not in FREQUENCIES:
+        raise Http404(f'Unknown frequency: {frequency}')
+    try:
+        points = int(request.GET.get('points', DEFAULT_TREND_POINTS))
+    except ValueError:
+        points = DEFAULT_TREND_POINTS
+    points = max(3, min(points, MAX_TREND_POINTS))
+    method = request.GET.get('method', DEFAULT_DOWNSAMPLE)
+    if method not in METHODS:
+        method = DEFAULT_DOWNSAMPLE
+    return json_payload(chart_spec('api_trend', frequency, parse_filters(request.GET),
+                                   points=points, method=method))
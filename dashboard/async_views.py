@@ -0,0 +1,95 @@
+"""Async versions of the dashboard and insights pages, for ASGI servers.
+
+The page sections (see ``views.DASHBOARD_SECTIONS``/``INSIGHTS_SECTIONS``)
+and the dashboard's chart payloads are built concurrently on a bounded
+thread pool, so the event loop stays free while pandas works. Each piece
+has ``ASYNC_SECTION_TIMEOUT`` seconds; one that fails or runs late is
+replaced by its placeholder (charts then fetch their data from the API
+as usual) instead of failing the page. A late piece keeps running in its
+thread and still warms the caches for the next request.
+
+Enabled with ``DASHBOARD_ASYNC_VIEWS = True``.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.shortcuts import render
+
+from .api import chart_payload
+from .dataset import dataset_cache
+from .filters import parse_filters
+from .queries import sql_backend
+from .timing import stage
+from .views import DASHBOARD_SECTIONS, INSIGHTS_SECTIONS, chart_links
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(max_workers=getattr(settings, 'ASYNC_VIEW_WORKERS', 4),
+                              thread_name_prefix='dashboard-section')
+
+
+async def run_in_pool(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def load_dataset():
+    # Loaded once, before the sections share it; the SQL backend has nothing to load
+    if not sql_backend():
+        dataset_cache.get()
+
+
+async def build_section(build, placeholder, filters):
+    timeout = getattr(settings, 'ASYNC_SECTION_TIMEOUT', 5.0)
+    try:
+        return await asyncio.wait_for(run_in_pool(build, filters), timeout)
+    except asyncio.TimeoutError:
+        logger.warning('Page section %r took over %ss; using its placeholder', build, timeout)
+    except Exception:
+        logger.exception('Page section %r failed; using its placeholder', build)
+    return placeholder
+
+
+async def build_sections(sections, filters):
+    context = {}
+    parts = await asyncio.gather(*(build_section(build, placeholder, filters)
+                                   for build, placeholder in sections))
+    for part in parts:
+        context.update(part)
+    return context
+
+
+async def embed_chart(chart, filters):
+    payload = await build_section(partial(chart_payload, *chart['api']), None, filters)
+    return {**chart, 'payload': payload}
+
+
+async def dashboard(request):
+    filters = parse_filters(request.GET)
+    with stage('load'):
+        await run_in_pool(load_dataset)
+
+    with stage('aggregate'):
+        # Chart payloads are embedded in the page, saving the browser a
+        # round trip per chart; a chart without one fetches it from the API
+        context, *charts = await asyncio.gather(
+            build_sections(DASHBOARD_SECTIONS, filters),
+            *(embed_chart(chart, filters) for chart in chart_links(filters)))
+        context['charts'] = charts
+
+    with stage('render'):
+        return await run_in_pool(render, request, 'dashboard/dashboard.html', context)
+
+
+async def insights(request):
+    filters = parse_filters(request.GET)
+    with stage('load'):
+        await run_in_pool(load_dataset)
+
+    with stage('aggregate'):
+        context = await build_sections(INSIGHTS_SECTIONS, filters)
+
+    with stage('render'):
+        return await run_in_pool(render, request, 'dashboard/insights.html', context)
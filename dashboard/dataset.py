@@ -0,0 +1,322 @@
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from analytics.compact import compact_frame, memory_usage
+from analytics.ingest import append_rows, can_append, csv_columns, fingerprint, read_tail
+from analytics.lazy import lazy_import
+from analytics.shared import attach, current_generation, generation_source, publish, publish_lock
+from analytics.snapshot import load_sales, source_stamp
+from .timing import stage
+
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+
+def add_date_parts(df):
+    df['Year'] = df['Order Date'].dt.year
+    df['Month'] = df['Order Date'].dt.month
+    return df
+
+
+def prepare(df):
+    df = add_date_parts(df)
+    if getattr(settings, 'SALES_DATA_COMPACT', False):
+        df = compact_frame(df)
+    return df
+
+
+def read_sales(path):
+    if getattr(settings, 'SALES_DATA_COMPACT', False):
+        # The snapshot's string columns are already dictionary-encoded;
+        # taken as categoricals, compact_frame has nothing left to encode
+        df = prepare(load_sales(path, categorical=True))
+        logger.info('Loaded %s rows in compact mode: %.1f MB', len(df), memory_usage(df) / 2**20)
+        return df
+    return prepare(load_sales(path))
+
+
+class _Entry:
+    def __init__(self, key, frame, offset):
+        self.key = key
+        self.frame = frame
+        self.derived = {}
+        # Where the next incremental read starts, and what must precede it
+        self.offset = offset
+        self.fingerprint = fingerprint(key[0], offset) if offset is not None else None
+        self.last_row_id = frame['Row ID'].max() if len(frame) else 0
+
+
+class DatasetCache:
+    """Process-wide cache of the parsed sales frame.
+
+    The frame is keyed on (path, mtime, size) of the source file and is
+    reloaded when that key changes. Callers share the cached frame, so it
+    must be treated as read-only.
+
+    Structures computed from the frame (aggregate cubes, indexes) can be
+    memoised alongside it with ``derived()``; they are dropped together
+    with the frame when the file changes.
+
+    When the file has only grown since it was loaded, just the appended
+    rows are parsed. They are added to the frame, and derived structures
+    registered with an ``update`` function are brought up to date from
+    those rows alone.
+
+    With ``serve_stale`` on, requests never load anything once a version
+    is in memory: they keep getting it while ``refresh()``, called from a
+    background thread (see ``dashboard.refresher``), prepares the next
+    one and swaps it in.
+
+    With a ``shared_root`` (``SHARED_DATASET_DIR``), the frame is not
+    loaded per process: the first process to see a new version of the
+    file publishes the prepared frame there as a generation (see
+    ``analytics.shared``), and every process attaches to it read-only
+    through memory-mapped files.
+    """
+
+    def __init__(self, path=None, loader=read_sales, incremental=True, serve_stale=False,
+                 shared_root=None):
+        self._path = path
+        self._shared_root = shared_root
+        self._loader = loader
+        self._incremental = incremental
+        self.serve_stale = serve_stale
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        # Guards the counters below; request threads and the refresher
+        # bump them concurrently, and the fast paths take no other lock
+        self._stats_lock = threading.Lock()
+        self._entry = None  # swapped as a single reference
+        # The version refresh() is preparing, seen only by its own thread
+        self._pending = ContextVar(f'pending_dataset_{id(self)}', default=None)
+        self._updaters = {}
+        self._builders = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.appends = 0
+        self.refreshes = 0
+
+    @property
+    def path(self):
+        return os.fspath(self._path or settings.SALES_DATA_PATH)
+
+    @property
+    def shared_root(self):
+        root = self._shared_root or getattr(settings, 'SHARED_DATASET_DIR', None)
+        return os.fspath(root) if root else None
+
+    def _stat_key(self):
+        stat = os.stat(self.path)
+        return (self.path, stat.st_mtime_ns, stat.st_size)
+
+    def _file_key(self):
+        if self.shared_root:
+            return self._generation_key()
+        return self._stat_key()
+
+    def _generation_key(self):
+        # (generation directory, mtime, size of the file it was built from),
+        # publishing the generation first if no process has yet
+        root = self.shared_root
+        source = source_stamp(self.path)
+        name = current_generation(root)
+        if name is None or generation_source(root, name) != source:
+            with publish_lock(root):
+                name = current_generation(root)
+                if name is None or generation_source(root, name) != source:
+                    with stage('load'):
+                        name = publish(root, self._loader(self.path), source)
+                    logger.info('Published %s as %s/%s', self.path, root, name)
+        return (os.path.join(root, name), source['mtime_ns'], source['size'])
+
+    def generation(self):
+        """Directory of the current shared generation, publishing it if needed."""
+        return self._generation_key()[0]
+
+    def _current(self):
+        entry = self._pending.get()
+        if entry is not None:
+            return entry
+        entry = self._entry
+        if entry is None and self.serve_stale:
+            # Wait out a refresh in progress rather than loading twice
+            with self._refresh_lock:
+                entry = self._entry
+        if entry is not None and self.serve_stale:
+            # The refresher keeps it up to date; no stat() per request
+            self._count('hits')
+            return entry
+
+        key = self._file_key()
+        if entry is not None and entry.key == key:
+            self._count('hits')
+            return entry
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock.
+            entry = self._entry
+            if entry is not None and entry.key == key:
+                self._count('hits')
+                return entry
+            self._count('misses')
+            with stage('load'):
+                entry = self._load(entry, key)
+            self._entry = entry
+            return entry
+
+    def _load(self, entry, key):
+        # The entry for ``key``, from the appended rows when that is possible
+        if self.shared_root:
+            if entry is not None:
+                self._count('reloads')
+            return _Entry(key, attach(*os.path.split(key[0])), None)
+        if (entry is not None and self._incremental and entry.key[0] == key[0]
+                and can_append(self.path, entry.offset, entry.fingerprint)):
+            self._count('appends')
+            return self._append(entry, key)
+        if entry is not None:
+            self._count('reloads')
+        return _Entry(key, self._loader(self.path), key[2])
+
+    def _append(self, entry, key):
+        rows, offset = read_tail(self.path, entry.offset, csv_columns(self.path))
+        if offset == entry.offset:
+            # Only part of a line so far; keep serving what we have
+            return entry
+        # Row IDs guard against re-reading rows a full load already picked up
+        rows = rows[rows['Row ID'] > entry.last_row_id]
+        if rows.empty:
+            new_entry = _Entry(key, entry.frame, offset)
+            new_entry.derived = dict(entry.derived)
+            return new_entry
+        rows = prepare(rows.copy())
+        # Label the new rows with the positions they take in the frame
+        start = len(entry.frame)
+        rows.index = pd.RangeIndex(start, start + len(rows))
+
+        new_entry = _Entry(key, append_rows(entry.frame, rows), offset)
+        for name, value in entry.derived.items():
+            update = self._updaters.get(name)
+            if update is not None:
+                new_entry.derived[name] = update(value, rows)
+        return new_entry
+
+    def get(self):
+        return self._current().frame
+
+    def derived(self, name, builder, update=None):
+        """Return ``builder(frame)`` memoised for the current data version.
+
+        ``update(value, rows)``, if given, must return the value for the
+        frame with ``rows`` appended; otherwise appends rebuild it lazily.
+        """
+        self._builders[name] = builder
+        if update is not None:
+            self._updaters[name] = update
+        entry = self._current()
+        try:
+            return entry.derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in entry.derived:
+                with stage('aggregate'):
+                    entry.derived[name] = builder(entry.frame)
+            return entry.derived[name]
+
+    def refresh(self, warm=None):
+        """Load the file if it changed, off the request path.
+
+        The new version gets every derived structure the current one has,
+        and ``warm()``, if given, runs against it (anything it reads from
+        this cache sees the new version), all before it is swapped in.
+        Returns whether a new version was swapped in.
+        """
+        with self._refresh_lock:
+            key = self._file_key()
+            entry = self._entry
+            if entry is not None and entry.key == key:
+                return False
+            new_entry = self._load(entry, key)
+            if new_entry is entry:
+                return False
+            for name in (list(entry.derived) if entry is not None else ()):
+                if name not in new_entry.derived:
+                    new_entry.derived[name] = self._builders[name](new_entry.frame)
+            if warm is not None:
+                token = self._pending.set(new_entry)
+                try:
+                    warm()
+                finally:
+                    self._pending.reset(token)
+            self._entry = new_entry
+            self._count('refreshes')
+            return True
+
+    def _served_key(self):
+        entry = self._pending.get()
+        if entry is None and self.serve_stale:
+            entry = self._entry
+        return self._stat_key() if entry is None else entry.key
+
+    @staticmethod
+    def _version_of(key):
+        _, mtime_ns, size = key
+        return f'{mtime_ns:x}-{size:x}'
+
+    @property
+    def version(self):
+        entry = self._entry
+        return None if entry is None else self._version_of(entry.key)
+
+    def current_version(self):
+        """Version string of the data requests get, without loading it.
+
+        That is the data on disk, unless stale versions are being served.
+        """
+        return self._version_of(self._served_key())
+
+    def last_modified(self):
+        _, mtime_ns, _ = self._served_key()
+        return datetime.fromtimestamp(mtime_ns / 1e9, tz=timezone.utc)
+
+    def data_age(self):
+        """Seconds since the file behind the loaded version was modified."""
+        entry = self._entry
+        if entry is None:
+            return None
+        return max(time.time() - entry.key[1] / 1e9, 0.0)
+
+    def is_stale(self):
+        """Whether the file on disk is newer than the loaded version."""
+        entry = self._entry
+        return entry is not None and entry.key[1:] != self._stat_key()[1:]
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self._stats_lock:
+            counters = {counter: getattr(self, counter)
+                        for counter in ('hits', 'misses', 'reloads', 'appends', 'refreshes')}
+        return {
+            **counters,
+            'version': self.version,
+            'memory_bytes': memory_usage(self._entry.frame) if self._entry else None,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+
+
+dataset_cache = DatasetCache()
@@ -0,0 +1,56 @@
+from datetime import date
+from urllib.parse import urlencode
+
+# Query parameter -> column, for dimensions the bitmap index covers
+FILTER_PARAMS = {
+    'region': 'Region',
+    'segment': 'Segment',
+    'category': 'Category',
+    'sub_category': 'Sub-Category',
+    'state': 'State',
+    'ship_mode': 'Ship Mode',
+}
+
+DATE_PARAMS = ['from', 'to']
+
+# ?approx=1 answers from a stratified sample (see queries.sample)
+APPROX_PARAM = 'approx'
+
+
+def _iso_date(value):
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_filters(params):
+    """Filters from a request's query parameters.
+
+    Returns a JSON-serialisable dict mapping each filtered column to the
+    sorted values to keep, plus 'from'/'to' ISO dates (inclusive) when
+    given and 'approx': True for approximate answers. Parameters may
+    repeat; blank values and unparseable dates are ignored.
+    """
+    filters = {}
+    for param, column in FILTER_PARAMS.items():
+        values = sorted({value for value in params.getlist(param) if value})
+        if values:
+            filters[column] = values
+    for param in DATE_PARAMS:
+        value = _iso_date(params.get(param))
+        if value:
+            filters[param] = value
+    if params.get(APPROX_PARAM) in ('1', 'true', 'on'):
+        filters[APPROX_PARAM] = True
+    return filters
+
+
+def filter_query(filters):
+    """Query string that ``parse_filters`` turns back into ``filters``."""
+    params = [(param, filters[column]) for param, column in FILTER_PARAMS.items()
+              if column in filters]
+    params += [(param, filters[param]) for param in DATE_PARAMS if param in filters]
+    if filters.get(APPROX_PARAM):
+        params.append((APPROX_PARAM, 1))
+    return urlencode(params, doseq=True)
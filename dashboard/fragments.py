@@ -0,0 +1,27 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .queries import current_version
+
+
+def fragment_key(namespace, spec, version):
+    digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+    return f'{namespace}:{version}:{digest}'
+
+
+def cached_fragment(namespace, spec, render):
+    """Return ``render(spec)``, cached under the current data version.
+
+    Entries for older data versions are never read again and age out of
+    the cache through its own eviction (LRU for the locmem backend).
+    """
+    cache = caches[settings.FRAGMENT_CACHE_ALIAS]
+    key = fragment_key(namespace, spec, current_version())
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = render(spec)
+        cache.set(key, fragment, timeout=None)
+    return fragment
@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import tarfile
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+try:
+    import brotli
+except ImportError:  # optional; sizes are reported without it
+    brotli = None
+
+# Plotly's official partial bundle with exactly the trace types the
+# dashboard draws: scatter (line charts), bar and pie
+PACKAGE = 'plotly.js-basic-dist-min'
+BUNDLE = 'plotly-basic.min.js'
+
+# Node script printing the milliseconds V8 takes to parse and compile a
+# bundle, the part of the first render that grows with its size
+COMPILE_TIME = '''
+const fs = require('fs'), vm = require('vm');
+const source = fs.readFileSync(process.argv[1], 'utf8');
+const start = process.hrtime.bigint();
+new vm.Script(source, {filename: process.argv[1]});
+console.log(Number(process.hrtime.bigint() - start) / 1e6);
+'''
+
+
+def full_bundle():
+    # The full bundle shipped with the plotly Python package, when installed
+    try:
+        import plotly
+    except ImportError:
+        return None
+    path = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+    return path if os.path.exists(path) else None
+
+
+def compile_time(path):
+    if shutil.which('node') is None:
+        return None
+    timings = []
+    for _ in range(3):
+        result = subprocess.run(['node', '-e', COMPILE_TIME, path],
+                                capture_output=True, text=True, check=True)
+        timings.append(float(result.stdout))
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = ('Build the self-hosted Plotly bundle (scatter, bar and pie traces only) into the '
+            'dashboard static files, and compare its size and compile time with the full bundle.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plotly-version', default=settings.PLOTLY_JS_VERSION,
+                            help=f'{PACKAGE} version to fetch with npm (default: PLOTLY_JS_VERSION).')
+        parser.add_argument('--source',
+                            help=f'Use this {BUNDLE} or {PACKAGE} .tgz instead of fetching it '
+                                 '(for machines without registry access).')
+        parser.add_argument('--compare', default=full_bundle(),
+                            help='Bundle to compare against (default: the plotly package\'s full bundle).')
+
+    def handle(self, *args, **options):
+        output = os.path.join(settings.BASE_DIR, 'dashboard', 'static', settings.PLOTLY_JS_STATIC)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            source = options['source'] or self.fetch(options['plotly_version'], tmp)
+            if source.endswith('.tgz'):
+                source = self.extract(source, tmp)
+            shutil.copyfile(source, output)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {output}'))
+
+        rows = [('partial', output)]
+        if options['compare']:
+            rows.insert(0, ('full', options['compare']))
+        self.stdout.write(f"\n{'bundle':<10}{'raw':>12}{'gzip':>12}{'brotli':>12}{'compile':>12}")
+        for name, path in rows:
+            with open(path, 'rb') as f:
+                data = f.read()
+            compressed = len(brotli.compress(data)) if brotli is not None else None
+            milliseconds = compile_time(path)
+            self.stdout.write(
+                f'{name:<10}{len(data) / 1024:>9.0f} KB{len(gzip.compress(data)) / 1024:>9.0f} KB'
+                + (f'{compressed / 1024:>9.0f} KB' if compressed else f"{'-':>12}")
+                + (f'{milliseconds:>9.1f} ms' if milliseconds is not None else f"{'-':>12}"))
+        self.stdout.write('\nRun `python manage.py collectstatic` to hash and compress it into STATIC_ROOT.')
+
+    def fetch(self, version, directory):
+        if shutil.which('npm') is None:
+            raise CommandError(f'npm is not installed; download {PACKAGE}@{version} and pass --source.')
+        result = subprocess.run(
+            ['npm', 'pack', f'{PACKAGE}@{version}', '--pack-destination', directory, '--json'],
+            capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'npm pack {PACKAGE}@{version} failed:\n{result.stderr.strip()}\n'
+                               'Without registry access, pass --source.')
+        return os.path.join(directory, json.loads(result.stdout)[0]['filename'])
+
+    def extract(self, tarball, directory):
+        with tarfile.open(tarball) as archive:
+            member = archive.getmember(f'package/{BUNDLE}')
+            archive.extract(member, directory, filter='data')
+        return os.path.join(directory, 'package', BUNDLE)
@@ -0,0 +1,118 @@
+import time
+
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from analytics.streaming import iter_csv_chunks
+from dashboard.models import Customer, Geography, Product, Sale, SalesImport
+
+GEOGRAPHY_COLUMNS = ['Country', 'State', 'City', 'Postal Code', 'Region']
+
+
+def postal_codes(values):
+    # Read as floats because some are missing; stored as text without the '.0'
+    return values.map(lambda code: '' if pd.isna(code) else str(int(code)) if isinstance(code, float)
+                      else str(code))
+
+
+class Command(BaseCommand):
+    help = ('Load the sales CSV into the database (Sale and its Customer, Product and '
+            'Geography dimensions) for SALES_DATA_BACKEND = "sql".')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.SALES_DATA_PATH),
+                            help='CSV file to import (default: SALES_DATA_PATH).')
+        parser.add_argument('--chunksize', type=int, default=50_000,
+                            help='CSV rows read and committed per transaction.')
+        parser.add_argument('--batch-size', type=int, default=5_000,
+                            help='Rows per INSERT statement.')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete all sales first; otherwise rows whose Row ID '
+                                 'is already stored are skipped.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options['replace']:
+            with transaction.atomic():
+                for model in (Sale, Customer, Product, Geography):
+                    model.objects.all().delete()
+
+        # Natural key -> primary key of the dimension rows seen so far
+        customers = set(Customer.objects.values_list('pk', flat=True))
+        products = {(product_id, name): pk for pk, product_id, name
+                    in Product.objects.values_list('pk', 'product_id', 'name')}
+        geographies = {tuple(key[1:]): key[0] for key in Geography.objects.values_list(
+            'pk', 'country', 'state', 'city', 'postal_code', 'region')}
+
+        rows = 0
+        for chunk in iter_csv_chunks(options['source'], options['chunksize']):
+            chunk['Postal Code'] = postal_codes(chunk['Postal Code'])
+            with transaction.atomic():
+                self.add_dimensions(chunk, customers, products, geographies, options['batch_size'])
+                Sale.objects.bulk_create(self.sales(chunk, products, geographies),
+                                         batch_size=options['batch_size'], ignore_conflicts=True)
+            rows += len(chunk)
+            self.stdout.write(f'{rows:,} rows read')
+
+        if connection.vendor == 'sqlite':
+            # Table statistics, so the planner picks the covering indexes
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        SalesImport.objects.create(source=options['source'], rows=Sale.objects.count())
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {options['source']} in {elapsed:.2f}s; "
+            f'{Sale.objects.count():,} sales stored'
+        ))
+
+    def add_dimensions(self, chunk, customers, products, geographies, batch_size):
+        new = chunk.drop_duplicates('Customer ID')
+        new = new[~new['Customer ID'].isin(customers)]
+        Customer.objects.bulk_create([
+            Customer(customer_id=row['Customer ID'], name=row['Customer Name'], segment=row['Segment'])
+            for _, row in new.iterrows()
+        ], batch_size=batch_size)
+        customers.update(new['Customer ID'])
+
+        new = chunk.drop_duplicates(['Product ID', 'Product Name'])
+        created = Product.objects.bulk_create([
+            Product(product_id=row['Product ID'], name=row['Product Name'],
+                    category=row['Category'], sub_category=row['Sub-Category'])
+            for _, row in new.iterrows() if (row['Product ID'], row['Product Name']) not in products
+        ], batch_size=batch_size)
+        products.update({(product.product_id, product.name): product.pk for product in created})
+
+        new = chunk.drop_duplicates(GEOGRAPHY_COLUMNS)
+        created = Geography.objects.bulk_create([
+            Geography(country=row['Country'], state=row['State'], city=row['City'],
+                      postal_code=row['Postal Code'], region=row['Region'])
+            for _, row in new.iterrows() if tuple(row[GEOGRAPHY_COLUMNS]) not in geographies
+        ], batch_size=batch_size)
+        geographies.update({
+            (geography.country, geography.state, geography.city, geography.postal_code,
+             geography.region): geography.pk
+            for geography in created
+        })
+
+    def sales(self, chunk, products, geographies):
+        product_ids = [products[key] for key in zip(chunk['Product ID'], chunk['Product Name'])]
+        geography_ids = [geographies[key] for key in zip(*(chunk[column] for column in GEOGRAPHY_COLUMNS))]
+        for row, product_id, geography_id in zip(chunk.itertuples(index=False, name=None),
+                                                 product_ids, geography_ids):
+            row = dict(zip(chunk.columns, row))
+            yield Sale(
+                row_id=row['Row ID'],
+                order_id=row['Order ID'],
+                order_date=row['Order Date'].date(),
+                ship_date=row['Ship Date'].date(),
+                ship_mode=row['Ship Mode'],
+                customer_id=row['Customer ID'],
+                product_id=product_id,
+                geography_id=geography_id,
+                segment=row['Segment'],
+                region=row['Region'],
+                category=row['Category'],
+                sales=row['Sales'],
+            )
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.dataset import DatasetCache
+
+
+class Command(BaseCommand):
+    help = ('Publish the sales data to SHARED_DATASET_DIR for the server processes to attach to, '
+            'optionally watching the CSV and publishing every change.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=str(settings.SALES_DATA_PATH),
+                            help='CSV file to publish (default: SALES_DATA_PATH).')
+        parser.add_argument('--output', default=settings.SHARED_DATASET_DIR,
+                            help='Generations directory (default: SHARED_DATASET_DIR).')
+        parser.add_argument('--watch', type=float, metavar='SECONDS',
+                            help='Keep running, checking the CSV at this interval.')
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError('Set SHARED_DATASET_DIR or pass --output.')
+        cache = DatasetCache(options['source'], shared_root=options['output'])
+        published = None
+        while True:
+            start = time.perf_counter()
+            generation = cache.generation()
+            if generation != published:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(self.style.SUCCESS(
+                    f"Serving {options['source']} from {generation} ({elapsed:.2f}s)"
+                ))
+                published = generation
+            if not options['watch']:
+                break
+            time.sleep(options['watch'])
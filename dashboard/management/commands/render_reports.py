@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.reports import brotli, render_reports
+
+
+class Command(BaseCommand):
+    help = ('Render the unfiltered dashboard and insights pages into REPORTS_ROOT, '
+            'with compressed variants, optionally re-rendering whenever the data changes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.REPORTS_ROOT,
+                            help='Directory to render into (default: REPORTS_ROOT).')
+        parser.add_argument('--force', action='store_true',
+                            help='Render even if the pages for the current data exist.')
+        parser.add_argument('--watch', type=float, metavar='SECONDS',
+                            help='Keep running, checking for new data at this interval.')
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError('Set REPORTS_ROOT or pass --output.')
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed; writing gzip variants only.'))
+        force = options['force']
+        while True:
+            started, start = time.time(), time.perf_counter()
+            manifest = render_reports(options['output'], force=force)
+            if manifest['rendered_at'] >= started:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(self.style.SUCCESS(
+                    f"Rendered {', '.join(manifest['pages'].values())} "
+                    f"for version {manifest['version']} ({elapsed:.2f}s)"
+                ))
+            elif not options['watch']:
+                self.stdout.write(f"Pages for version {manifest['version']} are up to date.")
+            force = False
+            if not options['watch']:
+                break
+            time.sleep(options['watch'])
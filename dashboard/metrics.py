@@ -0,0 +1,158 @@
+"""In-process request metrics, exported in the Prometheus text format.
+
+Each worker process keeps its own registry, so with several gunicorn
+workers every scrape sees the process that answered it.
+"""
+import threading
+import time
+
+from django.http import HttpResponse
+
+from .dataset import dataset_cache
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Seconds; Prometheus client defaults
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Background data refreshes take seconds to minutes
+REFRESH_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        # Bucket counts are cumulative, as Prometheus expects
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}       # view -> Histogram of total latency
+        self.stages = {}         # (view, stage) -> Histogram
+        self.peak_memory = {}    # view -> largest traced peak, bytes
+        self.refreshes = Histogram(REFRESH_BUCKETS)
+        self.refresh_failures = 0
+        self.last_refresh = None  # Unix time of the last successful refresh check
+
+    def observe(self, view, total, stages, peak_memory=None):
+        with self._lock:
+            self.requests.setdefault(view, Histogram()).observe(total)
+            for name, seconds in stages.items():
+                self.stages.setdefault((view, name), Histogram()).observe(seconds)
+            if peak_memory is not None:
+                self.peak_memory[view] = max(peak_memory, self.peak_memory.get(view, 0))
+
+    def observe_refresh(self, seconds=None, failed=False):
+        """Record a refresh check; ``seconds`` is set when it loaded new data."""
+        with self._lock:
+            if failed:
+                self.refresh_failures += 1
+                return
+            if seconds is not None:
+                self.refreshes.observe(seconds)
+            self.last_refresh = time.time()
+
+    def clear(self):
+        with self._lock:
+            self.requests.clear()
+            self.stages.clear()
+            self.peak_memory.clear()
+            self.refreshes = Histogram(REFRESH_BUCKETS)
+            self.refresh_failures = 0
+            self.last_refresh = None
+
+
+registry = Registry()
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def _series(name, **labels):
+    return f'{name}{{{_labels(**labels)}}}' if labels else name
+
+
+def _histogram_lines(name, histograms):
+    lines = [f'# TYPE {name} histogram']
+    for labels, histogram in histograms:
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{_series(name + "_bucket", **labels, le=repr(bound))} {count}')
+        lines.append(f'{_series(name + "_bucket", **labels, le="+Inf")} {histogram.count}')
+        lines.append(f'{_series(name + "_sum", **labels)} {histogram.sum}')
+        lines.append(f'{_series(name + "_count", **labels)} {histogram.count}')
+    return lines
+
+
+def render_metrics(registry=registry):
+    with registry._lock:
+        requests = sorted(registry.requests.items())
+        stages = sorted(registry.stages.items())
+        peak_memory = sorted(registry.peak_memory.items())
+        refreshes = registry.refreshes
+        refresh_failures = registry.refresh_failures
+        last_refresh = registry.last_refresh
+
+    lines = ['# HELP dashboard_request_duration_seconds Request latency per view.']
+    lines += _histogram_lines('dashboard_request_duration_seconds',
+                              [({'view': view}, histogram) for view, histogram in requests])
+    lines.append('# HELP dashboard_stage_duration_seconds Time spent per named stage of a view.')
+    lines += _histogram_lines('dashboard_stage_duration_seconds',
+                              [({'view': view, 'stage': name}, histogram)
+                               for (view, name), histogram in stages])
+    if peak_memory:
+        lines.append('# HELP dashboard_request_peak_memory_bytes Largest Python allocation peak seen during one request.')
+        lines.append('# TYPE dashboard_request_peak_memory_bytes gauge')
+        lines += [f'dashboard_request_peak_memory_bytes{{{_labels(view=view)}}} {peak}'
+                  for view, peak in peak_memory]
+
+    stats = dataset_cache.stats()
+    lines.append('# HELP dashboard_dataset_cache_total Dataset cache lookups by outcome.')
+    lines.append('# TYPE dashboard_dataset_cache_total counter')
+    for outcome in ('hits', 'misses', 'reloads', 'appends', 'refreshes'):
+        lines.append(f'dashboard_dataset_cache_total{{{_labels(outcome=outcome)}}} {stats[outcome]}')
+
+    age = dataset_cache.data_age()
+    if age is not None:
+        lines.append('# HELP dashboard_data_age_seconds Time since the file behind the served data was modified.')
+        lines.append('# TYPE dashboard_data_age_seconds gauge')
+        lines.append(f'dashboard_data_age_seconds {age:.3f}')
+        lines.append('# HELP dashboard_data_stale Whether the data file is newer than the served data.')
+        lines.append('# TYPE dashboard_data_stale gauge')
+        lines.append(f'dashboard_data_stale {int(dataset_cache.is_stale())}')
+    if refreshes.count or refresh_failures or last_refresh is not None:
+        lines.append('# HELP dashboard_data_refresh_duration_seconds Background refreshes that loaded new data.')
+        lines += _histogram_lines('dashboard_data_refresh_duration_seconds', [({}, refreshes)])
+        lines.append('# HELP dashboard_data_refresh_failures_total Background refreshes that raised.')
+        lines.append('# TYPE dashboard_data_refresh_failures_total counter')
+        lines.append(f'dashboard_data_refresh_failures_total {refresh_failures}')
+    if last_refresh is not None:
+        lines.append('# HELP dashboard_data_last_refresh_timestamp_seconds When the data was last checked successfully.')
+        lines.append('# TYPE dashboard_data_last_refresh_timestamp_seconds gauge')
+        lines.append(f'dashboard_data_last_refresh_timestamp_seconds {last_refresh:.3f}')
+
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        lines.append('# HELP process_max_resident_memory_bytes Peak resident set size of this process.')
+        lines.append('# TYPE process_max_resident_memory_bytes gauge')
+        lines.append(f'process_max_resident_memory_bytes {max_rss}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics(request):
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,198 @@
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError
+
+from .metrics import registry
+from .queries import current_version
+from .reports import MANIFEST, REPORT_PAGES, read_manifest
+from .timing import start_timer, stop_timer
+
+PROFILE_LINES = 60
+
+
+class RequestTimingMiddleware:
+    """Time each request and its named stages (see ``dashboard.timing``).
+
+    Adds a ``Server-Timing`` header and records the timings, per view, in
+    the metrics registry served at ``/metrics``. With
+    ``REQUEST_METRICS_TRACE_MEMORY`` on, the peak of Python allocations
+    during the request is recorded too; tracemalloc is process-wide, so
+    concurrent requests in one worker inflate each other's peaks.
+
+    With ``REQUEST_PROFILING`` on, ``?profile=1`` returns a cProfile report
+    of the request instead of its response (``?profile=pyinstrument`` uses
+    pyinstrument when it is installed).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.trace_memory = getattr(settings, 'REQUEST_METRICS_TRACE_MEMORY', False)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def profile_mode(self, request):
+        mode = request.GET.get('profile')
+        if mode and getattr(settings, 'REQUEST_PROFILING', settings.DEBUG):
+            return mode
+        return None
+
+    def start(self):
+        timer, token = start_timer()
+        baseline = None
+        if self.trace_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        return timer, token, baseline
+
+    def finish(self, request, response, timer, baseline):
+        total = timer.total()
+        peak = None
+        if self.trace_memory:
+            peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        registry.observe(view, total, timer.durations, peak)
+        response['Server-Timing'] = timer.server_timing(total)
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        mode = self.profile_mode(request)
+        if mode:
+            return self.profile(request, mode)
+
+        timer, token, baseline = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_timer(token)
+        return self.finish(request, response, timer, baseline)
+
+    async def __acall__(self, request):
+        mode = self.profile_mode(request)
+        if mode:
+            # Profiles whatever runs on the event loop thread meanwhile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.get_response(request)
+            finally:
+                profiler.disable()
+            return self.profile_report(profiler)
+
+        timer, token, baseline = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timer(token)
+        return self.finish(request, response, timer, baseline)
+
+    def profile(self, request, mode):
+        if mode == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                pass
+            else:
+                profiler = Profiler()
+                profiler.start()
+                self.get_response(request)
+                profiler.stop()
+                return HttpResponse(profiler.output_html())
+
+        profiler = cProfile.Profile()
+        profiler.runcall(self.get_response, request)
+        return self.profile_report(profiler)
+
+    def profile_report(self, profiler):
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(PROFILE_LINES)
+        return HttpResponse(report.getvalue(), content_type='text/plain; charset=utf-8')
+
+
+class StaticReportMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise, also serving the pre-rendered report pages (see ``dashboard.reports``).
+
+    A plain GET of ``/`` or ``/insights/`` gets the page rendered for the
+    data version currently served, gzip- or brotli-encoded as the client
+    accepts, with an ETag and ``Cache-Control: no-cache`` so revisits are
+    304s until the data changes. The rendered files are also served under
+    ``REPORTS_URL`` by their hashed names, cached for a year. Without a
+    current rendering, requests go on to the views.
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        # Set first: WhiteNoise builds the headers of its files on init
+        self.reports_root = getattr(settings, 'REPORTS_ROOT', None)
+        self.reports_url = getattr(settings, 'REPORTS_URL', '/reports/')
+        self._manifest = (None, None)  # (mtime_ns, manifest)
+        self._reports = {}  # (url, filename) -> StaticFile
+        super().__init__(get_response, settings)
+
+    def __call__(self, request):
+        static_file = self.find_report(request) if self.reports_root else None
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return super().__call__(request)
+
+    def manifest(self):
+        # Re-read only when render_reports has replaced it
+        try:
+            mtime = os.stat(os.path.join(self.reports_root, MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if self._manifest[0] != mtime:
+            self._manifest = (mtime, read_manifest(self.reports_root))
+            self._reports.clear()
+        return self._manifest[1]
+
+    def find_report(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        path = request.path_info
+        if path in REPORT_PAGES and not request.GET:
+            manifest = self.manifest()
+            if manifest is None or manifest['version'] != current_version():
+                return None
+            return self.report_file(manifest['pages'][path], path)
+        if path.startswith(self.reports_url):
+            filename = path[len(self.reports_url):]
+            manifest = self.manifest()
+            entries = [manifest] + manifest['previous'] if manifest else []
+            if any(filename in entry['pages'].values() for entry in entries):
+                return self.report_file(filename, path)
+        return None
+
+    def report_file(self, filename, url):
+        static_file = self._reports.get((url, filename))
+        if static_file is None:
+            try:
+                static_file = self.get_static_file(os.path.join(self.reports_root, filename), url)
+            except MissingFileError:
+                return None
+            self._reports[(url, filename)] = static_file
+        return static_file
+
+    def add_cache_headers(self, headers, path, url):
+        if url in REPORT_PAGES:
+            headers['Cache-Control'] = 'no-cache'
+        elif url.startswith(self.reports_url):
+            headers['Cache-Control'] = f'max-age={self.FOREVER}, public, immutable'
+        else:
+            super().add_cache_headers(headers, path, url)
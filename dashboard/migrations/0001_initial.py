@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('customer_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=128)),
+                ('segment', models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('rows', models.BigIntegerField()),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Geography',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=64)),
+                ('city', models.CharField(max_length=64)),
+                ('state', models.CharField(max_length=64)),
+                ('postal_code', models.CharField(blank=True, max_length=16)),
+                ('region', models.CharField(max_length=32)),
+            ],
+            options={
+                'verbose_name_plural': 'geographies',
+                'constraints': [models.UniqueConstraint(fields=('country', 'state', 'city', 'postal_code', 'region'), name='geography_natural_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.CharField(db_index=True, max_length=32)),
+                ('name', models.CharField(max_length=255)),
+                ('category', models.CharField(max_length=32)),
+                ('sub_category', models.CharField(max_length=32)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product_id', 'name'), name='product_natural_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Sale',
+            fields=[
+                ('row_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('order_id', models.CharField(max_length=32)),
+                ('order_date', models.DateField()),
+                ('ship_date', models.DateField()),
+                ('ship_mode', models.CharField(max_length=32)),
+                ('segment', models.CharField(max_length=32)),
+                ('region', models.CharField(max_length=32)),
+                ('category', models.CharField(max_length=32)),
+                ('sales', models.FloatField()),
+                ('customer', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='dashboard.customer')),
+                ('geography', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='dashboard.geography')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='dashboard.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['order_date', 'sales'], name='sale_order_date'), models.Index(fields=['region', 'category', 'sales'], name='sale_region_category'), models.Index(fields=['customer', 'order_date', 'sales'], name='sale_customer')],
+            },
+        ),
+    ]
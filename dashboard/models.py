@@ -1,3 +1,87 @@
 from django.db import models
 
-# Create your models here.
+# Order lines in a star schema: one Sale per CSV row, with the customer,
+# product and address split out into dimension tables. Region, Category
+# and Segment are copied onto Sale so the common filters and groupings
+# are answered from Sale's own indexes, without joins.
+
+
+class Customer(models.Model):
+    customer_id = models.CharField(max_length=32, primary_key=True)
+    name = models.CharField(max_length=128)
+    segment = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f'{self.name} ({self.customer_id})'
+
+
+class Product(models.Model):
+    # A Product ID is reused for differently named products in the data
+    product_id = models.CharField(max_length=32, db_index=True)
+    name = models.CharField(max_length=255)
+    category = models.CharField(max_length=32)
+    sub_category = models.CharField(max_length=32)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product_id', 'name'], name='product_natural_key'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Geography(models.Model):
+    country = models.CharField(max_length=64)
+    city = models.CharField(max_length=64)
+    state = models.CharField(max_length=64)
+    postal_code = models.CharField(max_length=16, blank=True)
+    region = models.CharField(max_length=32)
+
+    class Meta:
+        verbose_name_plural = 'geographies'
+        constraints = [
+            models.UniqueConstraint(fields=['country', 'state', 'city', 'postal_code', 'region'],
+                                    name='geography_natural_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.city}, {self.state}'
+
+
+class Sale(models.Model):
+    row_id = models.BigIntegerField(primary_key=True)
+    order_id = models.CharField(max_length=32)
+    order_date = models.DateField()
+    ship_date = models.DateField()
+    ship_mode = models.CharField(max_length=32)
+    # Indexed below, together with order_date
+    customer = models.ForeignKey(Customer, on_delete=models.PROTECT, db_index=False)
+    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    geography = models.ForeignKey(Geography, on_delete=models.PROTECT)
+    segment = models.CharField(max_length=32)
+    region = models.CharField(max_length=32)
+    category = models.CharField(max_length=32)
+    sales = models.FloatField()
+
+    class Meta:
+        # Each index ends with sales, so sums grouped or filtered by its
+        # leading columns are read from the index alone
+        indexes = [
+            models.Index(fields=['order_date', 'sales'], name='sale_order_date'),
+            models.Index(fields=['region', 'category', 'sales'], name='sale_region_category'),
+            models.Index(fields=['customer', 'order_date', 'sales'], name='sale_customer'),
+        ]
+
+    def __str__(self):
+        return f'{self.order_id} #{self.row_id}'
+
+
+class SalesImport(models.Model):
+    """One run of ``manage.py import_sales``; the latest is the data version."""
+    source = models.CharField(max_length=255)
+    rows = models.BigIntegerField()
+    imported_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.source} ({self.rows:,} rows, {self.imported_at:%Y-%m-%d %H:%M})'
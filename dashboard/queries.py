@@ -0,0 +1,324 @@
+from django.conf import settings
+
+from analytics.bitmaps import BITMAP_DIMENSIONS, BitmapIndex, grouped_sales
+from analytics.cube import CUBE_DIMENSIONS, build_cube, merge_cubes, rollup, totals
+from analytics.lazy import lazy_import
+from analytics.profiles import PROFILE_KEYS, build_profiles, merge_profiles
+from analytics.sampling import sample_of
+from analytics.timeindex import (TIME_DIMENSIONS, TimeIndex, date_order, extend_date_order,
+                                 rows_between)
+from . import store
+from .dataset import dataset_cache
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+def sql_backend():
+    # SALES_DATA_BACKEND = 'sql' answers the functions below from the
+    # database (dashboard.store) instead of the in-memory frame
+    return getattr(settings, 'SALES_DATA_BACKEND', 'pandas') == 'sql'
+
+
+def current_version():
+    """Version of the data being served, for ETags and fragment keys."""
+    return store.version() if sql_backend() else dataset_cache.current_version()
+
+
+def last_modified():
+    return store.last_modified() if sql_backend() else dataset_cache.last_modified()
+
+
+def load_data():
+    # Shared, read-only frame; reloaded only when train.csv changes
+    return dataset_cache.get()
+
+
+def load_cube():
+    return dataset_cache.derived(
+        'cube', build_cube,
+        update=lambda cube, rows: merge_cubes(cube, build_cube(rows)))
+
+
+def entity_sales(column):
+    # Per-entity totals for dimensions too fine-grained for the cube
+    def build(df):
+        return df.groupby(column, observed=True)['Sales'].sum()
+
+    def update(sales, rows):
+        return sales.add(build(rows), fill_value=0)
+
+    return dataset_cache.derived(f'sales_by:{column}', build, update=update)
+
+
+def unique_values(column):
+    return dataset_cache.derived(
+        f'unique:{column}',
+        lambda df: set(df[column].dropna().unique()),
+        update=lambda values, rows: values | set(rows[column].dropna().unique()))
+
+
+def unique_count(column):
+    return len(unique_values(column))
+
+
+def profiles(key):
+    """Per-entity profile index for one of ``PROFILE_KEYS``."""
+    label = PROFILE_KEYS[key]
+    return dataset_cache.derived(
+        f'profiles:{key}',
+        lambda df: build_profiles(df, key, label),
+        update=lambda index, rows: merge_profiles(index, build_profiles(rows, key, label)))
+
+
+def row_positions(key):
+    # Entity -> positions of its rows in the frame, for drill-down pages
+    def build(df):
+        return df.groupby(key, observed=True).indices
+
+    def update(positions, rows):
+        positions = dict(positions)
+        for entity, new in build(rows).items():
+            new = rows.index.to_numpy()[new]
+            old = positions.get(entity)
+            positions[entity] = new if old is None else np.concatenate([old, new])
+        return positions
+
+    return dataset_cache.derived(f'rows_by:{key}', build, update=update)
+
+
+def entity_rows(key, entity):
+    positions = row_positions(key).get(entity)
+    if positions is None:
+        return None
+    return load_data().iloc[positions]
+
+
+def sales_by(column):
+    """Sales totals per value of ``column``, from the cube when possible."""
+    if column in CUBE_DIMENSIONS:
+        return rollup(load_cube(), column)['sum'].rename('Sales')
+    return entity_sales(column)
+
+
+def bitmap_index():
+    return dataset_cache.derived(
+        'bitmaps', BitmapIndex.build,
+        update=lambda index, rows: index.append(rows))
+
+
+# Up to this share of the rows, a date window is cheaper to select by
+# gathering its rows than with full-length masks
+WINDOW_SHARE = 0.125
+
+
+def selection(filters):
+    """The rows matching ``filters`` (see filters.parse_filters).
+
+    A boolean mask or, for a narrow date range, the positions of the
+    matching rows in frame order: the range is looked up in the date
+    index and the other filters are only checked on the rows inside it,
+    so the cost follows the window rather than the whole history.
+    """
+    df = load_data()
+    dimensions = {column: values for column, values in filters.items()
+                  if column in BITMAP_DIMENSIONS}
+    in_range = None
+    if 'from' in filters or 'to' in filters:
+        in_range = rows_between(date_index(), filters.get('from'), filters.get('to'))
+        if len(in_range) <= WINDOW_SHARE * len(df):
+            positions = np.sort(in_range)
+            if dimensions:
+                positions = positions[bitmap_index().contains(dimensions, positions)]
+            return positions
+    mask = bitmap_index().mask(dimensions)
+    if mask is None:
+        mask = np.ones(len(df), dtype=bool)
+    if in_range is not None:
+        window = np.zeros(len(df), dtype=bool)
+        window[in_range] = True
+        mask &= window
+    return mask
+
+
+def time_index():
+    return dataset_cache.derived(
+        'timeline', TimeIndex.build,
+        update=lambda index, rows: index.append(rows))
+
+
+def date_index():
+    # Row positions sorted by Order Date, for date-range selections
+    return dataset_cache.derived('date_order', date_order, update=extend_date_order)
+
+
+def filtered_timeline(filters):
+    """A time index and the (dimension, value) slice of it answering ``filters``.
+
+    Date-only filters, or a single Region or Category value, are read from
+    the shared index; any other combination gets an index built from the
+    rows the bitmap index selects.
+    """
+    if sql_backend():
+        return store.time_index(filters), {}
+    dimensions = {column: values for column, values in filters.items()
+                  if column in BITMAP_DIMENSIONS}
+    if not dimensions:
+        return time_index(), {}
+    if len(dimensions) == 1:
+        (column, values), = dimensions.items()
+        if column in TIME_DIMENSIONS and len(values) == 1:
+            return time_index(), {'dimension': column, 'value': values[0]}
+    mask = bitmap_index().mask(dimensions)
+    # Over the whole dataset's days, as the shared index is, even when
+    # the selected rows start later or end earlier
+    everything = time_index()
+    selected = TimeIndex.build(load_data()[['Order Date', 'Sales']][mask], dimensions=[])
+    return selected.spanning(everything.first_day, everything.last_day), {}
+
+
+def trend(frequency, filters):
+    index, selected = filtered_timeline(filters)
+    return index.resample(frequency, filters.get('from'), filters.get('to'), **selected)
+
+
+def period_comparison(filters):
+    index, selected = filtered_timeline(filters)
+    return index.compare(filters.get('from'), filters.get('to'), **selected)
+
+
+def sample():
+    """The stratified sample approximate answers come from (see analytics.sampling).
+
+    Sized by SALES_SAMPLE_ERROR and drawn in memory from the frame being
+    served, once per data version; requests never write samples to disk.
+    """
+    error = getattr(settings, 'SALES_SAMPLE_ERROR', 0.02)
+    return dataset_cache.derived(f'sample:{error}', lambda df: sample_of(df, error))
+
+
+def sample_mask(found, filters):
+    # The sampled rows matching ``filters``, or None for all of them
+    frame = found.frame
+    keep = [frame[column].isin(values).to_numpy() for column, values in filters.items()
+            if column in BITMAP_DIMENSIONS]
+    if 'from' in filters:
+        keep.append(frame['Order Date'].to_numpy() >= np.datetime64(filters['from']))
+    if 'to' in filters:
+        keep.append(frame['Order Date'].to_numpy() <= np.datetime64(filters['to']))
+    return np.logical_and.reduce(keep) if keep else None
+
+
+def approx_table(column, filters):
+    found = sample()
+    return found.estimate(column, sample_mask(found, filters))
+
+
+def approx_totals(filters):
+    found = sample()
+    estimate = found.estimate(mask=sample_mask(found, filters))
+    row = estimate.iloc[0] if len(estimate) else None
+    fields = ['sum', 'sum_ci', 'count', 'count_ci', 'mean', 'mean_ci']
+    return {
+        **{field: float(row[field]) if row is not None else 0.0 for field in fields},
+        # Distinct counts do not scale up from a sample
+        'unique_customers': None,
+        'sample_rows': found.rows,
+        'confidence': found.confidence,
+    }
+
+
+def sales_table(column, filters=None):
+    """Sum, count and mean of Sales per value of ``column``, optionally filtered.
+
+    With ``approx`` in the filters, estimates from the stratified sample
+    with their confidence intervals and shares (see ``approx_table``).
+    """
+    if sql_backend():
+        return store.sales_table(column, filters)
+    if filters and filters.get('approx'):
+        return approx_table(column, filters)
+    if not filters and column in CUBE_DIMENSIONS:
+        return rollup(load_cube(), column)
+    return grouped_sales(load_data(), column, selection(filters or {}))
+
+
+def overall_totals(filters=None):
+    """Sum, count and mean of Sales and the unique customers, optionally filtered."""
+    if sql_backend():
+        return store.totals(filters)
+    if filters and filters.get('approx'):
+        return approx_totals(filters)
+    if filters:
+        return filtered_totals(filters)
+    return {**totals(load_cube()), 'unique_customers': unique_count('Customer Name')}
+
+
+def top_sales(column, n, filters=None):
+    """The ``n`` largest Sales totals per value of ``column``."""
+    if filters and filters.get('approx'):
+        # Rankings stay exact: a sample misses most of the long tail
+        filters = {key: value for key, value in filters.items() if key != 'approx'}
+    if sql_backend():
+        return store.top_sales(column, n, filters)
+    if filters:
+        return sales_table(column, filters)['sum'].nlargest(n)
+    if PROFILE_KEYS.get(column):
+        return profiles(column)['total_sales'].nlargest(n)
+    return sales_by(column).nlargest(n)
+
+
+def entity_names(key, ids):
+    """Display names of the ``ids`` of one of ``PROFILE_KEYS``."""
+    if sql_backend():
+        return store.entity_names(key, ids)
+    return profiles(key)['name'].reindex(ids)
+
+
+def filter_options(column):
+    if sql_backend():
+        return store.filter_options(column)
+    return bitmap_index().values(column)
+
+
+def last_order_day():
+    if sql_backend():
+        return store.last_order_day()
+    return time_index().last_day
+
+
+def customer_detail(customer_id):
+    """(profile, order lines) of a customer, or None for an unknown one."""
+    if sql_backend():
+        return store.customer_detail(customer_id)
+    try:
+        profile = profiles('Customer ID').loc[customer_id]
+    except KeyError:
+        return None
+    return profile, entity_rows('Customer ID', customer_id)
+
+
+def filtered_totals(filters):
+    df = load_data()
+    rows = selection(filters)
+    sales = df['Sales'].to_numpy()[rows]
+    count = len(sales)
+    total = float(sales.sum())
+    return {
+        'sum': total,
+        'count': count,
+        'mean': total / count if count else 0.0,
+        'unique_customers': int(df['Customer Name'].iloc[rows].nunique()),
+    }
+
+
+def sales_summary(table):
+    # Same shape as df.groupby(dimension).agg({'Sales': ['sum', 'mean', 'count']}),
+    # plus confidence intervals and shares for approximate tables
+    if 'sum_ci' in table.columns:
+        summary = table[['sum', 'sum_ci', 'mean', 'mean_ci', 'count', 'share', 'share_ci']]
+        summary = summary.round({'count': 0, 'share': 4, 'share_ci': 4}).astype({'count': int})
+    else:
+        summary = table[['sum', 'mean', 'count']]
+    summary.columns = pd.MultiIndex.from_product([['Sales'], summary.columns])
+    return summary.round(2)
@@ -0,0 +1,107 @@
+"""Background refresh of the dataset cache (stale-while-revalidate).
+
+A daemon thread checks ``SALES_DATA_PATH`` every ``DATA_REFRESH_INTERVAL``
+seconds. When the file changed it loads the new version, rebuilds the
+derived structures in use and warms the unfiltered dashboard and insights
+sections and chart payloads, while requests keep getting the previous
+version. The new version is then swapped in as one reference.
+
+Refresh durations, failures and the age of the served data are exported
+at ``/metrics`` (see ``dashboard.metrics``).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .api import chart_payload
+from .dataset import dataset_cache
+from .metrics import registry
+from .queries import sql_backend
+from .views import DASHBOARD_SECTIONS, INSIGHTS_SECTIONS, chart_links
+
+logger = logging.getLogger(__name__)
+
+
+def warm_pages():
+    """Build what an unfiltered dashboard or insights request would."""
+    filters = {}
+    for build, _ in DASHBOARD_SECTIONS + INSIGHTS_SECTIONS:
+        build(filters)
+    for chart in chart_links(filters):
+        chart_payload(*chart['api'], filters)
+
+
+class DataRefresher(threading.Thread):
+    def __init__(self, cache=dataset_cache, interval=60.0, warm=warm_pages):
+        super().__init__(name='dataset-refresher', daemon=True)
+        self.cache = cache
+        self.interval = interval
+        self.warm = warm
+        self._stopped = threading.Event()
+
+    def refresh(self):
+        """Check the file once; returns whether a new version was swapped in."""
+        started = time.perf_counter()
+        try:
+            refreshed = self.cache.refresh(warm=self.warm)
+        except Exception:
+            logger.exception('Refreshing %s failed; still serving version %s',
+                             self.cache.path, self.cache.version)
+            registry.observe_refresh(failed=True)
+            return False
+        seconds = time.perf_counter() - started
+        registry.observe_refresh(seconds if refreshed else None)
+        if refreshed:
+            logger.info('Refreshed %s to version %s in %.2fs',
+                        self.cache.path, self.cache.version, seconds)
+        return refreshed
+
+    def run(self):
+        # The first pass loads the data before any request asks for it
+        self.refresh()
+        while not self._stopped.wait(self.interval):
+            self.refresh()
+
+    def stop(self):
+        self._stopped.set()
+
+
+def preload():
+    """Load and warm the data in this process, for workers forked from it.
+
+    Used with gunicorn's ``preload_app`` (see ``gunicorn.conf.py``): the
+    workers inherit the loaded data and warmed structures copy-on-write,
+    and each one starts its own refresher after the fork.
+    """
+    # Deferred on import (see analytics.lazy); imported here so the workers
+    # inherit them instead of each importing them on its first request
+    import pandas  # noqa: F401
+    if sql_backend():
+        return
+    started = time.perf_counter()
+    dataset_cache.refresh(warm=warm_pages)
+    logger.info('Preloaded %s (version %s) in %.2fs',
+                dataset_cache.path, dataset_cache.version, time.perf_counter() - started)
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_refresher():
+    """Start the refresher if ``DATA_REFRESH_INTERVAL`` is set; idempotent.
+
+    Not started with the SQL backend, which reads the database directly.
+    """
+    global _refresher
+    interval = getattr(settings, 'DATA_REFRESH_INTERVAL', None)
+    if not interval or sql_backend():
+        return None
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            dataset_cache.serve_stale = True
+            _refresher = DataRefresher(interval=interval)
+            _refresher.start()
+        return _refresher
@@ -0,0 +1,132 @@
+"""Pre-rendered report pages.
+
+The unfiltered dashboard and insights pages are the same for every
+visitor until the data changes, so ``render_reports()`` (``manage.py
+render_reports``) renders them once per data version into
+``REPORTS_ROOT`` as ``<page>.<version hash>.html``, with gzip and, when
+the ``brotli`` package is installed, brotli variants next to them.
+``manifest.json`` records the data version and the current file of each
+page.
+
+``dashboard.middleware.StaticReportMiddleware`` serves those files
+through WhiteNoise while the manifest's version is the one being served;
+filtered requests, and any request once the data has moved on, fall
+through to the views.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+
+from django.template.loader import render_to_string
+
+from .api import chart_payload
+from .queries import current_version
+from .views import DASHBOARD_SECTIONS, INSIGHTS_SECTIONS, chart_links
+
+try:
+    import brotli
+except ImportError:  # optional; only gzip variants are written without it
+    brotli = None
+
+MANIFEST = 'manifest.json'
+
+# Rendered files of superseded versions kept for responses still in flight
+KEEP_PREVIOUS = 1
+
+
+def dashboard_context():
+    # Chart data is embedded, as the async views do, so the page needs no API call
+    context = {'charts': [{**chart, 'payload': chart_payload(*chart['api'], {})}
+                          for chart in chart_links({})]}
+    for build, _ in DASHBOARD_SECTIONS:
+        context.update(build({}))
+    return context
+
+
+def insights_context():
+    context = {}
+    for build, _ in INSIGHTS_SECTIONS:
+        context.update(build({}))
+    return context
+
+
+# Page URL -> (file name stem, template, context)
+REPORT_PAGES = {
+    '/': ('dashboard', 'dashboard/dashboard.html', dashboard_context),
+    '/insights/': ('insights', 'dashboard/insights.html', insights_context),
+}
+
+# <page>.<version hash>.html, as render_reports() names them, and its
+# precompressed copies
+RENDERED = re.compile(r'((?:%s)\.[0-9a-f]{12}\.html)(?:\.gz|\.br)?' % '|'.join(
+    re.escape(name) for name, _, _ in REPORT_PAGES.values()))
+
+
+def _write(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def render_reports(root, force=False):
+    """Render every report page for the current data version; returns the manifest.
+
+    Pages already rendered for this version are kept unless ``force``.
+    """
+    os.makedirs(root, exist_ok=True)
+    # Read before rendering: should the data change meanwhile, the pages
+    # are labelled with the older version and never served as current
+    version = current_version()
+    previous = read_manifest(root)
+    if not force and previous and previous['version'] == version and all(
+            os.path.exists(os.path.join(root, filename)) for filename in previous['pages'].values()):
+        return previous
+    digest = hashlib.sha1(version.encode()).hexdigest()[:12]
+    pages = {}
+    for url, (name, template, context) in REPORT_PAGES.items():
+        html = render_to_string(template, context()).encode()
+        filename = f'{name}.{digest}.html'
+        path = os.path.join(root, filename)
+        _write(path, html)
+        _write(f'{path}.gz', gzip.compress(html, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(f'{path}.br', brotli.compress(html, mode=brotli.MODE_TEXT))
+        pages[url] = filename
+
+    superseded = []
+    if previous and previous['version'] != version:
+        superseded = [{'version': previous['version'], 'pages': previous['pages']}]
+        superseded += previous['previous']
+    manifest = {'version': version, 'rendered_at': time.time(), 'pages': pages,
+                'previous': superseded[:KEEP_PREVIOUS]}
+    _write(os.path.join(root, MANIFEST), json.dumps(manifest, indent=2).encode())
+    prune(root, manifest)
+    return manifest
+
+
+def prune(root, manifest):
+    """Remove rendered pages no longer in ``manifest``.
+
+    Only files named like the renderer's own output are touched; anything
+    else in ``root`` is left alone.
+    """
+    keep = set()
+    for entry in [manifest] + manifest['previous']:
+        keep.update(entry['pages'].values())
+    for filename in os.listdir(root):
+        match = RENDERED.fullmatch(filename)
+        path = os.path.join(root, filename)
+        if match and match.group(1) not in keep and os.path.isfile(path):
+            os.remove(path)
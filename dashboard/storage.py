@@ -0,0 +1,7 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    # Files collectstatic has not processed yet (e.g. before the first
+    # deploy) get their plain URL instead of an error
+    manifest_strict = False
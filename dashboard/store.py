@@ -0,0 +1,168 @@
+"""Queries against the sales tables (``SALES_DATA_BACKEND = 'sql'``).
+
+The same answers ``dashboard.queries`` gives from the in-memory frame,
+computed by the database as ``GROUP BY`` queries over ``Sale``, which
+``manage.py import_sales`` loads. Filters become ``WHERE`` clauses the
+indexes on order date, (region, category) and customer can serve, and
+only grouped results are brought into Python, so the server's memory
+does not grow with the number of sales.
+"""
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from analytics.lazy import lazy_import
+from analytics.timeindex import TimeIndex
+from .models import Customer, Geography, Product, Sale, SalesImport
+
+pd = lazy_import('pandas')
+
+# Dataset column -> Sale field (or expression) holding it
+COLUMNS = {
+    'Region': 'region',
+    'Category': 'category',
+    'Segment': 'segment',
+    'Ship Mode': 'ship_mode',
+    'Sub-Category': 'product__sub_category',
+    'State': 'geography__state',
+    'City': 'geography__city',
+    'Customer ID': 'customer_id',
+    'Customer Name': 'customer__name',
+    'Product ID': 'product__product_id',
+    'Product Name': 'product__name',
+    'Year': ExtractYear('order_date'),
+    'Month': ExtractMonth('order_date'),
+}
+
+# Display name of the entities ranked by key (see analytics.profiles.PROFILE_KEYS)
+NAMES = {
+    'Customer ID': 'customer__name',
+    'Product ID': 'product__name',
+}
+
+
+def sales(filters=None):
+    """Sales matching ``filters`` (see filters.parse_filters)."""
+    queryset = Sale.objects.all()
+    for column, values in (filters or {}).items():
+        if column in COLUMNS:
+            queryset = queryset.filter(**{f'{COLUMNS[column]}__in': values})
+    if filters and 'from' in filters:
+        queryset = queryset.filter(order_date__gte=filters['from'])
+    if filters and 'to' in filters:
+        queryset = queryset.filter(order_date__lte=filters['to'])
+    return queryset
+
+
+def _grouped(queryset, column):
+    field = COLUMNS[column]
+    if not isinstance(field, str):
+        queryset, field = queryset.annotate(key=field), 'key'
+    rows = queryset.values(field).annotate(sum=Sum('sales'), count=Count('*')).order_by(field)
+    table = pd.DataFrame.from_records(list(rows), columns=[field, 'sum', 'count'])
+    return table.set_index(field).rename_axis(column)
+
+
+def sales_table(column, filters=None):
+    """Sum, count and mean of Sales per value of ``column``."""
+    table = _grouped(sales(filters), column)
+    table['mean'] = table['sum'] / table['count']
+    return table
+
+
+def totals(filters=None):
+    overall = sales(filters).aggregate(
+        # By name, as the in-memory backend counts them
+        sum=Sum('sales'), count=Count('*'),
+        unique_customers=Count('customer__name', distinct=True))
+    total = overall['sum'] or 0.0
+    return {
+        'sum': total,
+        'count': overall['count'],
+        'mean': total / overall['count'] if overall['count'] else 0.0,
+        'unique_customers': overall['unique_customers'],
+    }
+
+
+def top_sales(column, n, filters=None):
+    # ORDER BY the aggregate and LIMIT, so only the top rows are fetched
+    field = COLUMNS[column]
+    rows = (sales(filters).values(field).annotate(total=Sum('sales'))
+            .order_by('-total', field)[:n])
+    return pd.Series({row[field]: row['total'] for row in rows}, name='Sales', dtype=float)
+
+
+def entity_names(key, ids):
+    names = dict(Sale.objects.filter(**{f'{COLUMNS[key]}__in': list(ids)})
+                 .values_list(COLUMNS[key], NAMES[key]).distinct())
+    return pd.Series([names.get(entity) for entity in ids], index=ids)
+
+
+# Filter options are read from the small dimension tables where possible
+OPTIONS = {
+    'Region': (Geography, 'region'),
+    'Segment': (Customer, 'segment'),
+    'Category': (Product, 'category'),
+    'Sub-Category': (Product, 'sub_category'),
+    'State': (Geography, 'state'),
+}
+
+
+def filter_options(column):
+    model, field = OPTIONS.get(column, (Sale, COLUMNS[column]))
+    return list(model.objects.values_list(field, flat=True).distinct().order_by(field))
+
+
+def last_order_day():
+    return Sale.objects.aggregate(last=Max('order_date'))['last']
+
+
+def time_index(filters=None):
+    """A ``TimeIndex`` of the daily totals of the sales matching ``filters``.
+
+    Dates in ``filters`` are left to the index's own window arguments.
+    The index spans the days of all sales, so series and windows cover
+    the same periods, zero-filled, whatever the filters select.
+    """
+    filters = {column: values for column, values in (filters or {}).items()
+               if column not in ('from', 'to')}
+    rows = (sales(filters).values('order_date')
+            .annotate(sales=Sum('sales'), count=Count('*')).order_by('order_date'))
+    daily = pd.DataFrame.from_records(list(rows), columns=['order_date', 'sales', 'count'])
+    daily.index = pd.DatetimeIndex(pd.to_datetime(daily.pop('order_date')), name='Order Date')
+    daily = daily.astype({'sales': float, 'count': 'int64'})
+    span = Sale.objects.aggregate(first=Min('order_date'), last=Max('order_date'))
+    return TimeIndex(daily).spanning(span['first'], span['last'])
+
+
+def customer_detail(customer_id):
+    """(profile, order lines) of a customer, or None for an unknown one."""
+    lines = Sale.objects.filter(customer_id=customer_id)
+    profile = lines.aggregate(
+        orders=Count('*'), distinct_orders=Count('order_id', distinct=True),
+        total_sales=Sum('sales'), first_order=Min('order_date'), last_order=Max('order_date'),
+        name=Max('customer__name'))
+    if not profile['orders']:
+        return None
+    profile['mean_sales'] = profile['total_sales'] / profile['orders']
+    for field in ('first_order', 'last_order'):
+        profile[field] = pd.Timestamp(profile[field])
+    orders = pd.DataFrame.from_records(
+        list(lines.order_by('row_id').values_list(
+            'order_id', 'order_date', 'product__name', 'category', 'sales')),
+        columns=['Order ID', 'Order Date', 'Product Name', 'Category', 'Sales'])
+    orders['Order Date'] = pd.to_datetime(orders['Order Date'])
+    return pd.Series(profile), orders
+
+
+def latest_import():
+    return SalesImport.objects.order_by('-pk').first()
+
+
+def version():
+    latest = latest_import()
+    return f'sql-{latest.pk}' if latest else 'sql-empty'
+
+
+def last_modified():
+    latest = latest_import()
+    return latest.imported_at if latest else None
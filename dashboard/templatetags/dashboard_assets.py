@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _plotly_js_url():
+    name = settings.PLOTLY_JS_STATIC
+    if staticfiles_storage.exists(name) or finders.find(name):
+        return staticfiles_storage.url(name)
+    return settings.PLOTLY_JS_FALLBACK_URL
+
+
+@register.simple_tag
+def plotly_js():
+    """URL of the self-hosted Plotly bundle, or the pinned CDN copy until it is built."""
+    return _plotly_js_url()
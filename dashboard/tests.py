@@ -1,3 +1,477 @@
-from django.test import TestCase
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import threading
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from analytics.bitmaps import BitmapIndex, grouped_sales
+from analytics.cli import date, fraction, non_negative_int, positive_float, positive_int
+from analytics.compact import compact_frame
+from analytics.cube import build_cube, merge_cubes, rollup
+from analytics.downsample import lttb, minmax
+from analytics.partitions import overlapping, read_partitions, write_partitions
+from analytics.profiles import build_profiles, merge_profiles
+from analytics.sampling import StratifiedSample, draw_sample
+from analytics.snapshot import build_snapshot, load_sales, read_snapshot
+from analytics.streaming import aggregate_csv, aggregate_frame
+from analytics.timeindex import TimeIndex
+from . import queries
+from .api import MAX_TREND_POINTS
+from .dataset import DatasetCache, add_date_parts, dataset_cache
+from .reports import render_reports
+
+
+class AppendTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        with open(settings.SALES_DATA_PATH, 'rb') as f:
+            lines = f.read().splitlines(keepends=True)
+        self.path = os.path.join(self.directory, 'train.csv')
+        with open(self.path, 'wb') as f:
+            f.writelines(lines[:51])
+        self.next_line = lines[51]
+
+    def append(self, data):
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        # Make sure the stat() key changes even on coarse mtime clocks
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_partial_line_keeps_serving_the_loaded_rows(self):
+        cache = DatasetCache(path=self.path)
+        loaded = cache.get()
+        self.assertEqual(len(loaded), 50)
+
+        self.append(self.next_line[:20])
+        self.assertIs(cache.get(), loaded)
+
+        self.append(self.next_line[20:])
+        frame = cache.get()
+        self.assertEqual(len(frame), 51)
+        self.assertEqual(cache.appends, 2)
+        self.assertEqual(cache.reloads, 0)
+        self.assertEqual(frame['Row ID'].iloc[-1], 51)
+
+    def test_every_lookup_is_counted_once(self):
+        cache = DatasetCache(path=self.path)
+
+        def lookups():
+            for _ in range(200):
+                cache.get()
+
+        threads = [threading.Thread(target=lookups) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 1600)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_an_order_split_by_an_append_counts_once(self):
+        with open(self.path, 'rb') as f:
+            lines = f.read().splitlines(keepends=True)
+        # Rows 1 and 2 are lines of the same order
+        with open(self.path, 'wb') as f:
+            f.writelines(lines[:2])
+        cache = DatasetCache(path=self.path)
+
+        def profiles():
+            return cache.derived(
+                'profiles', lambda df: build_profiles(df, 'Customer ID', 'Customer Name'),
+                update=lambda index, rows: merge_profiles(
+                    index, build_profiles(rows, 'Customer ID', 'Customer Name')))
+
+        customer = cache.get()['Customer ID'].iloc[0]
+        self.assertEqual(profiles().loc[customer, 'distinct_orders'], 1)
+        self.append(lines[2])
+        profile = profiles().loc[customer]
+        self.assertEqual(cache.appends, 1)
+        self.assertEqual((profile['orders'], profile['distinct_orders']), (2, 1))
+
+
+class ApproxTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        with open(settings.SALES_DATA_PATH, 'rb') as f:
+            lines = f.read().splitlines(keepends=True)
+        self.path = os.path.join(self.directory, 'train.csv')
+        with open(self.path, 'wb') as f:
+            f.writelines(lines[:501])
+        dataset_cache.clear()
+        self.addCleanup(dataset_cache.clear)
+
+    def test_sql_backend_answers_exactly(self):
+        call_command('import_sales', source=self.path, stdout=io.StringIO())
+        with override_settings(SALES_DATA_BACKEND='sql', SALES_DATA_PATH=self.path):
+            response = self.client.get('/?approx=1')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotContains(response, '±')
+            self.assertNotContains(response, 'Approximate mode')
+            payload = self.client.get('/api/metrics/?approx=1').json()
+            self.assertEqual(payload['total_orders'], 500)
+            self.assertNotIn('approx', payload)
+
+    def test_pandas_backend_estimates_from_a_sample(self):
+        with override_settings(SALES_DATA_PATH=self.path):
+            response = self.client.get('/?approx=1')
+            self.assertContains(response, '±')
+            self.assertContains(response, 'Approximate mode')
+            payload = self.client.get('/api/metrics/?approx=1').json()
+            self.assertIn('total_sales_ci', payload)
+            self.assertFalse(os.path.exists(os.path.join(self.directory, 'train.samples')))
+
+
+class RenderReportsTests(TestCase):
+    def test_only_stale_renderings_are_pruned(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        os.makedirs(os.path.join(root, 'assets'))
+        stale = ['dashboard.0123456789ab.html', 'dashboard.0123456789ab.html.gz',
+                 'insights.0123456789ab.html.br']
+        unrelated = ['notes.txt', 'index.html', 'dashboard.html']
+        for filename in stale + unrelated:
+            with open(os.path.join(root, filename), 'w') as f:
+                f.write('x')
+
+        manifest = render_reports(root)
+
+        remaining = set(os.listdir(root))
+        self.assertTrue(remaining.isdisjoint(stale))
+        self.assertTrue(remaining.issuperset(unrelated + ['assets']))
+        self.assertTrue(remaining.issuperset(manifest['pages'].values()))
+
+
+class StreamingTests(TestCase):
+    def test_chunked_totals_match_a_single_pass(self):
+        whole = aggregate_frame(load_sales(settings.SALES_DATA_PATH))
+        chunked = aggregate_csv(settings.SALES_DATA_PATH, chunksize=1000)
+        for dimension in ['Sub-Category', 'Region', 'Month']:
+            self.assertEqual(chunked.by(dimension)['sum'].round(2).to_dict(),
+                             whole.by(dimension)['sum'].round(2).to_dict())
+        self.assertEqual(chunked.totals()['sum'], whole.totals()['sum'])
+
+    def test_duplicates_need_row_hashes(self):
+        df = load_sales(settings.SALES_DATA_PATH)
+        with self.assertRaises(ValueError):
+            aggregate_frame(df).duplicates()
+        self.assertEqual(aggregate_frame(df, duplicates=True).duplicates(), 0)
+
+
+class DownsampleTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = pd.date_range('2015-01-01', periods=2000, freq='D')
+        self.y = rng.normal(100, 20, 2000).cumsum()
+
+    def test_budget_and_end_points(self):
+        for method in (lttb, minmax):
+            for points in (1, 2, 3, 4, 5, 50, 999, 1999):
+                kept = method(self.x, self.y, points)
+                self.assertLessEqual(len(kept), points, (method.__name__, points))
+                self.assertTrue(np.all(np.diff(kept) > 0))
+                self.assertEqual(kept[0], 0)
+                if points > 1:
+                    self.assertEqual(kept[-1], len(self.y) - 1)
+            self.assertEqual(len(method(self.x, self.y, 5000)), len(self.y))
+
+    def test_minmax_keeps_the_extremes(self):
+        for points in (4, 10, 100):
+            kept = minmax(self.x, self.y, points)
+            self.assertIn(np.argmax(self.y), kept)
+            self.assertIn(np.argmin(self.y), kept)
+        self.assertIn(np.argmax(self.y), minmax(self.x, self.y, 3))
+
+    def test_trend_payload_stays_within_its_budget(self):
+        total = self.client.get('/api/trend/day/?points=100000').json()
+        self.assertLessEqual(len(total['labels']), MAX_TREND_POINTS)
+        for method in ('lttb', 'minmax'):
+            payload = self.client.get(f'/api/trend/day/?points=3&method={method}').json()
+            self.assertEqual(len(payload['labels']), 3)
+            self.assertEqual(payload['method'], method)
+            self.assertEqual(payload['labels'][0], total['labels'][0])
+            self.assertEqual(payload['labels'][-1], total['labels'][-1])
+            payload = self.client.get(f'/api/trend/day/?points=50&method={method}').json()
+            self.assertLessEqual(len(payload['labels']), 50)
+            self.assertEqual(payload['total_points'], len(total['labels']))
+
+
+class ArgumentTypeTests(TestCase):
+    def test_counts(self):
+        self.assertEqual(positive_int('5'), 5)
+        self.assertEqual(non_negative_int('0'), 0)
+        for convert, value in [(positive_int, '0'), (positive_int, '-5'),
+                               (non_negative_int, '-1'), (non_negative_int, 'two')]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                convert(value)
+
+    def test_budgets(self):
+        self.assertEqual(fraction('0.05'), 0.05)
+        self.assertEqual(positive_float('2.5'), 2.5)
+        for convert, value in [(fraction, '0'), (fraction, '-0.01'), (fraction, '1'),
+                               (fraction, 'nan'), (positive_float, '0'), (positive_float, 'x')]:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                convert(value)
+
+    def test_dates(self):
+        self.assertEqual(date('2017-01-31'), '2017-01-31')
+        for value in ['2017-13-45', 'soon', '']:
+            with self.assertRaises(argparse.ArgumentTypeError):
+                date(value)
+
+
+class SnapshotTests(TestCase):
+    def test_string_columns_load_as_their_stored_codes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'train.snapshot')
+        build_snapshot(settings.SALES_DATA_PATH, path)
+        text = read_snapshot(path)
+        coded = read_snapshot(path, categorical=True)
+        for name in ['Order ID', 'Customer Name', 'Product Name']:
+            self.assertIsInstance(coded[name].dtype, pd.CategoricalDtype)
+            self.assertTrue(coded[name].astype(object).equals(text[name].astype(object)))
+        compact = compact_frame(coded)
+        for name in ['Order ID', 'Customer Name', 'Region']:
+            self.assertTrue(compact[name].equals(coded[name]))
+
+
+def plain(data):
+    # Backends label groups with different index types (text, categorical)
+    return data.set_axis(pd.Index(data.index.astype(object).tolist()))
+
+
+class BackendParityTests(TestCase):
+    FILTERS = [
+        {},
+        {'Region': ['West']},
+        {'Region': ['West'], 'Category': ['Technology']},
+        {'Segment': ['Consumer'], 'from': '2016-03-01', 'to': '2016-09-30'},
+        {'State': ['Vermont', 'Wyoming']},
+        {'Region': ['Central'], 'State': ['Vermont']},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.directory = tempfile.mkdtemp()
+        with open(settings.SALES_DATA_PATH, 'rb') as f:
+            lines = f.read().splitlines(keepends=True)
+        cls.path = os.path.join(cls.directory, 'train.csv')
+        with open(cls.path, 'wb') as f:
+            f.writelines(lines[:2001])
+        call_command('import_sales', source=cls.path, stdout=io.StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+        super().tearDownClass()
+
+    def answers(self, backend, filters):
+        dataset_cache.clear()
+        with override_settings(SALES_DATA_BACKEND=backend, SALES_DATA_PATH=self.path):
+            comparison = queries.period_comparison(filters)
+            return {
+                'totals': queries.overall_totals(filters),
+                'table': queries.sales_table('Category', filters)[['sum', 'count']],
+                'trend': queries.trend('month', filters),
+                'current': comparison and comparison['current'],
+                'previous': comparison and comparison['previous'],
+                'top': queries.top_sales('State', 5, filters),
+            }
+
+    def test_sql_and_pandas_agree(self):
+        self.addCleanup(dataset_cache.clear)
+        for filters in self.FILTERS:
+            with self.subTest(filters=filters):
+                sql, memory = self.answers('sql', filters), self.answers('pandas', filters)
+                for name in ('totals', 'current', 'previous'):
+                    self.assertEqual(sql[name].keys(), memory[name].keys())
+                    for key, value in memory[name].items():
+                        self.assertAlmostEqual(sql[name][key], value, places=6, msg=(name, key))
+                pd.testing.assert_frame_equal(plain(sql['table']), plain(memory['table']),
+                                              check_dtype=False)
+                pd.testing.assert_frame_equal(sql['trend'], memory['trend'], check_dtype=False)
+                pd.testing.assert_series_equal(plain(sql['top']), plain(memory['top']),
+                                               check_dtype=False, check_names=False)
+
+
+def sales_frame():
+    return add_date_parts(load_sales(settings.SALES_DATA_PATH))
+
+
+class IndexTests(TestCase):
+    """The cube, bitmap and time indexes against plain pandas."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.df = sales_frame()
+
+    def expected(self, dimensions, df=None):
+        df = self.df if df is None else df
+        return df.groupby(dimensions, observed=True)['Sales'].agg(['sum', 'count', 'mean', 'std'])
+
+    def test_cube_rollups(self):
+        cube = build_cube(self.df)
+        half = len(self.df) // 2
+        merged = merge_cubes(build_cube(self.df.iloc[:half]), build_cube(self.df.iloc[half:]))
+        for dimensions in (['Category'], ['Region', 'Segment'], ['Year', 'Month'], ['State']):
+            expected = self.expected(dimensions)
+            for source in (cube, merged):
+                result = rollup(source, dimensions)[['sum', 'count', 'mean', 'std']]
+                pd.testing.assert_frame_equal(result.reindex(expected.index), expected,
+                                              check_dtype=False)
+
+    def test_bitmap_selections(self):
+        half = len(self.df) // 2
+        indexes = [BitmapIndex.build(self.df),
+                   BitmapIndex.build(self.df.iloc[:half]).append(self.df.iloc[half:])]
+        for filters in ({'Region': ['West', 'East']},
+                        {'Region': ['West'], 'Category': ['Furniture', 'Technology']},
+                        {'State': ['Vermont'], 'Segment': ['Corporate']},
+                        {'Region': ['Nowhere']}):
+            expected = np.ones(len(self.df), dtype=bool)
+            for column, values in filters.items():
+                expected &= self.df[column].isin(values).to_numpy()
+            for index in indexes:
+                mask = index.mask(filters)
+                np.testing.assert_array_equal(mask, expected)
+                positions = np.arange(0, len(self.df), 7)
+                np.testing.assert_array_equal(index.contains(filters, positions), expected[positions])
+            result = grouped_sales(self.df, 'Sub-Category', expected)
+            table = self.expected('Sub-Category', self.df[expected])[['sum', 'count', 'mean']]
+            pd.testing.assert_frame_equal(result.reindex(table.index), table, check_dtype=False)
+        self.assertIsNone(indexes[0].mask({}))
+
+    def test_time_index_windows_and_series(self):
+        index = TimeIndex.build(self.df)
+        dates = self.df['Order Date']
+        for start, end in (('2015-01-01', '2015-12-31'), ('2016-02-10', '2016-03-05'),
+                           ('2017-06-15', '2017-06-15'), ('2030-01-01', '2030-12-31')):
+            rows = self.df[(dates >= start) & (dates <= end)]
+            window = index.window(start, end)
+            self.assertAlmostEqual(window['sum'], rows['Sales'].sum(), places=6)
+            self.assertEqual(window['count'], len(rows))
+            west = index.window(start, end, dimension='Region', value='West')
+            self.assertAlmostEqual(west['sum'], rows.loc[rows['Region'] == 'West', 'Sales'].sum(),
+                                   places=6)
+
+        monthly = index.resample('month')
+        expected = self.df.groupby(dates.dt.to_period('M'))['Sales'].agg(['sum', 'count'])
+        expected = expected.reindex(monthly.index, fill_value=0)
+        pd.testing.assert_frame_equal(monthly, expected, check_dtype=False, check_names=False)
+        quarter = index.resample('quarter', '2016-02-10', '2016-08-20', dimension='Category',
+                                 value='Technology')
+        rows = self.df[(dates >= '2016-02-10') & (dates <= '2016-08-20')
+                       & (self.df['Category'] == 'Technology')]
+        self.assertEqual(len(quarter), 3)
+        self.assertAlmostEqual(quarter['sum'].sum(), rows['Sales'].sum(), places=6)
+        self.assertEqual(quarter['count'].sum(), len(rows))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'train.csv')
+        shutil.copyfile(settings.SALES_DATA_PATH, self.path)
+        dataset_cache.clear()
+        self.addCleanup(dataset_cache.clear)
+        settings_override = override_settings(SALES_DATA_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_unchanged_data_answers_304(self):
+        response = self.client.get('/api/sales/by/region/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        cached = self.client.get('/api/sales/by/region/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        # Filters do not change the data version, so the same tag matches
+        other = self.client.get('/api/metrics/?region=West', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 304)
+
+    def test_changed_data_answers_200_with_a_new_tag(self):
+        etag = self.client.get('/api/metrics/')['ETag']
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        response = self.client.get('/api/metrics/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['total_orders'], 9800)
+
+
+class PartitionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.df = load_sales(settings.SALES_DATA_PATH)
+        cls.path = tempfile.mkdtemp()
+        cls.meta = write_partitions(cls.df, os.path.join(cls.path, 'train.partitions'))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+        super().tearDownClass()
+
+    def rows_between(self, start, end):
+        dates = self.df['Order Date']
+        rows = self.df[(dates >= start) & (dates <= end)]
+        return rows.sort_values('Row ID').reset_index(drop=True)
+
+    def test_only_overlapping_partitions_are_read(self):
+        entries = overlapping(self.meta, '2016-03-15', '2016-05-10')
+        self.assertEqual([entry['path'] for entry in entries], ['2016/03', '2016/04', '2016/05'])
+        self.assertEqual(overlapping(self.meta, '2030-01-01', '2030-12-31'), [])
+        self.assertEqual(len(overlapping(self.meta)), len(self.meta['partitions']))
+        self.assertEqual(sum(entry['rows'] for entry in self.meta['partitions']), len(self.df))
+
+    def test_edge_partitions_are_trimmed_to_the_window(self):
+        path = os.path.join(self.path, 'train.partitions')
+        for start, end in (('2016-03-15', '2016-05-10'), ('2017-01-01', '2017-12-31'),
+                           ('2015-07-04', '2015-07-04')):
+            rows = read_partitions(path, start, end)
+            expected = self.rows_between(start, end)
+            self.assertEqual(len(rows), len(expected))
+            result = rows.sort_values('Row ID').reset_index(drop=True)
+            np.testing.assert_array_equal(result['Row ID'], expected['Row ID'])
+            self.assertAlmostEqual(result['Sales'].sum(), expected['Sales'].sum(), places=6)
+            self.assertTrue(result['Order Date'].between(start, end).all())
+        columns = read_partitions(path, '2016-03-15', '2016-05-10', columns=['Sales'])
+        self.assertEqual(list(columns.columns), ['Sales'])
+
+
+class SamplingTests(TestCase):
+    def test_intervals_cover_the_true_totals(self):
+        df = load_sales(settings.SALES_DATA_PATH)
+        exact = df.groupby('Category', observed=True)['Sales'].sum()
+        covered, checks = 0, 0
+        for seed in range(20):
+            sample = StratifiedSample(draw_sample(df, 1024, seed=seed))
+            self.assertEqual(sample.population, len(df))
+            overall = sample.estimate().iloc[0]
+            by_category = sample.estimate('Category')
+            for estimate, truth in [(overall, df['Sales'].sum()),
+                                    *((by_category.loc[name], exact[name]) for name in exact.index)]:
+                covered += abs(estimate['sum'] - truth) <= estimate['sum_ci']
+                checks += 1
+        # 95% intervals: 76 of 80 expected inside, allow for chance
+        self.assertGreaterEqual(covered / checks, 0.85)
+
+    def test_the_whole_population_has_no_error(self):
+        df = load_sales(settings.SALES_DATA_PATH)
+        overall = StratifiedSample(draw_sample(df, len(df))).estimate().iloc[0]
+        self.assertAlmostEqual(overall['sum'], df['Sales'].sum(), places=4)
+        self.assertAlmostEqual(overall['sum_ci'], 0.0, places=6)
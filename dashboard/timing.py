@@ -0,0 +1,69 @@
+"""Named stage timing within a request.
+
+Code marks its stages with ``stage('load')``, ``stage('render')`` and so
+on. Stages are exclusive: while a nested stage runs, the enclosing one
+is paused, so the stage durations of a request add up to (at most) its
+total time. Outside a request being timed, ``stage()`` does nothing.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+STAGES = ['load', 'aggregate', 'figure', 'serialize', 'render']
+
+_current = ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self._stack = []  # [stage name, resumed at]
+
+    def _charge(self, now):
+        name, resumed = self._stack[-1]
+        self.durations[name] = self.durations.get(name, 0.0) + now - resumed
+
+    def enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self._charge(now)
+        self._stack.append([name, now])
+
+    def exit(self):
+        now = time.perf_counter()
+        self._charge(now)
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total=None):
+        """``Server-Timing`` header value, durations in milliseconds."""
+        entries = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.durations.items()]
+        entries.append(f'total;dur={(self.total() if total is None else total) * 1000:.1f}')
+        return ', '.join(entries)
+
+
+def start_timer():
+    timer = RequestTimer()
+    return timer, _current.set(timer)
+
+
+def stop_timer(token):
+    _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    timer.enter(name)
+    try:
+        yield
+    finally:
+        timer.exit()
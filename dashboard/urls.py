@@ -1,7 +1,19 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, metrics, views
+
+if getattr(settings, 'DASHBOARD_ASYNC_VIEWS', False):
+    from . import async_views as pages
+else:
+    pages = views
 
 urlpatterns = [
-    path('', views.dashboard, name='dashboard'),
-    path('insights/', views.insights, name='insights'),
-]
\ No newline at end of file
+    path('', pages.dashboard, name='dashboard'),
+    path('insights/', pages.insights, name='insights'),
+    path('customers/<str:customer_id>/', views.customer, name='customer'),
+    path('api/metrics/', api.metrics, name='api_metrics'),
+    path('api/sales/by/<slug:dimension>/', api.sales_by_dimension, name='api_sales_by'),
+    path('api/top/<slug:dimension>/', api.top, name='api_top'),
+    path('api/trend/<slug:frequency>/', api.sales_trend, name='api_trend'),
+    path('metrics', metrics.metrics, name='metrics'),
+]
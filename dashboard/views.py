@@ -1,89 +1,212 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.offline import plot
+from datetime import date, timedelta
+
+from django.http import Http404
 from django.shortcuts import render
-import os
+from django.urls import reverse
+
+from .filters import APPROX_PARAM, DATE_PARAMS, FILTER_PARAMS, filter_query, parse_filters
+from .queries import (customer_detail, entity_names, filter_options, last_order_day,
+                      overall_totals, period_comparison, sales_summary, sales_table, sql_backend,
+                      top_sales)
+from .timing import stage
+
+# Dashboard charts are drawn in the browser from the JSON API; the page
+# itself only carries the chart descriptions.
+DASHBOARD_CHARTS = [
+    {'kind': 'pie', 'api': ('api_sales_by', 'category'), 'title': 'Sales by Category'},
+    {'kind': 'bar', 'api': ('api_sales_by', 'region'), 'title': 'Sales by Region'},
+    {'kind': 'line', 'api': ('api_trend', 'month'), 'title': 'Monthly Sales Trend'},
+    {'kind': 'top', 'api': ('api_top', 'product'), 'title': 'Top 10 Products'},
+    # Downsampled by the API to DEFAULT_TREND_POINTS, peaks kept
+    {'kind': 'series', 'api': ('api_trend', 'day'), 'title': 'Daily Sales Trend', 'wide': True},
+]
+
+def filter_form(filters):
+    # Options for the filter bar, read from the bitmap index's value lists
+    selected = {key: value for key, value in filters.items() if key != APPROX_PARAM}
+    exact = filter_query(selected)
+    return {
+        'fields': [
+            {'param': param, 'label': column, 'options': filter_options(column),
+             'selected': filters.get(column, [])}
+            for param, column in FILTER_PARAMS.items()
+        ],
+        'from': filters.get('from', ''),
+        'to': filters.get('to', ''),
+        'active': bool(selected),
+        # The database backend always answers exactly
+        'approx': bool(filters.get(APPROX_PARAM)) and not sql_backend(),
+        'approx_available': not sql_backend(),
+        # The same filters answered the other way
+        'exact_url': f'?{exact}' if exact else '?',
+        'approx_url': '?' + filter_query({**selected, APPROX_PARAM: True}),
+    }
+
+def date_presets(filters):
+    # Quick date ranges, relative to the last day with orders
+    last_day = last_order_day()
+    if last_day is None:
+        return []
+    last = date.fromisoformat(str(last_day))
+    ranges = [
+        ('Last 30 days', last - timedelta(days=29), last),
+        ('Last 90 days', last - timedelta(days=89), last),
+        ('Year to date', date(last.year, 1, 1), last),
+        ('Last year', date(last.year - 1, 1, 1), date(last.year - 1, 12, 31)),
+        ('All time', None, None),
+    ]
+    other = {key: value for key, value in filters.items() if key not in DATE_PARAMS}
+    presets = []
+    for label, start, end in ranges:
+        dates = {'from': start.isoformat(), 'to': end.isoformat()} if start else {}
+        query = filter_query({**other, **dates})
+        presets.append({
+            'label': label,
+            'url': f'?{query}' if query else '?',
+            'active': dates == {key: filters[key] for key in DATE_PARAMS if key in filters},
+        })
+    return presets
+
+# Page sections. Each builds part of a page's context from the filters;
+# the views below run them in turn, the async views (async_views.py)
+# concurrently, falling back to the paired placeholder.
+
+def metrics_section(filters):
+    # Key metrics; filtered pages reduce over the rows the bitmap index selects
+    overall = overall_totals(filters)
+    if 'sum_ci' in overall:
+        return approx_metrics(overall)
+    return {
+        'total_sales': f"${overall['sum']:,.2f}",
+        'total_orders': f"{overall['count']:,}",
+        'avg_order_value': f"${overall['mean']:.2f}",
+        'unique_customers': f"{overall['unique_customers']:,}",
+    }
+
+def approx_metrics(overall):
+    # Estimates from the sample, each with its confidence interval
+    return {
+        'total_sales': f"${overall['sum']:,.0f} ± ${overall['sum_ci']:,.0f}",
+        'total_orders': f"{overall['count']:,.0f} ± {overall['count_ci']:,.0f}",
+        'avg_order_value': f"${overall['mean']:.2f} ± ${overall['mean_ci']:.2f}",
+        'unique_customers': 'n/a',
+        'approx': {'sample_rows': f"{overall['sample_rows']:,}",
+                   'confidence': f"{overall['confidence']:.0%}"},
+    }
+
+def comparison_section(filters):
+    # Period-over-period change, from the time index's prefix sums
+    if 'from' not in filters and 'to' not in filters:
+        return {'comparison': None}
+    periods = period_comparison(filters)
+    if periods is None:
+        return {'comparison': None}
+    change = periods['change']
+    return {'comparison': {
+        'previous_sales': f"${periods['previous']['sum']:,.2f}",
+        'previous_range': f"{periods['previous_start']} to {periods['previous_end']}",
+        'change': f'{change:+.1%}' if change is not None else 'n/a',
+        'up': change is not None and change >= 0,
+    }}
+
+def controls_section(filters):
+    return {'filter_form': filter_form(filters), 'date_presets': date_presets(filters)}
+
+def chart_links(filters):
+    # Chart data requests carry the same filters
+    query = filter_query(filters)
+    return [
+        {'kind': chart['kind'], 'title': chart['title'], 'api': chart['api'],
+         'wide': chart.get('wide', False),
+         'url': reverse(chart['api'][0], args=chart['api'][1:]) + (f'?{query}' if query else '')}
+        for chart in DASHBOARD_CHARTS
+    ]
 
-def load_data():
-    df = pd.read_csv('train.csv')
-    df['Order Date'] = pd.to_datetime(df['Order Date'], format='%d/%m/%Y')
-    df['Year'] = df['Order Date'].dt.year
-    df['Month'] = df['Order Date'].dt.month
-    return df
+def summary_section(name, column):
+    def build(filters):
+        return {name: sales_summary(sales_table(column, filters)).to_html(classes='table table-striped')}
+    return build
 
+def top_customers_section(filters):
+    # Top performers, read from the per-entity profile index unless filtered
+    top_customers = top_sales('Customer ID', 5, filters)
+    names = entity_names('Customer ID', top_customers.index)
+    return {'top_customers': [
+        {'id': customer_id, 'name': names[customer_id], 'sales': sales}
+        for customer_id, sales in top_customers.items()
+    ]}
+
+def top_states_section(filters):
+    return {'top_states': top_sales('State', 5, filters).to_dict()}
+
+UNAVAILABLE = '<p class="text-muted mb-0">Temporarily unavailable.</p>'
+
+DASHBOARD_SECTIONS = [
+    (metrics_section, {'total_sales': '-', 'total_orders': '-',
+                       'avg_order_value': '-', 'unique_customers': '-', 'approx': None}),
+    (comparison_section, {'comparison': None}),
+    (controls_section, {'filter_form': None, 'date_presets': []}),
+]
+
+INSIGHTS_SECTIONS = [
+    (summary_section('category_analysis', 'Category'), {'category_analysis': UNAVAILABLE}),
+    (summary_section('region_analysis', 'Region'), {'region_analysis': UNAVAILABLE}),
+    (summary_section('segment_analysis', 'Segment'), {'segment_analysis': UNAVAILABLE}),
+    (top_customers_section, {'top_customers': []}),
+    (top_states_section, {'top_states': {}}),
+    (lambda filters: {'filter_form': filter_form(filters)}, {'filter_form': None}),
+]
+
+# Page views are timed as the 'aggregate' stage; data loading and template
+# rendering inside them are timed as their own stages (see dashboard.timing)
+@stage('aggregate')
 def dashboard(request):
-    df = load_data()
-    
-    # Key metrics
-    total_sales = df['Sales'].sum()
-    total_orders = len(df)
-    avg_order_value = df['Sales'].mean()
-    unique_customers = df['Customer Name'].nunique()
-    
-    # Category chart
-    category_sales = df.groupby('Category')['Sales'].sum().reset_index()
-    fig1 = px.pie(category_sales, values='Sales', names='Category', 
-                  title='Sales by Category', color_discrete_sequence=px.colors.qualitative.Set3)
-    chart1 = plot(fig1, output_type='div', include_plotlyjs=False)
+    filters = parse_filters(request.GET)
     
-    # Regional chart
-    region_sales = df.groupby('Region')['Sales'].sum().reset_index()
-    fig2 = px.bar(region_sales, x='Region', y='Sales', 
-                  title='Sales by Region', color='Sales', color_continuous_scale='Blues')
-    chart2 = plot(fig2, output_type='div', include_plotlyjs=False)
+    context = {'charts': chart_links(filters)}
+    for build, _ in DASHBOARD_SECTIONS:
+        context.update(build(filters))
     
-    # Monthly trend
-    monthly_sales = df.groupby('Month')['Sales'].sum().reset_index()
-    fig3 = px.line(monthly_sales, x='Month', y='Sales', 
-                   title='Monthly Sales Trend', markers=True)
-    chart3 = plot(fig3, output_type='div', include_plotlyjs=False)
-    
-    # Top products
-    top_products = df.groupby('Product Name')['Sales'].sum().nlargest(10).reset_index()
-    fig4 = px.bar(top_products, x='Sales', y='Product Name', 
-                  title='Top 10 Products', orientation='h', color='Sales')
-    chart4 = plot(fig4, output_type='div', include_plotlyjs=False)
-    
-    context = {
-        'total_sales': f"${total_sales:,.2f}",
-        'total_orders': f"{total_orders:,}",
-        'avg_order_value': f"${avg_order_value:.2f}",
-        'unique_customers': f"{unique_customers:,}",
-        'chart1': chart1,
-        'chart2': chart2,
-        'chart3': chart3,
-        'chart4': chart4,
-    }
-    
-    return render(request, 'dashboard/dashboard.html', context)
+    with stage('render'):
+        return render(request, 'dashboard/dashboard.html', context)
 
+@stage('aggregate')
 def insights(request):
-    df = load_data()
-    
-    # Business insights
-    category_analysis = df.groupby('Category').agg({
-        'Sales': ['sum', 'mean', 'count']
-    }).round(2)
+    filters = parse_filters(request.GET)
     
-    region_analysis = df.groupby('Region').agg({
-        'Sales': ['sum', 'mean', 'count']
-    }).round(2)
+    context = {}
+    for build, _ in INSIGHTS_SECTIONS:
+        context.update(build(filters))
     
-    segment_analysis = df.groupby('Segment').agg({
-        'Sales': ['sum', 'mean', 'count']
-    }).round(2)
+    with stage('render'):
+        return render(request, 'dashboard/insights.html', context)
+
+@stage('aggregate')
+def customer(request, customer_id):
+    # Profile lookup and row positions come from per-version indexes,
+    # so this page never scans the full dataset
+    detail = customer_detail(customer_id)
+    if detail is None:
+        raise Http404(f'Unknown customer: {customer_id}')
+    profile, orders = detail
     
-    # Top performers
-    top_customers = df.groupby('Customer Name')['Sales'].sum().nlargest(5)
-    top_states = df.groupby('State')['Sales'].sum().nlargest(5)
+    by_category = orders.groupby('Category', observed=True)['Sales'].sum().sort_values(ascending=False)
+    recent = orders.sort_values('Order Date', ascending=False)[
+        ['Order ID', 'Order Date', 'Product Name', 'Category', 'Sales']]
     
     context = {
-        'category_analysis': category_analysis.to_html(classes='table table-striped'),
-        'region_analysis': region_analysis.to_html(classes='table table-striped'),
-        'segment_analysis': segment_analysis.to_html(classes='table table-striped'),
-        'top_customers': top_customers.to_dict(),
-        'top_states': top_states.to_dict(),
+        'customer_id': customer_id,
+        'name': profile['name'],
+        'total_sales': f"${profile['total_sales']:,.2f}",
+        'order_lines': f"{profile['orders']:,}",
+        'distinct_orders': f"{profile['distinct_orders']:,}",
+        'avg_order_value': f"${profile['mean_sales']:.2f}",
+        'first_order': profile['first_order'].date(),
+        'last_order': profile['last_order'].date(),
+        'by_category': by_category.to_dict(),
+        'recent_orders': recent.head(20).to_html(
+            classes='table table-striped', index=False, float_format=lambda v: f'{v:,.2f}'),
     }
     
-    return render(request, 'dashboard/insights.html', context)
\ No newline at end of file
+    with stage('render'):
+        return render(request, 'dashboard/customer.html', context)
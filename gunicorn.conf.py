@@ -0,0 +1,20 @@
+"""gunicorn settings: gunicorn sales_dashboard.wsgi:application
+
+The app is preloaded so the dataset is loaded and its indexes are built
+once, in the master, and shared copy-on-write with the workers. With
+SHARED_DATASET_DIR set, the frame itself is memory-mapped from files
+shared by every worker, including data loaded after a refresh.
+"""
+import os
+
+# Read by sales_dashboard/wsgi.py (and asgi.py)
+os.environ.setdefault('DASHBOARD_PRELOAD', '1')
+
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+
+def post_fork(server, worker):
+    # Threads do not survive the fork, so each worker starts its own
+    from dashboard.refresher import start_refresher
+    start_refresher()
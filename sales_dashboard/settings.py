@@ -19,8 +19,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dashboard.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, plus the pre-rendered report pages (dashboard.reports)
+    'dashboard.middleware.StaticReportMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +58,23 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered fragments (API payloads), keyed by data version and spec. Any
+    # backend works; locmem evicts least recently used entries once
+    # MAX_ENTRIES is reached.
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+}
+
+FRAGMENT_CACHE_ALIAS = 'fragments'
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
 USE_I18N = True
@@ -64,4 +83,65 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # collectstatic writes content-hashed names plus .gz (and .br with
+    # brotli installed) variants, which WhiteNoise serves with far-future caching
+    'staticfiles': {'BACKEND': 'dashboard.storage.StaticStorage'},
+}
+
+# Plotly bundle with only the trace types the dashboard draws, built with
+# ``python manage.py build_plotly_bundle``; until it is, the same pinned
+# bundle is loaded from Plotly's CDN
+PLOTLY_JS_VERSION = '2.35.2'
+PLOTLY_JS_STATIC = 'dashboard/vendor/plotly-basic.min.js'
+PLOTLY_JS_FALLBACK_URL = f'https://cdn.plot.ly/plotly-basic-{PLOTLY_JS_VERSION}.min.js'
+
+# Pre-rendered dashboard and insights pages (manage.py render_reports),
+# served in place of the views while they match the data being served
+REPORTS_ROOT = BASE_DIR / 'reports'
+REPORTS_URL = '/reports/'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+SALES_DATA_PATH = BASE_DIR / 'train.csv'
+
+# Where the dashboard reads sales from: 'pandas' loads SALES_DATA_PATH into
+# memory; 'sql' runs the aggregations in the database (dashboard.store),
+# loaded with ``python manage.py import_sales``.
+SALES_DATA_BACKEND = 'pandas'
+
+# Dictionary-encode text columns, downcast integers and drop unused
+# columns when loading the dataset (see analytics.compact)
+SALES_DATA_COMPACT = True
+
+# Relative error on total Sales, at 95% confidence, that sizes the
+# stratified sample ?approx=1 pages answer from (analytics.sampling).
+# Each process draws it in memory from the data it serves.
+SALES_SAMPLE_ERROR = 0.02
+
+# Directory of dataset generations shared by all server processes through
+# memory-mapped files (analytics.shared), e.g. BASE_DIR / 'train.shared'.
+# Each process then maps one copy of the frame instead of loading its own;
+# best with SALES_DATA_COMPACT, whose text columns are shared as codes.
+SHARED_DATASET_DIR = None
+
+# Seconds between background checks of SALES_DATA_PATH (dashboard.refresher).
+# When set, new data is loaded and the pages warmed off the request path
+# while requests keep getting the previous version; None loads on demand.
+DATA_REFRESH_INTERVAL = 30
+
+# Server-Timing headers and the /metrics endpoint (dashboard.middleware).
+# Tracing memory uses tracemalloc, which slows every request down.
+REQUEST_METRICS_TRACE_MEMORY = False
+
+# Allow ?profile=1 to return a profiler report instead of the page
+REQUEST_PROFILING = DEBUG
+
+# Serve the dashboard and insights pages from dashboard.async_views, which
+# build their sections concurrently. Use with an ASGI server, e.g.
+#   gunicorn sales_dashboard.asgi:application -k uvicorn.workers.UvicornWorker
+DASHBOARD_ASYNC_VIEWS = False
+ASYNC_VIEW_WORKERS = 4
+# Seconds before a page section is replaced by its placeholder
+ASYNC_SECTION_TIMEOUT = 5.0
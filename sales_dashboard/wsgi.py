@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sales_dashboard.settings')
 
 application = get_wsgi_application()
+
+from dashboard.refresher import preload, start_refresher  # noqa: E402
+
+if os.environ.get('DASHBOARD_PRELOAD'):
+    # gunicorn preload_app (gunicorn.conf.py): load once before the workers
+    # fork; each worker starts its refresher in the post_fork hook
+    preload()
+else:
+    # Loads the data ahead of requests and keeps it fresh, when DATA_REFRESH_INTERVAL is set
+    start_refresher()
@@ -1,165 +1,255 @@
+import argparse
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set style for better visualizations
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
-
-# Load the data
-df = pd.read_csv('train.csv')
-
-print("=== SALES DATA ANALYSIS - EXPLORATORY DATA ANALYSIS ===\n")
-
-# 1. BASIC DATA OVERVIEW
-print("1. BASIC DATA OVERVIEW")
-print("=" * 50)
-print(f"Dataset Shape: {df.shape}")
-print(f"Total Records: {df.shape[0]:,}")
-print(f"Total Features: {df.shape[1]}")
-print("\nColumn Names:")
-print(df.columns.tolist())
-
-print("\nData Types:")
-print(df.dtypes)
-
-print("\nFirst 5 rows:")
-print(df.head())
-
-# 2. DATA QUALITY ASSESSMENT
-print("\n\n2. DATA QUALITY ASSESSMENT")
-print("=" * 50)
-print("Missing Values:")
-missing_data = df.isnull().sum()
-print(missing_data[missing_data > 0])
-
-print("\nDuplicate Rows:")
-print(f"Number of duplicate rows: {df.duplicated().sum()}")
-
-print("\nBasic Statistics:")
-print(df.describe())
-
-# 3. SALES PERFORMANCE ANALYSIS
-print("\n\n3. SALES PERFORMANCE ANALYSIS")
-print("=" * 50)
-
-# Convert date columns
-df['Order Date'] = pd.to_datetime(df['Order Date'], format='%d/%m/%Y')
-df['Ship Date'] = pd.to_datetime(df['Ship Date'], format='%d/%m/%Y')
-
-# Extract date components
-df['Year'] = df['Order Date'].dt.year
-df['Month'] = df['Order Date'].dt.month
-df['Quarter'] = df['Order Date'].dt.quarter
-
-# Key metrics
-total_sales = df['Sales'].sum()
-total_orders = df.shape[0]
-avg_order_value = df['Sales'].mean()
-
-print(f"Total Sales: ${total_sales:,.2f}")
-print(f"Total Orders: {total_orders:,}")
-print(f"Average Order Value: ${avg_order_value:.2f}")
-
-# 4. CATEGORY ANALYSIS
-print("\n\n4. CATEGORY & SUB-CATEGORY ANALYSIS")
-print("=" * 50)
-
-# Sales by Category
-category_sales = df.groupby('Category')['Sales'].agg(['sum', 'count', 'mean']).round(2)
-category_sales.columns = ['Total_Sales', 'Order_Count', 'Avg_Order_Value']
-category_sales = category_sales.sort_values('Total_Sales', ascending=False)
-print("Sales by Category:")
-print(category_sales)
-
-# Top Sub-Categories
-print("\nTop 10 Sub-Categories by Sales:")
-subcategory_sales = df.groupby('Sub-Category')['Sales'].sum().sort_values(ascending=False).head(10)
-print(subcategory_sales)
-
-# 5. REGIONAL ANALYSIS
-print("\n\n5. REGIONAL ANALYSIS")
-print("=" * 50)
-
-# Sales by Region
-region_sales = df.groupby('Region')['Sales'].agg(['sum', 'count', 'mean']).round(2)
-region_sales.columns = ['Total_Sales', 'Order_Count', 'Avg_Order_Value']
-region_sales = region_sales.sort_values('Total_Sales', ascending=False)
-print("Sales by Region:")
-print(region_sales)
-
-# Top States
-print("\nTop 10 States by Sales:")
-state_sales = df.groupby('State')['Sales'].sum().sort_values(ascending=False).head(10)
-print(state_sales)
-
-# 6. CUSTOMER SEGMENT ANALYSIS
-print("\n\n6. CUSTOMER SEGMENT ANALYSIS")
-print("=" * 50)
-
-segment_analysis = df.groupby('Segment')['Sales'].agg(['sum', 'count', 'mean']).round(2)
-segment_analysis.columns = ['Total_Sales', 'Order_Count', 'Avg_Order_Value']
-segment_analysis = segment_analysis.sort_values('Total_Sales', ascending=False)
-print("Sales by Customer Segment:")
-print(segment_analysis)
-
-# 7. TEMPORAL ANALYSIS
-print("\n\n7. TEMPORAL ANALYSIS")
-print("=" * 50)
-
-# Sales by Year
-yearly_sales = df.groupby('Year')['Sales'].sum().sort_index()
-print("Sales by Year:")
-print(yearly_sales)
-
-# Sales by Month
-monthly_sales = df.groupby('Month')['Sales'].sum().sort_index()
-print("\nSales by Month:")
-print(monthly_sales)
-
-# 8. SHIPPING MODE ANALYSIS
-print("\n\n8. SHIPPING MODE ANALYSIS")
-print("=" * 50)
-
-shipping_analysis = df.groupby('Ship Mode')['Sales'].agg(['sum', 'count', 'mean']).round(2)
-shipping_analysis.columns = ['Total_Sales', 'Order_Count', 'Avg_Order_Value']
-shipping_analysis = shipping_analysis.sort_values('Total_Sales', ascending=False)
-print("Sales by Shipping Mode:")
-print(shipping_analysis)
-
-# 9. TOP CUSTOMERS AND PRODUCTS
-print("\n\n9. TOP CUSTOMERS AND PRODUCTS")
-print("=" * 50)
-
-# Top Customers
-print("Top 10 Customers by Sales:")
-top_customers = df.groupby('Customer Name')['Sales'].sum().sort_values(ascending=False).head(10)
-print(top_customers)
-
-# Top Products
-print("\nTop 10 Products by Sales:")
-top_products = df.groupby('Product Name')['Sales'].sum().sort_values(ascending=False).head(10)
-print(top_products)
-
-# 10. SALES DISTRIBUTION ANALYSIS
-print("\n\n10. SALES DISTRIBUTION ANALYSIS")
-print("=" * 50)
-
-print(f"Sales Statistics:")
-print(f"Minimum Sale: ${df['Sales'].min():.2f}")
-print(f"Maximum Sale: ${df['Sales'].max():.2f}")
-print(f"Median Sale: ${df['Sales'].median():.2f}")
-print(f"Standard Deviation: ${df['Sales'].std():.2f}")
-
-# Quartiles
-print(f"\nSales Quartiles:")
-print(f"25th Percentile: ${df['Sales'].quantile(0.25):.2f}")
-print(f"50th Percentile: ${df['Sales'].quantile(0.50):.2f}")
-print(f"75th Percentile: ${df['Sales'].quantile(0.75):.2f}")
-
-print("\n=== EDA COMPLETE ===")
-print("Key insights have been generated. Run the visualization script for charts.")
\ No newline at end of file
+from analytics.cli import date, fraction, non_negative_int, positive_float, positive_int
+from analytics.engine import EmptyWindowError
+from analytics.sampling import load_sample
+from analytics.streaming import aggregate_sales
+
+
+def sales_table(aggregate, dimension):
+    table = aggregate.by(dimension)[['sum', 'count', 'mean']].round(2)
+    table.columns = ['Total_Sales', 'Order_Count', 'Avg_Order_Value']
+    return table.sort_values('Total_Sales', ascending=False)
+
+
+def report(aggregate):
+    print("=== SALES DATA ANALYSIS - EXPLORATORY DATA ANALYSIS ===\n")
+
+    # 1. BASIC DATA OVERVIEW
+    print("1. BASIC DATA OVERVIEW")
+    print("=" * 50)
+    shape = (aggregate.rows, len(aggregate.columns))
+    print(f"Dataset Shape: {shape}")
+    print(f"Total Records: {shape[0]:,}")
+    print(f"Total Features: {shape[1]}")
+    print("\nColumn Names:")
+    print(aggregate.columns)
+
+    print("\nData Types:")
+    print(aggregate.dtypes)
+
+    print("\nFirst 5 rows:")
+    print(aggregate.head)
+
+    # 2. DATA QUALITY ASSESSMENT
+    print("\n\n2. DATA QUALITY ASSESSMENT")
+    print("=" * 50)
+    print("Missing Values:")
+    missing_data = aggregate.missing.astype(int)
+    print(missing_data[missing_data > 0])
+
+    print("\nDuplicate Rows:")
+    print(f"Number of duplicate rows: {aggregate.duplicates()}")
+
+    print("\nBasic Statistics:")
+    print(aggregate.describe())
+
+    # 3. SALES PERFORMANCE ANALYSIS
+    print("\n\n3. SALES PERFORMANCE ANALYSIS")
+    print("=" * 50)
+
+    # Key metrics
+    sales = aggregate.totals()
+    total_sales = sales['sum']
+    total_orders = aggregate.rows
+    avg_order_value = sales['mean']
+
+    print(f"Total Sales: ${total_sales:,.2f}")
+    print(f"Total Orders: {total_orders:,}")
+    print(f"Average Order Value: ${avg_order_value:.2f}")
+
+    # 4. CATEGORY ANALYSIS
+    print("\n\n4. CATEGORY & SUB-CATEGORY ANALYSIS")
+    print("=" * 50)
+
+    # Sales by Category
+    category_sales = sales_table(aggregate, 'Category')
+    print("Sales by Category:")
+    print(category_sales)
+
+    # Top Sub-Categories
+    print("\nTop 10 Sub-Categories by Sales:")
+    subcategory_sales = aggregate.top('Sub-Category', 10)
+    print(subcategory_sales)
+
+    # 5. REGIONAL ANALYSIS
+    print("\n\n5. REGIONAL ANALYSIS")
+    print("=" * 50)
+
+    # Sales by Region
+    region_sales = sales_table(aggregate, 'Region')
+    print("Sales by Region:")
+    print(region_sales)
+
+    # Top States
+    print("\nTop 10 States by Sales:")
+    state_sales = aggregate.top_entities('State', 10)
+    print(state_sales)
+
+    # 6. CUSTOMER SEGMENT ANALYSIS
+    print("\n\n6. CUSTOMER SEGMENT ANALYSIS")
+    print("=" * 50)
+
+    segment_analysis = sales_table(aggregate, 'Segment')
+    print("Sales by Customer Segment:")
+    print(segment_analysis)
+
+    # 7. TEMPORAL ANALYSIS
+    print("\n\n7. TEMPORAL ANALYSIS")
+    print("=" * 50)
+
+    # Sales by Year
+    yearly = aggregate.timeline.resample('year')['sum']
+    yearly_sales = pd.Series(yearly.to_numpy(), index=pd.Index(yearly.index.year, name='Year'), name='Sales')
+    print("Sales by Year:")
+    print(yearly_sales)
+
+    # Sales by Month
+    monthly_sales = aggregate.by('Month')['sum'].rename('Sales').sort_index()
+    print("\nSales by Month:")
+    print(monthly_sales)
+
+    # 8. SHIPPING MODE ANALYSIS
+    print("\n\n8. SHIPPING MODE ANALYSIS")
+    print("=" * 50)
+
+    shipping_analysis = sales_table(aggregate, 'Ship Mode')
+    print("Sales by Shipping Mode:")
+    print(shipping_analysis)
+
+    # 9. TOP CUSTOMERS AND PRODUCTS
+    print("\n\n9. TOP CUSTOMERS AND PRODUCTS")
+    print("=" * 50)
+
+    # Top Customers
+    print("Top 10 Customers by Sales:")
+    top_customers = aggregate.top_entities('Customer ID', 10)
+    print(top_customers)
+
+    # Top Products
+    print("\nTop 10 Products by Sales:")
+    top_products = aggregate.top_entities('Product ID', 10)
+    print(top_products)
+
+    # 10. SALES DISTRIBUTION ANALYSIS
+    print("\n\n10. SALES DISTRIBUTION ANALYSIS")
+    print("=" * 50)
+
+    distribution = aggregate.numeric['Sales']
+    print(f"Sales Statistics:")
+    print(f"Minimum Sale: ${sales['min']:.2f}")
+    print(f"Maximum Sale: ${sales['max']:.2f}")
+    print(f"Median Sale: ${distribution.quantile(0.50):.2f}")
+    print(f"Standard Deviation: ${sales['std']:.2f}")
+
+    # Quartiles
+    print(f"\nSales Quartiles:")
+    print(f"25th Percentile: ${distribution.quantile(0.25):.2f}")
+    print(f"50th Percentile: ${distribution.quantile(0.50):.2f}")
+    print(f"75th Percentile: ${distribution.quantile(0.75):.2f}")
+
+    print("\n=== EDA COMPLETE ===")
+    print("Key insights have been generated. Run the visualization script for charts.")
+
+
+def estimate_table(estimate):
+    table = estimate[['sum', 'sum_ci', 'count', 'mean', 'mean_ci', 'share', 'share_ci']].copy()
+    table['count'] = table['count'].round().astype(int)
+    table.columns = ['Total_Sales', 'Sales_CI', 'Order_Count', 'Avg_Order_Value', 'Avg_CI',
+                     'Share', 'Share_CI']
+    table = table.round({'Total_Sales': 2, 'Sales_CI': 2, 'Avg_Order_Value': 2, 'Avg_CI': 2,
+                         'Share': 4, 'Share_CI': 4})
+    return table.sort_values('Total_Sales', ascending=False)
+
+
+def approx_report(sample, start=None, end=None):
+    # The report's tables, estimated from a stratified sample with confidence
+    # intervals; distinct counts, rankings of customers and products and the
+    # sales distribution need every row and are left out
+    frame = sample.frame
+    mask = None
+    if start or end:
+        dates = frame['Order Date']
+        keep = dates.notna()
+        if start:
+            keep &= dates >= start
+        if end:
+            keep &= dates <= end
+        mask = keep.to_numpy()
+    frame['Year'] = frame['Order Date'].dt.year
+    frame['Month'] = frame['Order Date'].dt.month
+
+    print("=== SALES DATA ANALYSIS - APPROXIMATE ===\n")
+    print(f"Estimated from a stratified sample of {sample.rows:,} of {sample.population:,} rows "
+          f"(strata: {' x '.join(sample.strata)}).")
+    print(f"_CI columns are {sample.confidence:.0%} confidence interval half-widths.\n")
+
+    overall = sample.estimate(mask=mask)
+    if overall.empty:
+        print("No sampled orders in this date range.")
+        return
+    overall = overall.iloc[0]
+    print("SALES PERFORMANCE")
+    print("=" * 50)
+    print(f"Total Sales: ${overall['sum']:,.2f} +/- ${overall['sum_ci']:,.2f}")
+    print(f"Total Orders: {overall['count']:,.0f} +/- {overall['count_ci']:,.0f}")
+    print(f"Average Order Value: ${overall['mean']:.2f} +/- ${overall['mean_ci']:.2f}")
+
+    for title, dimension in [('Category', 'Category'), ('Sub-Category', 'Sub-Category'),
+                             ('Region', 'Region'), ('State (top 10)', 'State'),
+                             ('Customer Segment', 'Segment'), ('Year', 'Year'),
+                             ('Month', 'Month'), ('Shipping Mode', 'Ship Mode')]:
+        table = estimate_table(sample.estimate(dimension, mask))
+        if dimension == 'State':
+            table = table.head(10)
+        elif dimension in ('Year', 'Month'):
+            table = table.sort_index()
+        print(f"\n\nSALES BY {title.upper()}")
+        print("=" * 50)
+        print(table.to_string())
+
+    print("\n=== APPROXIMATE EDA COMPLETE ===")
+    print("Run without --approx for exact figures and the full report.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exploratory analysis of the sales data.')
+    parser.add_argument('path', nargs='?', default='train.csv')
+    parser.add_argument('--chunksize', type=positive_int,
+                        help='Stream the CSV in chunks of this many rows instead of loading it whole.')
+    parser.add_argument('--workers', type=non_negative_int, default=1,
+                        help='Aggregate row partitions in this many processes (0: one per CPU).')
+    parser.add_argument('--from', dest='start', type=date, metavar='DATE',
+                        help='Only orders on or after this date; reads just the month '
+                             'partitions in the window (built next to the CSV on first use).')
+    parser.add_argument('--to', dest='end', type=date, metavar='DATE',
+                        help='Only orders up to this date.')
+    parser.add_argument('--approx', type=fraction, nargs='?', const=0.01, metavar='ERROR',
+                        help='Estimate from a stratified sample (Region x Category) sized for this '
+                             'relative error on total Sales at 95%% confidence (default 0.01). '
+                             'Samples are kept next to the CSV for reuse.')
+    parser.add_argument('--time-budget', type=positive_float, metavar='SECONDS',
+                        help='With --approx, size the sample to estimate each table in about '
+                             'this many seconds instead.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for drawing the sample.')
+    args = parser.parse_args()
+
+    if args.approx is not None or args.time_budget is not None:
+        sample = load_sample(args.path, error=0.01 if args.approx is None else args.approx,
+                             seconds=args.time_budget, seed=args.seed)
+        approx_report(sample, args.start, args.end)
+        return
+
+    try:
+        aggregate = aggregate_sales(args.path, chunksize=args.chunksize, duplicates=True,
+                                    workers=args.workers or None, start=args.start, end=args.end)
+    except EmptyWindowError as error:
+        parser.error(str(error))
+    report(aggregate)
+
+
+if __name__ == '__main__':
+    main()
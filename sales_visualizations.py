@@ -1,176 +1,377 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from datetime import datetime
+"""Draw the sales report charts into two dashboard images.
+
+    python sales_visualizations.py [path] [--workers N] [--dpi 300] [--format png] [--headless]
+
+The data is aggregated once, up front, into the small inputs each panel
+needs. Every panel is then drawn on its own into an image under
+``--cache-dir``, named by a hash of its input, its renderer's code and the
+style, so a re-run only redraws the panels whose input changed. The stale
+panels are drawn in parallel across a process pool, and the two dashboard
+images are composed from the panel images.
+"""
+import argparse
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import textwrap
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+from PIL import Image
 warnings.filterwarnings('ignore')
 
-# Load and prepare data
-df = pd.read_csv('train.csv')
-df['Order Date'] = pd.to_datetime(df['Order Date'], format='%d/%m/%Y')
-df['Ship Date'] = pd.to_datetime(df['Ship Date'], format='%d/%m/%Y')
-df['Year'] = df['Order Date'].dt.year
-df['Month'] = df['Order Date'].dt.month
-df['Quarter'] = df['Order Date'].dt.quarter
-
-# Set style
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
-
-# Create comprehensive visualizations
-fig = plt.figure(figsize=(20, 24))
-
-# 1. Sales by Category
-plt.subplot(4, 3, 1)
-category_sales = df.groupby('Category')['Sales'].sum().sort_values(ascending=True)
-category_sales.plot(kind='barh', color=['#FF6B6B', '#4ECDC4', '#45B7D1'])
-plt.title('Total Sales by Category', fontsize=14, fontweight='bold')
-plt.xlabel('Sales ($)')
-plt.ylabel('Category')
-for i, v in enumerate(category_sales.values):
-    plt.text(v + 10000, i, f'${v:,.0f}', va='center', fontweight='bold')
-
-# 2. Sales by Region
-plt.subplot(4, 3, 2)
-region_sales = df.groupby('Region')['Sales'].sum().sort_values(ascending=False)
-colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
-plt.pie(region_sales.values, labels=region_sales.index, autopct='%1.1f%%', colors=colors, startangle=90)
-plt.title('Sales Distribution by Region', fontsize=14, fontweight='bold')
-
-# 3. Sales by Customer Segment
-plt.subplot(4, 3, 3)
-segment_sales = df.groupby('Segment')['Sales'].sum().sort_values(ascending=True)
-segment_sales.plot(kind='barh', color=['#FECA57', '#FF9FF3', '#54A0FF'])
-plt.title('Sales by Customer Segment', fontsize=14, fontweight='bold')
-plt.xlabel('Sales ($)')
-plt.ylabel('Segment')
-for i, v in enumerate(segment_sales.values):
-    plt.text(v + 5000, i, f'${v:,.0f}', va='center', fontweight='bold')
-
-# 4. Monthly Sales Trend
-plt.subplot(4, 3, 4)
-monthly_sales = df.groupby('Month')['Sales'].sum()
-plt.plot(monthly_sales.index, monthly_sales.values, marker='o', linewidth=3, markersize=8, color='#FF6B6B')
-plt.title('Monthly Sales Trend', fontsize=14, fontweight='bold')
-plt.xlabel('Month')
-plt.ylabel('Sales ($)')
-plt.xticks(range(1, 13))
-plt.grid(True, alpha=0.3)
-
-# 5. Yearly Sales Trend
-plt.subplot(4, 3, 5)
-yearly_sales = df.groupby('Year')['Sales'].sum()
-plt.bar(yearly_sales.index, yearly_sales.values, color=['#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57'])
-plt.title('Yearly Sales Performance', fontsize=14, fontweight='bold')
-plt.xlabel('Year')
-plt.ylabel('Sales ($)')
-for i, v in enumerate(yearly_sales.values):
-    plt.text(yearly_sales.index[i], v + 10000, f'${v:,.0f}', ha='center', fontweight='bold')
-
-# 6. Top 10 Sub-Categories
-plt.subplot(4, 3, 6)
-top_subcategories = df.groupby('Sub-Category')['Sales'].sum().sort_values(ascending=False).head(10)
-top_subcategories.plot(kind='bar', color='#FF9FF3')
-plt.title('Top 10 Sub-Categories by Sales', fontsize=14, fontweight='bold')
-plt.xlabel('Sub-Category')
-plt.ylabel('Sales ($)')
-plt.xticks(rotation=45, ha='right')
-
-# 7. Sales Distribution (Histogram)
-plt.subplot(4, 3, 7)
-plt.hist(df['Sales'], bins=50, color='#54A0FF', alpha=0.7, edgecolor='black')
-plt.title('Sales Distribution', fontsize=14, fontweight='bold')
-plt.xlabel('Sales Amount ($)')
-plt.ylabel('Frequency')
-plt.axvline(df['Sales'].mean(), color='red', linestyle='--', linewidth=2, label=f'Mean: ${df["Sales"].mean():.2f}')
-plt.legend()
-
-# 8. Shipping Mode Analysis
-plt.subplot(4, 3, 8)
-shipping_sales = df.groupby('Ship Mode')['Sales'].sum().sort_values(ascending=True)
-shipping_sales.plot(kind='barh', color=['#96CEB4', '#FECA57', '#FF9FF3', '#54A0FF'])
-plt.title('Sales by Shipping Mode', fontsize=14, fontweight='bold')
-plt.xlabel('Sales ($)')
-plt.ylabel('Shipping Mode')
-
-# 9. Top 10 States
-plt.subplot(4, 3, 9)
-top_states = df.groupby('State')['Sales'].sum().sort_values(ascending=False).head(10)
-top_states.plot(kind='bar', color='#45B7D1')
-plt.title('Top 10 States by Sales', fontsize=14, fontweight='bold')
-plt.xlabel('State')
-plt.ylabel('Sales ($)')
-plt.xticks(rotation=45, ha='right')
-
-# 10. Sales vs Orders by Category
-plt.subplot(4, 3, 10)
-category_stats = df.groupby('Category').agg({'Sales': 'sum', 'Row ID': 'count'}).reset_index()
-category_stats.columns = ['Category', 'Sales', 'Orders']
-plt.scatter(category_stats['Orders'], category_stats['Sales'], s=200, alpha=0.7, c=['#FF6B6B', '#4ECDC4', '#45B7D1'])
-for i, txt in enumerate(category_stats['Category']):
-    plt.annotate(txt, (category_stats['Orders'].iloc[i], category_stats['Sales'].iloc[i]), 
-                xytext=(5, 5), textcoords='offset points', fontweight='bold')
-plt.title('Sales vs Orders by Category', fontsize=14, fontweight='bold')
-plt.xlabel('Number of Orders')
-plt.ylabel('Total Sales ($)')
-
-# 11. Quarterly Sales Trend
-plt.subplot(4, 3, 11)
-quarterly_sales = df.groupby(['Year', 'Quarter'])['Sales'].sum().reset_index()
-quarterly_sales['Period'] = quarterly_sales['Year'].astype(str) + '-Q' + quarterly_sales['Quarter'].astype(str)
-plt.plot(range(len(quarterly_sales)), quarterly_sales['Sales'], marker='o', linewidth=3, markersize=8, color='#96CEB4')
-plt.title('Quarterly Sales Trend', fontsize=14, fontweight='bold')
-plt.xlabel('Quarter')
-plt.ylabel('Sales ($)')
-plt.xticks(range(len(quarterly_sales)), quarterly_sales['Period'], rotation=45)
-plt.grid(True, alpha=0.3)
-
-# 12. Average Order Value by Segment
-plt.subplot(4, 3, 12)
-avg_order_value = df.groupby('Segment')['Sales'].mean().sort_values(ascending=True)
-avg_order_value.plot(kind='barh', color=['#FECA57', '#FF9FF3', '#54A0FF'])
-plt.title('Average Order Value by Segment', fontsize=14, fontweight='bold')
-plt.xlabel('Average Order Value ($)')
-plt.ylabel('Segment')
-for i, v in enumerate(avg_order_value.values):
-    plt.text(v + 2, i, f'${v:.2f}', va='center', fontweight='bold')
-
-plt.tight_layout(pad=3.0)
-plt.savefig('sales_analysis_dashboard.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-# Create additional focused visualizations
-fig, axes = plt.subplots(2, 2, figsize=(16, 12))
-
-# Heatmap of Sales by Region and Category
-pivot_data = df.pivot_table(values='Sales', index='Region', columns='Category', aggfunc='sum')
-sns.heatmap(pivot_data, annot=True, fmt='.0f', cmap='YlOrRd', ax=axes[0,0])
-axes[0,0].set_title('Sales Heatmap: Region vs Category', fontsize=14, fontweight='bold')
-
-# Box plot of Sales by Category
-df.boxplot(column='Sales', by='Category', ax=axes[0,1])
-axes[0,1].set_title('Sales Distribution by Category', fontsize=14, fontweight='bold')
-axes[0,1].set_xlabel('Category')
-axes[0,1].set_ylabel('Sales ($)')
-
-# Time series of daily sales
-daily_sales = df.groupby('Order Date')['Sales'].sum().reset_index()
-axes[1,0].plot(daily_sales['Order Date'], daily_sales['Sales'], alpha=0.7, color='#4ECDC4')
-axes[1,0].set_title('Daily Sales Trend', fontsize=14, fontweight='bold')
-axes[1,0].set_xlabel('Date')
-axes[1,0].set_ylabel('Sales ($)')
-axes[1,0].tick_params(axis='x', rotation=45)
-
-# Top 15 Products by Sales
-top_products = df.groupby('Product Name')['Sales'].sum().sort_values(ascending=False).head(15)
-top_products.plot(kind='barh', ax=axes[1,1], color='#FF6B6B')
-axes[1,1].set_title('Top 15 Products by Sales', fontsize=14, fontweight='bold')
-axes[1,1].set_xlabel('Sales ($)')
-
-plt.tight_layout()
-plt.savefig('detailed_sales_analysis.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-print("Visualizations created successfully!")
-print("Files saved: 'sales_analysis_dashboard.png' and 'detailed_sales_analysis.png'")
\ No newline at end of file
+from analytics.cli import non_negative_int, positive_int
+from analytics.cube import build_cube, rollup
+from analytics.downsample import downsample
+from analytics.lazy import lazy_import
+from analytics.snapshot import load_sales
+from analytics.timeindex import TimeIndex
+
+# Imported when the first panel is drawn; a run that finds every panel
+# cached never needs them
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+
+STYLE = 'seaborn-v0_8'
+PALETTE = 'husl'
+FORMATS = ['png', 'jpg', 'webp']
+
+# Bump to redraw every cached panel after a change the hashes cannot see
+STYLE_VERSION = 1
+
+# Points drawn for the daily series; min-max keeps the envelope a dense
+# line shows, so the panel looks the same for a much longer series
+DAILY_POINTS = 1000
+
+
+def panel_data(df):
+    """The input of every panel, keyed by panel name."""
+    df = df.assign(Year=df['Order Date'].dt.year, Month=df['Order Date'].dt.month)
+
+    # One pass over the rows for the per-dimension totals, one for the daily series
+    cube = build_cube(df)
+    timeline = TimeIndex.build(df, dimensions=[])
+    sales = {dimension: rollup(cube, dimension)['sum']
+             for dimension in ['Category', 'Region', 'Segment', 'Month', 'Sub-Category',
+                               'Ship Mode', 'State']}
+
+    yearly = timeline.resample('year')['sum']
+    quarterly = timeline.resample('quarter')['sum']
+    daily = timeline.resample('day')
+    daily = daily[daily['count'] > 0]['sum']
+    counts, edges = np.histogram(df['Sales'], bins=50)
+
+    return {
+        'category_sales': sales['Category'].sort_values(ascending=True),
+        'region_sales': sales['Region'].sort_values(ascending=False),
+        'segment_sales': sales['Segment'].sort_values(ascending=True),
+        'monthly_sales': sales['Month'],
+        'yearly_sales': pd.Series(yearly.to_numpy(), index=yearly.index.year),
+        'top_subcategories': sales['Sub-Category'].sort_values(ascending=False).head(10),
+        'sales_distribution': {'counts': counts, 'edges': edges, 'mean': df['Sales'].mean()},
+        'shipping_sales': sales['Ship Mode'].sort_values(ascending=True),
+        'top_states': sales['State'].sort_values(ascending=False).head(10),
+        'category_orders': rollup(cube, 'Category')[['sum', 'count']],
+        'quarterly_sales': pd.Series(quarterly.to_numpy(),
+                                     index=[f'{period.year}-Q{period.quarter}' for period in quarterly.index]),
+        'avg_order_value': rollup(cube, 'Segment')['mean'].sort_values(ascending=True),
+        'region_category': rollup(cube, ['Region', 'Category'])['sum'].unstack(),
+        'category_boxes': [cbook.boxplot_stats(values.to_numpy(), labels=[category])[0]
+                           for category, values in df.groupby('Category', observed=True)['Sales']],
+        'daily_sales': downsample(pd.Series(daily.to_numpy(), index=daily.index.to_timestamp()),
+                                  DAILY_POINTS, 'minmax'),
+        'top_products': df.groupby('Product Name', observed=True)['Sales'].sum()
+                          .sort_values(ascending=False).head(15),
+    }
+
+
+# Panel renderers: each draws one panel onto ``ax`` from its panel_data() entry
+
+def category_sales(ax, data):
+    data.plot(kind='barh', color=['#FF6B6B', '#4ECDC4', '#45B7D1'], ax=ax)
+    ax.set_title('Total Sales by Category', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Sales ($)')
+    ax.set_ylabel('Category')
+    for i, v in enumerate(data.values):
+        ax.text(v + 10000, i, f'${v:,.0f}', va='center', fontweight='bold')
+
+
+def region_sales(ax, data):
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
+    ax.pie(data.values, labels=data.index, autopct='%1.1f%%', colors=colors, startangle=90)
+    ax.set_title('Sales Distribution by Region', fontsize=14, fontweight='bold')
+
+
+def segment_sales(ax, data):
+    data.plot(kind='barh', color=['#FECA57', '#FF9FF3', '#54A0FF'], ax=ax)
+    ax.set_title('Sales by Customer Segment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Sales ($)')
+    ax.set_ylabel('Segment')
+    for i, v in enumerate(data.values):
+        ax.text(v + 5000, i, f'${v:,.0f}', va='center', fontweight='bold')
+
+
+def monthly_sales(ax, data):
+    ax.plot(data.index, data.values, marker='o', linewidth=3, markersize=8, color='#FF6B6B')
+    ax.set_title('Monthly Sales Trend', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Sales ($)')
+    ax.set_xticks(range(1, 13))
+    ax.grid(True, alpha=0.3)
+
+
+def yearly_sales(ax, data):
+    ax.bar(data.index, data.values, color=['#4ECDC4', '#45B7D1', '#96CEB4', '#FECA57'])
+    ax.set_title('Yearly Sales Performance', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Sales ($)')
+    for i, v in enumerate(data.values):
+        ax.text(data.index[i], v + 10000, f'${v:,.0f}', ha='center', fontweight='bold')
+
+
+def top_subcategories(ax, data):
+    data.plot(kind='bar', color='#FF9FF3', ax=ax)
+    ax.set_title('Top 10 Sub-Categories by Sales', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Sub-Category')
+    ax.set_ylabel('Sales ($)')
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+
+
+def sales_distribution(ax, data):
+    # Drawn from the bin counts rather than the rows
+    edges = data['edges']
+    ax.hist(edges[:-1], bins=edges, weights=data['counts'], color='#54A0FF', alpha=0.7, edgecolor='black')
+    ax.set_title('Sales Distribution', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Sales Amount ($)')
+    ax.set_ylabel('Frequency')
+    ax.axvline(data['mean'], color='red', linestyle='--', linewidth=2, label=f"Mean: ${data['mean']:.2f}")
+    ax.legend()
+
+
+def shipping_sales(ax, data):
+    data.plot(kind='barh', color=['#96CEB4', '#FECA57', '#FF9FF3', '#54A0FF'], ax=ax)
+    ax.set_title('Sales by Shipping Mode', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Sales ($)')
+    ax.set_ylabel('Shipping Mode')
+
+
+def top_states(ax, data):
+    data.plot(kind='bar', color='#45B7D1', ax=ax)
+    ax.set_title('Top 10 States by Sales', fontsize=14, fontweight='bold')
+    ax.set_xlabel('State')
+    ax.set_ylabel('Sales ($)')
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+
+
+def category_orders(ax, data):
+    ax.scatter(data['count'], data['sum'], s=200, alpha=0.7, c=['#FF6B6B', '#4ECDC4', '#45B7D1'])
+    for category, row in data.iterrows():
+        ax.annotate(category, (row['count'], row['sum']),
+                    xytext=(5, 5), textcoords='offset points', fontweight='bold')
+    ax.set_title('Sales vs Orders by Category', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Number of Orders')
+    ax.set_ylabel('Total Sales ($)')
+
+
+def quarterly_sales(ax, data):
+    ax.plot(range(len(data)), data.values, marker='o', linewidth=3, markersize=8, color='#96CEB4')
+    ax.set_title('Quarterly Sales Trend', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Quarter')
+    ax.set_ylabel('Sales ($)')
+    ax.set_xticks(range(len(data)), data.index, rotation=45)
+    ax.grid(True, alpha=0.3)
+
+
+def avg_order_value(ax, data):
+    data.plot(kind='barh', color=['#FECA57', '#FF9FF3', '#54A0FF'], ax=ax)
+    ax.set_title('Average Order Value by Segment', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Average Order Value ($)')
+    ax.set_ylabel('Segment')
+    for i, v in enumerate(data.values):
+        ax.text(v + 2, i, f'${v:.2f}', va='center', fontweight='bold')
+
+
+def region_category(ax, data):
+    sns.heatmap(data, annot=True, fmt='.0f', cmap='YlOrRd', ax=ax)
+    ax.set_title('Sales Heatmap: Region vs Category', fontsize=14, fontweight='bold')
+
+
+def category_boxes(ax, data):
+    # Drawn from precomputed quartiles and outliers rather than the rows
+    ax.bxp(data)
+    ax.grid(True)
+    ax.set_title('Sales Distribution by Category', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Category')
+    ax.set_ylabel('Sales ($)')
+
+
+def daily_sales(ax, data):
+    ax.plot(data.index, data.values, alpha=0.7, color='#4ECDC4')
+    ax.set_title('Daily Sales Trend', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Sales ($)')
+    ax.tick_params(axis='x', rotation=45)
+
+
+def top_products(ax, data):
+    # Shortened, as the panel no longer borrows its neighbour's width for long names
+    data = data.set_axis([textwrap.shorten(str(name), 45, placeholder='...') for name in data.index])
+    data.plot(kind='barh', ax=ax, color='#FF6B6B')
+    ax.set_title('Top 15 Products by Sales', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Sales ($)')
+
+
+RENDERERS = {renderer.__name__: renderer for renderer in [
+    category_sales, region_sales, segment_sales, monthly_sales, yearly_sales,
+    top_subcategories, sales_distribution, shipping_sales, top_states,
+    category_orders, quarterly_sales, avg_order_value,
+    region_category, category_boxes, daily_sales, top_products,
+]}
+
+# Output image -> grid of panels (rows, columns), figure size in inches, panels
+PAGES = {
+    'sales_analysis_dashboard': ((4, 3), (20, 24), [
+        'category_sales', 'region_sales', 'segment_sales',
+        'monthly_sales', 'yearly_sales', 'top_subcategories',
+        'sales_distribution', 'shipping_sales', 'top_states',
+        'category_orders', 'quarterly_sales', 'avg_order_value',
+    ]),
+    'detailed_sales_analysis': ((2, 2), (16, 12), [
+        'region_category', 'category_boxes', 'daily_sales', 'top_products',
+    ]),
+}
+
+
+def panel_key(name, data, figsize, dpi, format):
+    digest = hashlib.sha1(pickle.dumps((data, figsize, dpi, format, STYLE, PALETTE, STYLE_VERSION)))
+    for code in (RENDERERS[name], render_panel):
+        digest.update(inspect.getsource(code).encode())
+    return digest.hexdigest()[:16]
+
+
+def render_panel(name, data, figsize, dpi, path):
+    # Runs in the pool's worker processes; never opens a window
+    plt.switch_backend('Agg')
+    plt.style.use(STYLE)
+    sns.set_palette(PALETTE)
+    fig, ax = plt.subplots(figsize=figsize)
+    RENDERERS[name](ax, data)
+    fig.tight_layout()
+    root, ext = os.path.splitext(path)
+    fig.savefig(root + '.tmp' + ext, dpi=dpi)
+    plt.close(fig)
+    os.replace(root + '.tmp' + ext, path)
+    return path
+
+
+def compose(tiles, grid, dpi, path):
+    images = [Image.open(tile) for tile in tiles]
+    rows, columns = grid
+    width = max(image.width for image in images)
+    height = max(image.height for image in images)
+    page = Image.new('RGB', (columns * width, rows * height), 'white')
+    for index, image in enumerate(images):
+        page.paste(image.convert('RGB'), ((index % columns) * width, (index // columns) * height))
+    root, ext = os.path.splitext(path)
+    page.save(root + '.tmp' + ext, dpi=(dpi, dpi))
+    os.replace(root + '.tmp' + ext, path)
+
+
+def run_jobs(func, jobs, workers):
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        return [func(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, *zip(*jobs)))
+
+
+def prune(cache_dir, keep):
+    # Drop panel and page images superseded by this run
+    keep = {os.path.basename(path) for path in keep}
+    prefixes = tuple(f'{name}-' for name in [*RENDERERS, *PAGES])
+    for entry in os.listdir(cache_dir):
+        if entry.startswith(prefixes) and entry not in keep:
+            os.remove(os.path.join(cache_dir, entry))
+
+
+def render_report(data, output_dir='.', cache_dir='.panels', dpi=300, format='png', workers=None):
+    """Write the dashboard images; returns their paths and how many panels were drawn."""
+    os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+    tiles, jobs = {}, []
+    for page, (grid, (width, height), names) in PAGES.items():
+        figsize = (width / grid[1], height / grid[0])
+        for name in names:
+            key = panel_key(name, data[name], figsize, dpi, format)
+            tiles[name] = os.path.join(cache_dir, f'{name}-{key}.{format}')
+            if not os.path.exists(tiles[name]):
+                jobs.append((name, data[name], figsize, dpi, tiles[name]))
+
+    workers = workers or os.cpu_count() or 1
+    if jobs:
+        # Once, here, rather than in each worker the pool forks from this process
+        import matplotlib.pyplot  # noqa: F401
+        import seaborn  # noqa: F401
+    run_jobs(render_panel, jobs, workers)
+
+    # Composed pages are cached too, under the names of their panel images
+    pages, compose_jobs = {}, []
+    for page, (grid, _, names) in PAGES.items():
+        key = hashlib.sha1(''.join(tiles[name] for name in names).encode()).hexdigest()[:16]
+        pages[page] = os.path.join(cache_dir, f'{page}-{key}.{format}')
+        if not os.path.exists(pages[page]):
+            compose_jobs.append(([tiles[name] for name in names], grid, dpi, pages[page]))
+    run_jobs(compose, compose_jobs, workers)
+
+    outputs = []
+    for page, cached in pages.items():
+        outputs.append(os.path.join(output_dir, f'{page}.{format}'))
+        shutil.copyfile(cached, outputs[-1])
+    prune(cache_dir, [*tiles.values(), *pages.values()])
+    return outputs, len(jobs)
+
+
+def show(outputs):
+    for output in outputs:
+        plt.figure(figsize=(16, 16))
+        plt.imshow(Image.open(output))
+        plt.axis('off')
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', nargs='?', default='train.csv')
+    parser.add_argument('--output-dir', default='.', help='Where to write the dashboard images.')
+    parser.add_argument('--cache-dir', default='.panels', help='Where to keep the panel images.')
+    parser.add_argument('--dpi', type=positive_int, default=300)
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('--workers', type=non_negative_int, default=0,
+                        help='Draw panels in this many processes (0: one per CPU).')
+    parser.add_argument('--headless', action='store_true',
+                        help='Only write the images; do not open a window.')
+    args = parser.parse_args()
+    if args.headless:
+        matplotlib.use('Agg')
+
+    start = time.perf_counter()
+    data = panel_data(load_sales(args.path))
+    outputs, drawn = render_report(data, args.output_dir, args.cache_dir, args.dpi, args.format,
+                                   args.workers or None)
+
+    print("Visualizations created successfully!")
+    print(f"Files saved: {', '.join(repr(output) for output in outputs)}")
+    print(f"{drawn} of {len(RENDERERS)} panels redrawn in {time.perf_counter() - start:.1f}s")
+    if not args.headless:
+        show(outputs)
+
+
+if __name__ == '__main__':
+    main()